@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+try:
+    from scripts import check_rosdep
+except ImportError:
+    import check_rosdep
+
+
+DEFAULT_FILES = ('rosdep/base.yaml', 'rosdep/python.yaml')
+
+
+def measure(fn, repeat):
+    """Return the best wall time of several calls, with stdout suppressed."""
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def lint_only(buf):
+    rules = [
+        check_rosdep.TrailingSpaces(),
+        check_rosdep.BlankLines(buf.count('\n')),
+        check_rosdep.CorrectIndent(),
+        check_rosdep.Brackets(),
+        check_rosdep.Order(),
+    ]
+    check_rosdep.lint(buf, rules)
+
+
+def main(argv=sys.argv[1:]):
+    parser = argparse.ArgumentParser(
+        description='Measure the time taken by check_rosdep.py on rosdep files')
+    parser.add_argument(
+        'infiles', nargs='*', default=DEFAULT_FILES,
+        help='rosdep YAML files to check (default: %s)' % ' '.join(DEFAULT_FILES))
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='number of runs per file, of which the fastest is reported')
+    args = parser.parse_args(argv)
+
+    print('%-28s %8s %10s %10s' % ('file', 'lines', 'lint (s)', 'total (s)'))
+    for fname in args.infiles:
+        with open(fname) as f:
+            buf = f.read()
+        lint_time = measure(lambda: lint_only(buf), args.repeat)
+        total_time = measure(lambda: check_rosdep.main(fname), args.repeat)
+        print('%-28s %8d %10.3f %10.3f' % (
+            fname, buf.count('\n'), lint_time, total_time))
+
+
+if __name__ == '__main__':
+    main()
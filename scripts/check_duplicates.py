@@ -29,95 +29,204 @@
 import argparse
 import os
 import sys
-import yaml
 
-from rosdep2.sources_list import load_cached_sources_list, DataSourceMatcher, SourcesListLoader, CachedDataSource
-from rosdep2.lookup import RosdepLookup
-from rosdep2.rospkg_loader import DEFAULT_VIEW_KEY
+from rosdep2 import create_default_installer_context
+from rosdep2.sources_list import DataSourceMatcher, CachedDataSource
+from rosdistro import create_distribution_file
 
-from rosdep2.sources_list import *
+try:
+    from scripts.rosdep_rules import compile_rules
+    from scripts.yaml_loader import load_yaml_file
+except ImportError:
+    from rosdep_rules import compile_rules
+    from yaml_loader import load_yaml_file
 
 
-def create_default_sources():
-    sources = []
-    # get all rosdistro files
-    basedir = os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
-    filepath = os.path.join(basedir, 'index-v4.yaml')
-    with open(filepath) as f:
-        content = f.read()
-    index = yaml.safe_load(content)
+# Platforms checked in addition to those of the ROS distributions, for the
+# rosdep files which are tagged to be used on them only
+EXTRA_PLATFORMS = [['', 'osx', 'homebrew']]
+
+
+def get_basedir():
+    return os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+
+def get_active_distributions(basedir):
+    index = load_yaml_file(os.path.join(basedir, 'index-v4.yaml'))
     for distro, metadata in index['distributions'].items():
         if metadata['distribution_status'] == 'end-of-life':
             # Skip end-of-life distributions
             continue
-        distfile = 'file://' + basedir + '/' + distro + '/distribution.yaml'
-        print('loading %s' % distfile)
-        try:
-            rds = RosDistroSource(distro)
-        except KeyError:
-            # When first adding a ROS distro to the repository, it won't yet
-            # exist at the URL that RosDistroSource fetches from github.  When
-            # trying to index it, RosDistroSource will throw a KeyError.  If we
-            # see that KeyError, just ignore it and don't add the distro to the
-            # list of sources.
+        yield distro, metadata
+
+
+def get_platforms(basedir=None):
+    """
+    Get the platforms to check the rosdep keys on.
+
+    The platforms are the release platforms of the distributions in the
+    index which aren't end-of-life, followed by the EXTRA_PLATFORMS.
+
+    :param basedir: the root of the repository, defaults to the one this
+      script is part of.
+
+    :returns: a list of [ROS distribution, OS name, OS code name] tags.
+    """
+    basedir = basedir or get_basedir()
+    platforms = []
+    for distro, metadata in get_active_distributions(basedir):
+        for distfile in metadata['distribution']:
+            data = load_yaml_file(os.path.join(basedir, distfile))
+            for os_name, os_codenames in (data.get('release_platforms') or {}).items():
+                for os_codename in os_codenames:
+                    tags = [distro, os_name, str(os_codename)]
+                    if tags not in platforms:
+                        platforms.append(tags)
+    return platforms + EXTRA_PLATFORMS
+
+
+def get_distribution_rosdep_data(basedir, distro, metadata):
+    """
+    Derive the rosdep rules of the ROS packages released in a distribution.
+
+    The rules are the same as those which rosdep generates from the upstream
+    distribution files, but they are derived from the distribution files in
+    the repository instead, so no network access is needed.
+
+    :param basedir: the root of the repository.
+    :param distro: the name of the ROS distribution.
+    :param metadata: the entry of the distribution in the index.
+
+    :returns: the rosdep data, mapping ROS package names to their rules.
+    """
+    data = [load_yaml_file(os.path.join(basedir, distfile)) for distfile in metadata['distribution']]
+    dist_file = create_distribution_file(distro, data)
+    ctx = create_default_installer_context()
+    tap = os.environ.get('ROSDEP_HOMEBREW_TAP', 'ros')
+
+    default_installers = {
+        os_name: ctx.get_default_os_installer_key(os_name) for os_name in dist_file.release_platforms}
+    rosdep_data = {}
+    for repo_name, repo in dist_file.repositories.items():
+        if repo.release_repository is None:
             continue
+        for pkg in repo.release_repository.package_names:
+            rules = {'osx': {'homebrew': {'packages': ['%s/%s/%s' % (tap, distro, repo_name)]}}}
+            package_name = ('ros-%s-%s' % (distro, pkg)).replace('_', '-')
+            for os_name, os_codenames in dist_file.release_platforms.items():
+                rules.setdefault(os_name, {})
+                for os_codename in os_codenames:
+                    rules[os_name][os_codename] = {default_installers[os_name]: {'packages': [package_name]}}
+            rules['_is_ros'] = True
+            rosdep_data[pkg] = rules
+    return rosdep_data
+
 
-        rosdep_data = get_gbprepo_as_rosdep_data(distro)
+def create_default_sources():
+    sources = []
+    # get all rosdistro files
+    basedir = get_basedir()
+    for distro, metadata in get_active_distributions(basedir):
+        distfile = 'file://' + basedir + '/' + distro + '/distribution.yaml'
+        print('loading %s' % distfile)
+        rosdep_data = get_distribution_rosdep_data(basedir, distro, metadata)
         sources.append(CachedDataSource('yaml', distfile, [distro], rosdep_data))
 
-    for filename in os.listdir(os.path.join(basedir, 'rosdep')):
+    for filename in sorted(os.listdir(os.path.join(basedir, 'rosdep'))):
         if not filename.endswith('yaml'):
             continue
         filepath = os.path.join(basedir, 'rosdep', filename)
-        with open(filepath) as f:
-            content = f.read()
-        rosdep_data = yaml.safe_load(content)
+        rosdep_data = load_yaml_file(filepath)
         tag = 'osx' if 'osx-' in filepath else ''
         sources.append(CachedDataSource('yaml', 'file://' + filepath, [tag], rosdep_data))
     return sources
 
 
-def check_duplicates(sources, os_name, os_codename):
+def index_rosdep_keys(sources, platforms):
+    """
+    Index which sources define each rosdep key on each platform.
+
+    :param sources: the data sources to index.
+    :param platforms: a list of [ROS distribution, OS name, OS code name]
+      tags of the platforms to index the rules for.
+
+    A rule which only names an installer, like 'osx: {macports: ...}', only
+    defines the key on the platforms whose code name is that installer, e.g.
+    'homebrew' on 'osx', unless the installer is 'pip'. Otherwise the
+    macports rules in base.yaml would collide with those in osx-homebrew.yaml.
+
+    :param sources: the data sources to index.
+    :param platforms: a list of [ROS distribution, OS name, OS code name]
+      tags of the platforms to index the rules for.
+
+    :returns: a dictionary mapping rosdep keys to dictionaries mapping
+      (OS name, OS code name) tuples to lists of the sources defining the key
+      on that platform, in the order of the sources.
+    """
+    supported_versions = {}
+    for _, os_name, os_codename in platforms:
+        os_codenames = supported_versions.setdefault(os_name, [])
+        if os_codename not in os_codenames:
+            os_codenames.append(os_codename)
+    index = {}
+    for source in sources:
+        rules = compile_rules(source.rosdep_data, supported_versions)
+        for (dep_name, os_name, os_codename), rule in rules.items():
+            if rule.expanded and rule.installer not in (None, 'pip', os_codename) and \
+                    '*' not in source.rosdep_data[dep_name][os_name]:
+                continue
+            index.setdefault(dep_name, {}).setdefault((os_name, os_codename), []).append(source)
+    return index
+
+
+def check_duplicates(sources, platforms):
+    """
+    Check that no rosdep key is defined by multiple sources for a platform.
+
+    Like rosdep, only the sources whose tags are all part of a platform's tags
+    are used on that platform.
+
+    :param sources: the data sources to check.
+    :param platforms: a list of [ROS distribution, OS name, OS code name]
+      tags of the platforms to check.
+
+    :returns: True if there aren't any duplicate rosdep keys.
+    """
     # output debug info
     print('checking sources')
     for source in sources:
         print('- %s' % source.url)
+    print('checking platforms')
+    for tags in platforms:
+        print('- %s' % tags)
 
-    # create lookup
-    sources_loader = SourcesListLoader(sources)
-    lookup = RosdepLookup.create_from_rospkg(sources_loader=sources_loader)
+    index = index_rosdep_keys(sources, platforms)
 
     # check if duplicates
-    print("checking duplicates")
-    db_name_view = {}
-    has_duplicates = False
-    # to avoid merge views
-    view = lookup._load_view_dependencies(DEFAULT_VIEW_KEY, lookup.loader)
-    for view_key in lookup.rosdep_db.get_view_dependencies(DEFAULT_VIEW_KEY):
-        db_entry = lookup.rosdep_db.get_view_data(view_key)
-        print('* %s' % view_key)
-        for dep_name, dep_data in db_entry.rosdep_data.items():
-            # skip unknown os names
-            if os_name not in dep_data.keys():
-                continue
-            # skip unknown os codenames
-            if (
-                isinstance(dep_data[os_name], dict) and
-                'pip' not in dep_data[os_name].keys() and
-                os_codename not in dep_data[os_name].keys()
-            ):
+    print('checking duplicates')
+    matchers = [(tags, DataSourceMatcher(tags)) for tags in platforms]
+    duplicates = {}
+    for dep_name in sorted(index):
+        key_sources = index[dep_name]
+        for tags, matcher in matchers:
+            platform = (tags[1], tags[2])
+            defining = [x for x in key_sources.get(platform, ()) if matcher.matches(x)]
+            if len(defining) < 2:
                 continue
-            if dep_name in db_name_view:
-                print('%s (%s, %s) is multiply defined in\n\t%s and \n\t%s\n' %
-                      (dep_name, os_name, os_codename, db_name_view[dep_name], view_key))
-                has_duplicates = True
-            db_name_view[dep_name] = view_key
-    return not has_duplicates
+            duplicate_platforms = duplicates.setdefault(
+                (dep_name, tuple(x.url for x in defining)), [])
+            if platform not in duplicate_platforms:
+                duplicate_platforms.append(platform)
+    for (dep_name, urls), duplicate_platforms in duplicates.items():
+        print('%s (%s) is multiply defined in\n\t%s\n' % (
+            dep_name,
+            ', '.join('%s %s' % platform for platform in duplicate_platforms),
+            ' and \n\t'.join(urls)))
+    return not duplicates
 
 
 def main(infile):
     sources = create_default_sources()
-    matcher = DataSourceMatcher.create_default()
 
     print('default sources')
     for source in sources:
@@ -126,9 +235,7 @@ def main(infile):
     # replace with infile
     for filename in infile:
         filepath = os.path.join(os.getcwd(), filename)
-        with open(filepath) as f:
-            content = f.read()
-        rosdep_data = yaml.safe_load(content)
+        rosdep_data = load_yaml_file(filepath)
         # osx-homebrew uses osx tag
         tag = 'osx' if 'osx-' in filepath else ''
         model = CachedDataSource('yaml', 'file://' + filepath, [tag], rosdep_data)
@@ -139,19 +246,7 @@ def main(infile):
             # remove files with same filename
             sources = [model if os.path.basename(filename) == os.path.basename(x.url) else x for x in sources]
 
-    ret = True
-    for tag in [['indigo', 'ubuntu', 'trusty'],
-                ['jade', 'ubuntu', 'trusty'],
-                ['kinetic', 'ubuntu', 'xenial'],
-                ['lunar', 'ubuntu', 'xenial'],
-                ['', 'osx', 'homebrew']]:
-        matcher.tags = tag
-        print('checking with %s' % matcher.tags)
-        os_name = tag[1]
-        os_codename = tag[2]
-        ret &= check_duplicates([x for x in sources if matcher.matches(x)],
-                                os_name, os_codename)
-    return ret
+    return check_duplicates(sources, get_platforms())
 
 
 if __name__ == '__main__':
@@ -4,9 +4,23 @@ from __future__ import print_function
 
 import re
 import yaml
+import abc
 import argparse
+import bisect
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import io
+import os
+import subprocess
 import sys
 
+try:
+    from scripts.yaml_loader import load_yaml_file
+    from scripts.yaml_loader import load_yaml_string
+except ImportError:
+    from yaml_loader import load_yaml_file
+    from yaml_loader import load_yaml_string
+
 indent_atom = '  '
 
 # pretty - A miniature library that provides a Python print and stdout
@@ -32,9 +46,13 @@ codeCodes = {
 }
 
 
+# Whether to print in color, or None to only do so when writing to a terminal
+use_color = None
+
+
 def printc(text, color):
     """Print in color."""
-    if sys.stdout.isatty():
+    if sys.stdout.isatty() if use_color is None else use_color:
         print("\033["+codeCodes[color]+"m"+text+"\033[0m")
     else:
         print(text)
@@ -48,119 +66,408 @@ def print_err(msg):
     printc('  ERR: ' + msg, 'red')
 
 
-def no_trailing_spaces(buf):
-    clean = True
-    for i, l in enumerate(buf.split('\n')):
-        if re.search(r' $', l) is not None:
-            print_err("trailing space line %u" % (i+1))
-            clean = False
-    return clean
+# Patterns matching a whole line; they are applied to single lines only
+structural_line_pattern = re.compile(r'[^\s]')
+comment_line_pattern = re.compile(r'^\s*#')
+block_start_pattern = re.compile(r'\|$|\?$|^\s*\?')
+complex_key_pattern = re.compile(r'^\s*\?')
+mapping_key_pattern = re.compile(r'^(?:' + indent_atom + r')*([^:]*):.*$')
+unbracketed_value_pattern = re.compile(
+    r'^(?:' + indent_atom + r')*([^:]*):\s*(\w.*)$')
+blank_line_pattern = re.compile(r'^\s*$')
+whitespace_pattern = re.compile(r'\s')
+# Lines which can't be mistaken for a top-level key by the tokenizer
+unambiguous_line_pattern = re.compile(r'^(?:[^\s#]|' + indent_atom + r'|\s*#)')
+hunk_header_pattern = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+# Plain scalars which YAML resolves to something other than a string
+plain_key_pattern = re.compile(r'^[A-Za-z][A-Za-z0-9_./+-]*$')
+non_string_plain_keys = frozenset((
+    'yes', 'Yes', 'YES', 'no', 'No', 'NO',
+    'true', 'True', 'TRUE', 'false', 'False', 'FALSE',
+    'on', 'On', 'ON', 'off', 'Off', 'OFF',
+    'null', 'Null', 'NULL',
+))
+
+
+def unquote_key(text):
+    """
+    Get the value of a mapping key as YAML would parse it.
+
+    Plain and simply quoted keys are unquoted directly, anything else is
+    left to the YAML parser.
+    """
+    if plain_key_pattern.match(text) and text not in non_string_plain_keys:
+        return text
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '\'"':
+        inner = text[1:-1]
+        if text[0] not in inner and '\\' not in inner and inner.isprintable():
+            return inner
+    return yaml.safe_load(text)
+
+
+class LintRule(abc.ABC):
+    """
+    A formatting check fed with the lines of a rosdep file.
+
+    The messages of a check are collected rather than printed, so that all
+    of the checks can share a single pass over the file while their output
+    is still reported one check at a time.
+    """
+
+    # Whether the check is fed the mapping lines found by the tokenizer
+    # rather than every line in the file
+    structural = True
+
+    def __init__(self):
+        self.messages = []
+        self.clean = True
+        self.exception = None
+
+    def error(self, msg):
+        self.messages.append((print_err, msg))
+        self.clean = False
+
+    @abc.abstractmethod
+    def check(self, i, l, s, lvl):
+        """
+        Check a single line.
+
+        :param i: the zero-based line number.
+        :param l: the content of the line.
+        :param s: the column of the first non-whitespace character, or None
+          for checks which are not structural.
+        :param lvl: the indentation level of the line, or None for checks
+          which are not structural.
+        """
+
+    def reset(self):
+        """Forget the context of the lines checked so far."""
+        pass
 
+    def report(self):
+        """Print the collected messages and return whether the check passed."""
+        for printer, msg in self.messages:
+            printer(msg)
+        if self.exception is not None:
+            raise self.exception
+        return self.clean
 
-def no_blank_lines(buf):
-    clean = True
-    for i, l in enumerate(buf.split('\n')[:-1]):
-        if re.match(r'^\s*$', l):
-            print_err("blank line %u" % (i+1))
-            clean = False
-    return clean
 
+class TrailingSpaces(LintRule):
+    structural = False
 
-def generic_parser(buf, cb):
-    ilen = len(indent_atom)
-    stringblock = False
-    strlvl = 0
-    lvl = 0
-    clean = True
+    def check(self, i, l, s, lvl):
+        if l.endswith(' '):
+            self.error("trailing space line %u" % (i+1))
 
-    for i, l in enumerate(buf.split('\n')):
-        if l == '':
-            continue
-        if re.search(r'^\s*#', l) is not None:
-            continue
-        try:
-            s = re.search(r'(?!' + indent_atom + r')[^\s]', l).start()
-        except:
-            print_err("line %u: %s" % (i, l))
-            raise
-        if stringblock:
-            if int(s / ilen) > strlvl:
-                continue
-            stringblock = False
-        lvl = int(s / ilen)
-        opts = {'lvl': lvl, 's': s}
-        if not cb(i, l, opts):
-            clean = False
-        if re.search(r'\|$|\?$|^\s*\?', l) is not None:
-            stringblock = True
-            strlvl = lvl
-    return clean
 
+class BlankLines(LintRule):
+    structural = False
 
-def correct_indent(buf):
-    ilen = len(indent_atom)
+    def __init__(self, last_line):
+        super(BlankLines, self).__init__()
+        self.last_line = last_line
 
-    def fun(i, l, o):
-        s = o['s']
-        olvl = fun.lvl
-        lvl = o['lvl']
-        fun.lvl = lvl
-        if s % ilen > 0:
-            print_err("invalid indentation level line %u: %u" % (i+1, s))
-            return False
-        if lvl > olvl + 1:
-            print_err("too much indentation line %u" % (i+1))
-            return False
-        return True
-    fun.lvl = 0
-    return generic_parser(buf, fun)
+    def check(self, i, l, s, lvl):
+        if i != self.last_line and blank_line_pattern.match(l):
+            self.error("blank line %u" % (i+1))
 
 
-def check_brackets(buf):
-    excepts = ['uri', 'md5sum']
+class CorrectIndent(LintRule):
 
-    def fun(i, l, o):
-        m = re.match(r'^(?:' + indent_atom + r')*([^:]*):\s*(\w.*)$', l)
-        if m is not None and m.groups()[0] not in excepts:
-            if m.groups()[1] == 'null':
-                return True
-            print_err("list not in square brackets line %u" % (i+1))
-            return False
-        return True
-    return generic_parser(buf, fun)
+    def __init__(self):
+        super(CorrectIndent, self).__init__()
+        self.reset()
 
+    def reset(self):
+        self.lvl = 0
 
-def check_order(buf):
-    def fun(i, l, o):
-        lvl = o['lvl']
-        st = fun.namestack
-        while len(st) > lvl + 1:
-            st.pop()
+    def check(self, i, l, s, lvl):
+        olvl = self.lvl
+        self.lvl = lvl
+        if s % len(indent_atom) > 0:
+            self.error("invalid indentation level line %u: %u" % (i+1, s))
+        elif lvl > olvl + 1:
+            self.error("too much indentation line %u" % (i+1))
+
+
+class Brackets(LintRule):
+    excepts = ('uri', 'md5sum')
+
+    def check(self, i, l, s, lvl):
+        m = unbracketed_value_pattern.match(l)
+        if m is not None and m.group(1) not in self.excepts:
+            if m.group(2) != 'null':
+                self.error("list not in square brackets line %u" % (i+1))
+
+
+class Order(LintRule):
+
+    def __init__(self):
+        super(Order, self).__init__()
+        self.reset()
+
+    def reset(self):
+        self.namestack = ['']
+
+    def check(self, i, l, s, lvl):
+        st = self.namestack
+        del st[lvl + 1:]
         if len(st) < lvl + 1:
             st.append('')
-        if re.search(r'^\s*\?', l) is not None:
-            return True
-        m = re.match(r'^(?:' + indent_atom + r')*([^:]*):.*$', l)
+        if complex_key_pattern.match(l):
+            return
+        m = mapping_key_pattern.match(l)
         prev = st[lvl]
         try:
             # parse as yaml to parse `"foo bar"` as string 'foo bar' not string '"foo bar"'
-            item = yaml.safe_load(m.groups()[0])
-        except:
-            print('woops line %d' % i)
+            item = unquote_key(m.group(1))
+        except Exception:
+            self.messages.append((print, 'woops line %d' % i))
             raise
         st[lvl] = item
         if item < prev:
-            print_err("list out of alphabetical order line %u.  '%s' should come before '%s'" % ((i+1), item, prev))
-            return False
-        return True
-    fun.namestack = ['']
-    return generic_parser(buf, fun)
+            self.error("list out of alphabetical order line %u.  '%s' should come before '%s'" % ((i+1), item, prev))
+
 
+def lint(buf, rules, ranges=None):
+    """
+    Feed the lines of a rosdep file to formatting checks in a single pass.
 
-def main(fname):
+    Lines inside of block scalars and complex keys, as well as comments and
+    empty lines, are not fed to the structural checks. A check which raises
+    an exception is not fed any further lines, and the exception is raised
+    again when the check is reported.
+
+    :param buf: the content of the file.
+    :param rules: the LintRule instances to feed.
+    :param ranges: the sorted (start, end) zero-based line ranges to check,
+      which must each begin at a top-level key, or None to check the whole
+      file. The checks keep their context from one range to the next, so
+      that the first key of a range is compared with the last key before it.
+    """
+    ilen = len(indent_atom)
+    line_rules = [r for r in rules if not r.structural]
+    structural_rules = [r for r in rules if r.structural]
+    lines = buf.split('\n')
+    if ranges is None:
+        ranges = [(0, len(lines))]
+
+    for rule in rules:
+        rule.reset()
+    for start, end in ranges:
+        stringblock = False
+        strlvl = 0
+        for i in range(start, end):
+            l = lines[i]
+            for rule in line_rules:
+                rule.check(i, l, None, None)
+            if not structural_rules or l == '' or comment_line_pattern.match(l):
+                continue
+            m = structural_line_pattern.search(l)
+            if m is None:
+                for rule in structural_rules:
+                    rule.messages.append((print_err, "line %u: %s" % (i, l)))
+                    rule.exception = ValueError(
+                        'line %u contains only whitespace' % i)
+                structural_rules = []
+                continue
+            s = m.start()
+            lvl = s // ilen
+            if stringblock:
+                if lvl > strlvl:
+                    continue
+                stringblock = False
+            for rule in list(structural_rules):
+                try:
+                    rule.check(i, l, s, lvl)
+                except Exception as e:
+                    rule.exception = e
+                    structural_rules.remove(rule)
+            if block_start_pattern.search(l) is not None:
+                stringblock = True
+                strlvl = lvl
+
+
+def find_top_level_keys(lines):
+    """
+    Find the lines of a rosdep file which start a top-level key.
+
+    :param lines: the lines of the file.
+
+    :returns: a list of zero-based line numbers, or None if the extent of
+      the top-level keys is ambiguous, e.g. because of lines which the
+      tokenizer would consider to be top-level without being a mapping key.
+    """
+    starts = []
+    for i, l in enumerate(lines):
+        if not l:
+            continue
+        if l.isspace() or not unambiguous_line_pattern.match(l):
+            return None
+        if l[0] == '#' or l[0] == ' ':
+            continue
+        if complex_key_pattern.match(l) or not mapping_key_pattern.match(l):
+            return None
+        starts.append(i)
+    return starts
+
+
+def select_ranges(lines, changed_lines):
+    """
+    Select the line ranges to check for changes to some lines of a file.
+
+    Each changed line selects the whole top-level key it belongs to. The
+    lines of the top-level keys before and after are also selected, so that
+    the order of the changed keys is checked against their neighbours.
+
+    :param lines: the lines of the file.
+    :param changed_lines: the one-based numbers of the changed lines.
+
+    :returns: a sorted list of (start, end) zero-based line ranges, or None
+      if the extent of the top-level keys is ambiguous.
+    """
+    starts = find_top_level_keys(lines)
+    if not starts:
+        return None
+    is_key = [True] * len(starts)
+    if starts[0] > 0:
+        # Comments preceding the first key
+        starts.insert(0, 0)
+        is_key.insert(0, False)
+    ends = starts[1:] + [len(lines)]
+
+    selected = set()
+    for n in changed_lines:
+        if 1 <= n <= len(lines):
+            selected.add(bisect.bisect_right(starts, n - 1) - 1)
+
+    ranges = []
+    for b in sorted(selected):
+        if b > 0 and b - 1 not in selected and is_key[b - 1]:
+            ranges.append((starts[b - 1], starts[b - 1] + 1))
+        ranges.append((starts[b], ends[b]))
+        if b + 1 < len(starts) and b + 1 not in selected:
+            ranges.append((starts[b + 1], starts[b + 1] + 1))
+
+    merged = []
+    for start, end in sorted(set(ranges)):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_changed_lines(diff):
+    """
+    Get the numbers of the lines changed in each file of a unified diff.
+
+    Lines adjacent to removed lines are considered to be changed as well.
+
+    :param diff: the output of 'git diff --unified=0'.
+
+    :returns: a dictionary mapping paths to sets of one-based line numbers.
+    """
+    changed_lines = {}
+    target = None
+    for line in diff.splitlines():
+        if line.startswith('+++ '):
+            target = line[4:]
+            if target.startswith('b/'):
+                target = target[2:]
+            target = os.path.normpath(target)
+            changed_lines.setdefault(target, set())
+            continue
+        m = hunk_header_pattern.match(line)
+        if m is None or target is None:
+            continue
+        start = int(m.group(1))
+        count = 1 if m.group(2) is None else int(m.group(2))
+        if count:
+            changed_lines[target].update(range(start, start + count))
+        else:
+            changed_lines[target].update((start, start + 1))
+    return changed_lines
+
+
+def git_changed_lines(base_ref, fnames):
+    """
+    Get the lines of files changed since a git reference.
+
+    :param base_ref: the git reference to compare the working tree with.
+    :param fnames: the paths of the files.
+
+    :returns: a dictionary mapping each of the paths to a set of one-based
+      line numbers.
+    """
+    diff = subprocess.check_output(
+        ['git', 'diff', '--unified=0', '--relative', '--no-color',
+         '--no-ext-diff', base_ref, '--'] + list(fnames)).decode('utf-8')
+    changed_lines = parse_changed_lines(diff)
+    return {
+        fname: changed_lines.get(os.path.normpath(os.path.relpath(fname)), set())
+        for fname in fnames}
+
+
+def no_trailing_spaces(buf):
+    rule = TrailingSpaces()
+    lint(buf, [rule])
+    return rule.report()
+
+
+def no_blank_lines(buf):
+    rule = BlankLines(buf.count('\n'))
+    lint(buf, [rule])
+    return rule.report()
+
+
+def correct_indent(buf):
+    rule = CorrectIndent()
+    lint(buf, [rule])
+    return rule.report()
+
+
+def check_brackets(buf):
+    rule = Brackets()
+    lint(buf, [rule])
+    return rule.report()
+
+
+def check_order(buf):
+    rule = Order()
+    lint(buf, [rule])
+    return rule.report()
+
+
+def _load_ranges(fname, buf, ranges):
+    """Parse only the given line ranges of a file, if they can be parsed alone."""
+    lines = buf.split('\n')
+    ydict = {}
+    try:
+        for start, end in ranges:
+            snippet = load_yaml_string('\n'.join(lines[start:end]))
+            if isinstance(snippet, dict):
+                ydict.update(snippet)
+    except Exception:
+        return load_yaml_file(fname)
+    return ydict
+
+
+def main(fname, changed_lines=None):
     with open(fname) as f:
         buf = f.read()
 
+    ranges = None
+    if changed_lines is not None:
+        if not changed_lines:
+            print_test("skipping file without changes...")
+            return True
+        ranges = select_ranges(buf.split('\n'), changed_lines)
+        if ranges is None:
+            print_test("cannot isolate the changed keys, checking the whole file...")
+
     def my_assert(val):
         if not val:
             my_assert.clean = False
@@ -168,26 +475,32 @@ def main(fname):
 
     # here be tests.
     ydict = None
+    yaml_error = None
     try:
-        ydict = yaml.safe_load(buf)
-    except Exception:
-        pass
+        if ranges is None:
+            ydict = load_yaml_file(fname)
+        else:
+            ydict = _load_ranges(fname, buf, ranges)
+    except Exception as e:
+        yaml_error = e
     if ydict != {}:
-        print_test("checking for trailing spaces...")
-        my_assert(no_trailing_spaces(buf))
-        print_test("checking for blank lines...")
-        my_assert(no_blank_lines(buf))
-        print_test("checking for incorrect indentation...")
-        my_assert(correct_indent(buf))
-        print_test("checking for non-bracket package lists...")
-        my_assert(check_brackets(buf))
-        print_test("checking for item order...")
-        my_assert(check_order(buf))
+        checks = [
+            ("checking for trailing spaces...", TrailingSpaces()),
+            ("checking for blank lines...", BlankLines(buf.count('\n'))),
+            ("checking for incorrect indentation...", CorrectIndent()),
+            ("checking for non-bracket package lists...", Brackets()),
+            ("checking for item order...", Order()),
+        ]
+        lint(buf, [rule for _, rule in checks], ranges)
+        for header, rule in checks:
+            print_test(header)
+            my_assert(rule.report())
         print_test("building yaml dict...")
     else:
         print_test("skipping file with empty dict contents...")
     try:
-        ydict = yaml.safe_load(buf)
+        if yaml_error is not None:
+            raise yaml_error
 
         # ensure that values don't contain whitespaces
         whitespace_whitelist = ["el capitan", "mountain lion"]
@@ -200,7 +513,7 @@ def main(fname):
             if isinstance(node, list):
                 for value in node:
                     walk(value)
-            if isinstance(node, str) and re.search(r'\s', node) and node not in whitespace_whitelist:
+            if isinstance(node, str) and whitespace_pattern.search(node) and node not in whitespace_whitelist:
                     print_err("value '%s' must not contain whitespaces" % node)
                     my_assert(False)
         walk(ydict)
@@ -215,10 +528,94 @@ def main(fname):
     return True
 
 
+def _check_captured(fname, color, changed_lines=None):
+    """Check a file, returning the result along with the printed output."""
+    global use_color
+    use_color = color
+    out = io.StringIO()
+    exception = None
+    with contextlib.redirect_stdout(out):
+        try:
+            clean = main(fname, changed_lines)
+        except Exception as e:
+            clean = False
+            exception = e
+    return clean, out.getvalue(), exception
+
+
+def expand_paths(paths):
+    """Replace directories with the sorted '*.yaml' files they contain."""
+    fnames = []
+    for path in paths:
+        if os.path.isdir(path):
+            fnames.extend(
+                os.path.join(path, f) for f in sorted(os.listdir(path))
+                if f.endswith('.yaml'))
+        else:
+            fnames.append(path)
+    return fnames
+
+
+def check_files(fnames, jobs=None, changed_lines=None):
+    """
+    Check many rosdep files concurrently.
+
+    The output of each file is printed as a group once the file has been
+    checked, in the order the files were given.
+
+    :param fnames: the paths of the rosdep files.
+    :param jobs: the number of files to check in parallel, or None to use
+      the number of CPUs.
+    :param changed_lines: a dictionary mapping the paths to the one-based
+      numbers of their changed lines, to only check the top-level keys
+      containing changes, or None to check the files entirely.
+
+    :returns: True if all of the files passed the checks.
+    """
+    color = sys.stdout.isatty() if use_color is None else use_color
+    if changed_lines is None:
+        file_changes = [None] * len(fnames)
+    else:
+        file_changes = [changed_lines.get(fname, set()) for fname in fnames]
+    if jobs == 1 or len(fnames) < 2:
+        results = (
+            _check_captured(fname, color, changes)
+            for fname, changes in zip(fnames, file_changes))
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(
+            _check_captured, fnames, [color] * len(fnames), file_changes)
+    clean = True
+    try:
+        for fname, (file_clean, output, exception) in zip(fnames, results):
+            if len(fnames) > 1:
+                print("Checking rosdep file: %s" % fname)
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            if exception is not None:
+                raise exception
+            clean &= file_clean
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return clean
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Checks whether yaml syntax corresponds to ROS rules')
-    parser.add_argument('infile', help='input rosdep YAML file')
+    parser.add_argument('infiles', nargs='+', metavar='infile', help='input rosdep YAML files or directories')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of files to check in parallel (default: number of CPUs)')
+    parser.add_argument('--diff', metavar='REF',
+                        help='only check the top-level keys changed since the given git reference')
     args = parser.parse_args()
-
-    if not main(args.infile):
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be a positive integer')
+
+    fnames = expand_paths(args.infiles)
+    changed_lines = None
+    if args.diff:
+        changed_lines = git_changed_lines(args.diff, fnames)
+    if not check_files(fnames, args.jobs, changed_lines):
         sys.exit(1)
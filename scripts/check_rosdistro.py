@@ -1,9 +1,13 @@
 #!/usr/bin/env python
 import re
-import yaml
 import argparse
 import sys
 
+try:
+    from scripts.yaml_loader import load_yaml_string
+except ImportError:
+    from yaml_loader import load_yaml_string
+
 indent_atom = '  '
 
 # pretty - A miniature library that provides a Python print and stdout
@@ -143,7 +147,7 @@ def main(fname):
     my_assert.clean = True
 
     try:
-        ydict = yaml.safe_load(buf)
+        ydict = load_yaml_string(buf)
     except Exception as e:
         print_err("could not build the dict: %s" % (str(e)))
         my_assert(False)
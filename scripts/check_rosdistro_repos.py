@@ -30,26 +30,35 @@
 from __future__ import print_function
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 
-from catkin_pkg.packages import find_package_paths
+from catkin_pkg.packages import DEFAULT_IGNORE_MARKERS, find_package_paths
 from rosdistro import get_distribution_file, get_index, get_index_url
 
+try:
+    from scripts.remote_refs import get_ref_cache
+    from scripts.remote_refs import HostLimiter
+except ImportError:
+    from remote_refs import get_ref_cache
+    from remote_refs import HostLimiter
+
+# The files find_package_paths() looks for
+MANIFEST_PATTERNS = ['package.xml'] + sorted(DEFAULT_IGNORE_MARKERS)
+
 
 def check_git_repo(url, version):
-    cmd = ['git', 'ls-remote', url]
     try:
-        output = subprocess.check_output(cmd)
-    except subprocess.CalledProcessError as e:
+        refs = get_ref_cache().get_version_refs(url, version)
+    except RuntimeError as e:
         raise RuntimeError('not a valid git repo url')
 
-    if version:
-        for line in output.splitlines():
-            if line.endswith('/%s' % version):
-                return
+    if version and not refs:
         raise RuntimeError('version not found')
 
 
@@ -88,6 +97,26 @@ def clone_git_repo(url, version, path):
         raise RuntimeError('not a valid git repo url')
 
 
+def fetch_git_manifests(url, version, path):
+    """
+    Check out only the files of a git repository which identify its packages.
+
+    Only the tree of the tip of the version is fetched, and the contents of
+    the files matching MANIFEST_PATTERNS are the only ones downloaded.
+    """
+    cmds = [
+        ['git', 'clone', '--depth', '1', '--filter=blob:none', '--no-checkout', '-q'] +
+        (['-b', version] if version else []) + [url, path],
+        ['git', '-C', path, 'sparse-checkout', 'set', '--no-cone'] + MANIFEST_PATTERNS,
+        ['git', '-C', path, 'checkout', '-q'],
+    ]
+    try:
+        for cmd in cmds:
+            subprocess.check_call(cmd)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError('not a valid git repo url')
+
+
 def clone_hg_repo(url, version, path):
     cmd = ['hg', 'clone', url, '-q']
     if version:
@@ -108,73 +137,145 @@ def checkout_svn_repo(url, version, path):
         raise RuntimeError('not a valid svn repo url')
 
 
-def main(repo_type, rosdistro_name, check_for_wet_packages=False):
-    index = get_index(get_index_url())
+def check_repo(repo, check_for_wet_packages=False, manifests_only=False):
+    """
+    Check a single repository.
+
+    :param check_for_wet_packages: also check that the repository contains
+      catkin or ament packages.
+    :param manifests_only: only fetch the package manifests of git
+      repositories to check for packages, rather than cloning them.
+
+    :returns: a list of the error messages.
+    """
     try:
-        distribution_file = get_distribution_file(index, rosdistro_name)
+        if (repo.type == 'git'):
+            check_git_repo(repo.url, repo.version)
+        elif (repo.type == 'hg'):
+            check_hg_repo(repo.url, repo.version)
+        elif (repo.type == 'svn'):
+            check_svn_repo(repo.url, repo.version)
+        else:
+            return ["Unknown type '%s' for repository '%s'" % (repo.type, repo.name)]
     except RuntimeError as e:
-        print("Could not load distribution file for distro '%s': %s" % (rosdistro_name, e), file=sys.stderr)
-        return False
-
-    for repo_name in sorted(distribution_file.repositories.keys()):
-        sys.stdout.write('.')
-        sys.stdout.flush()
-        repo = distribution_file.repositories[repo_name]
-        if repo_type == 'doc':
-            repo = repo.doc_repository
-        if repo_type == 'source':
-            repo = repo.source_repository
-        if not repo:
-            continue
+        return ["Could not fetch repository '%s': %s (%s) [%s]" % (repo.name, repo.url, repo.version, e)]
+
+    if check_for_wet_packages:
+        path = tempfile.mkdtemp()
         try:
-            if (repo.type == 'git'):
-                check_git_repo(repo.url, repo.version)
-            elif (repo.type == 'hg'):
-                check_hg_repo(repo.url, repo.version)
-            elif (repo.type == 'svn'):
-                check_svn_repo(repo.url, repo.version)
-            else:
-                print()
-                print("Unknown type '%s' for repository '%s'" % (repo.type, repo.name), file=sys.stderr)
-                continue
+            if repo.type == 'git' and manifests_only:
+                fetch_git_manifests(repo.url, repo.version, os.path.join(path, repo.name))
+            elif repo.type == 'git':
+                clone_git_repo(repo.url, repo.version, path)
+            elif repo.type == 'hg':
+                clone_hg_repo(repo.url, repo.version, path)
+            elif repo.type == 'svn':
+                checkout_svn_repo(repo.url, repo.version, path)
         except RuntimeError as e:
-            print()
-            print("Could not fetch repository '%s': %s (%s) [%s]" % (repo.name, repo.url, repo.version, e), file=sys.stderr)
-            continue
-
-        if check_for_wet_packages:
-            path = tempfile.mkdtemp()
-            try:
-                if repo.type == 'git':
-                    clone_git_repo(repo.url, repo.version, path)
-                elif repo.type == 'hg':
-                    clone_hg_repo(repo.url, repo.version, path)
-                elif repo.type == 'svn':
-                    checkout_svn_repo(repo.url, repo.version, path)
-            except RuntimeError as e:
-                print()
-                print("Could not clone repository '%s': %s (%s) [%s]" % (repo.name, repo.url, repo.version, e), file=sys.stderr)
-                continue
-            else:
-                package_paths = find_package_paths(path)
-                if not package_paths:
-                    print()
-                    print("Repository '%s' (%s [%s]) does not contain any wet packages" % (repo.name, repo.url, repo.version), file=sys.stderr)
-                    continue
-            finally:
-                shutil.rmtree(path)
+            return ["Could not clone repository '%s': %s (%s) [%s]" % (repo.name, repo.url, repo.version, e)]
+        else:
+            package_paths = find_package_paths(path)
+            if not package_paths:
+                return ["Repository '%s' (%s [%s]) does not contain any wet packages" % (repo.name, repo.url, repo.version)]
+        finally:
+            shutil.rmtree(path)
+    return []
+
+
+def get_active_distribution_names(index):
+    return sorted(
+        name for name, metadata in index.distributions.items()
+        if metadata['distribution_status'] != 'end-of-life')
+
 
+def main(repo_type, rosdistro_name, check_for_wet_packages=False, jobs=16, jobs_per_host=8,
+         manifests_only=False):
+    """
+    Check the doc or source repositories of one or all active distributions.
+
+    :param rosdistro_name: the name of the distribution, or None to check
+      all distributions which aren't end-of-life. Repositories which are
+      the same in several distributions are only checked once, and each
+      remote is only contacted once.
+    """
+    index = get_index(get_index_url())
+    if rosdistro_name is None:
+        rosdistro_names = get_active_distribution_names(index)
+    else:
+        rosdistro_names = [rosdistro_name]
+
+    distro_repos = []
+    for name in rosdistro_names:
+        try:
+            distribution_file = get_distribution_file(index, name)
+        except RuntimeError as e:
+            print("Could not load distribution file for distro '%s': %s" % (name, e), file=sys.stderr)
+            return False
+        repos = []
+        for repo_name in sorted(distribution_file.repositories.keys()):
+            repo = distribution_file.repositories[repo_name]
+            if repo_type == 'doc':
+                repo = repo.doc_repository
+            if repo_type == 'source':
+                repo = repo.source_repository
+            if repo:
+                repos.append(repo)
+        distro_repos.append((name, repos))
+
+    # check the same repository of several distributions only once
+    unique_repos = {}
+    for _, repos in distro_repos:
+        for repo in repos:
+            unique_repos.setdefault((repo.name, repo.type, repo.url, repo.version), repo)
+
+    limiter = HostLimiter(jobs_per_host)
+    progress_lock = threading.Lock()
+    done = [0]
+
+    def check(repo):
+        with limiter.get(repo.url):
+            errors = check_repo(repo, check_for_wet_packages, manifests_only)
+        with progress_lock:
+            done[0] += 1
+            sys.stdout.write('\rchecked %d/%d repositories' % (done[0], len(unique_repos)))
+            sys.stdout.flush()
+        return errors
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = dict(zip(unique_repos.keys(), executor.map(check, unique_repos.values())))
     print()
 
+    for name, repos in distro_repos:
+        # the errors are reported in the order of the sorted repository names
+        for repo in repos:
+            for error in results[(repo.name, repo.type, repo.url, repo.version)]:
+                print()
+                if len(distro_repos) > 1:
+                    error = '%s: %s' % (name, error)
+                print(error, file=sys.stderr)
+
     return True
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Checks whether the referenced branches for the doc/source repositories exist')
     parser.add_argument('repo_type', choices=['doc', 'source'], help='The repository type')
-    parser.add_argument('rosdistro_name', help='The ROS distro name')
+    parser.add_argument('rosdistro_name', nargs='?', help='The ROS distro name')
+    parser.add_argument('--all-active', action='store_true',
+                        help='Check all distributions which are not end-of-life, contacting each remote only once')
     parser.add_argument('--check-for-wet-packages', action='store_true', help='Check if the repository contains wet packages rather then dry packages')
+    parser.add_argument('--manifests-only', action='store_true',
+                        help='Only fetch the package manifests of git repositories rather than cloning them when checking for wet packages')
+    parser.add_argument('-j', '--jobs', type=int, default=16,
+                        help='number of repositories to check in parallel (default: 16)')
+    parser.add_argument('--jobs-per-host', type=int, default=8,
+                        help='number of repositories to check in parallel on the same host (default: 8)')
     args = parser.parse_args()
+    if args.jobs < 1 or args.jobs_per_host < 1:
+        parser.error('--jobs and --jobs-per-host must be positive integers')
+    if bool(args.rosdistro_name) == args.all_active:
+        parser.error('either a ROS distro name or --all-active must be given')
 
-    if not main(args.repo_type, args.rosdistro_name, args.check_for_wet_packages):
+    if not main(args.repo_type, args.rosdistro_name, args.check_for_wet_packages,
+                 args.jobs, args.jobs_per_host, args.manifests_only):
         sys.exit(1)
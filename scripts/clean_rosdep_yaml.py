@@ -1,72 +1,306 @@
 #!/usr/bin/env python
 
-import yaml
+from __future__ import print_function
+
 import argparse
-import re
+import difflib
+import functools
 import io
+import os
+import re
+import sys
+import tempfile
+import yaml
+
+try:
+    from scripts import check_rosdep
+    from scripts.yaml_loader import load_yaml_string
+except ImportError:
+    import check_rosdep
+    from yaml_loader import load_yaml_string
 
 dont_bracket = ['uri', 'md5sum']
 
+numeric_key_pattern = re.compile(r'^[0-9]+$')
 
-def paddify(s, l):
-    a = s.split('\n')
-    buf = ''
-    pad = '  ' * l
-    for i, r in enumerate(a[:-1]):
-        buf += "%s%s\n" % (pad, r)
-    return buf
+
+@functools.lru_cache(maxsize=None)
+def quote_scalar(s):
+    if isinstance(s, str) and check_rosdep.plain_key_pattern.match(s) and \
+            s not in check_rosdep.non_string_plain_keys:
+        return s
+    # represent the scalar inside of a flow sequence, where it will be used
+    return yaml.safe_dump([s], default_flow_style=True, width=float('inf'))[1:-2]
 
 
 def quote_if_necessary(s):
     if type(s) is list:
         return [quote_if_necessary(a) for a in s]
-    return re.search('a: (.*)\n', yaml.dump({'a': s})).group(1)
+    return quote_scalar(s)
 
 
-def prn(n, nm, lvl):
+def format_key(nm):
     if nm == '*':
         # quote wildcard keys
-        nm = "'*'"
-    else:
+        return "'*'"
+    nm = str(nm)
+    if numeric_key_pattern.match(nm):
         # quote numeric keys
+        return "'%s'" % nm
+    return quote_scalar(nm)
+
+
+def find_inline_comment(l):
+    """Get the comment at the end of a line, including the preceding spaces."""
+    quote = None
+    for i, c in enumerate(l):
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in '\'"':
+            quote = c
+        elif c == '#' and (i == 0 or l[i - 1].isspace()):
+            return l[len(l[:i].rstrip()):]
+    return None
+
+
+def collect_comments(lines):
+    """
+    Associate the comments in some lines of a rosdep file with mapping keys.
+
+    Comments on lines of their own are associated with the key which
+    follows them, and comments at the end of a line with the key on it.
+
+    :param lines: the lines of the file.
+
+    :returns: a dictionary mapping tuples of the keys leading to a value to
+      a tuple of the preceding comment lines and the trailing comment.
+    """
+    comments = {}
+    # the (column, key) of the keys leading to the current line, as the
+    # indentation of keys which need reformatting may not be consistent
+    stack = []
+    pending = []
+    stringblock = None
+    for l in lines:
+        stripped = l.strip()
+        if not stripped:
+            continue
+        column = len(l) - len(l.lstrip())
+        if stringblock is not None:
+            if column > stringblock:
+                continue
+            stringblock = None
+        if stripped.startswith('#'):
+            pending.append(stripped)
+            continue
+        if check_rosdep.block_start_pattern.search(l) is not None:
+            stringblock = column
+        m = check_rosdep.mapping_key_pattern.match(l)
+        if m is None:
+            continue
         try:
-            nm_int = int(nm)
-        except ValueError:
-            pass
-        else:
-            if str(nm_int) == nm:
-                nm = "'%d'" % nm_int
+            key = check_rosdep.unquote_key(m.group(1).strip())
+        except Exception:
+            continue
+        while stack and stack[-1][0] >= column:
+            stack.pop()
+        stack.append((column, str(key)))
+        path = tuple(k for _, k in stack)
+        inline = find_inline_comment(l)
+        if pending or inline:
+            comments[path] = (pending, inline)
+            pending = []
+    if pending:
+        comments[None] = (pending, None)
+    return comments
+
+
+def enumerate_paths(n, path):
+    yield path
+    if isinstance(n, dict):
+        for a, v in n.items():
+            yield from enumerate_paths(v, path + (str(a),))
+
+
+def write_entry(out, n, nm, lvl, comments, path):
+    """Write a mapping entry to a stream, along with its comments."""
     pad = '  ' * lvl
+    before, inline = comments.get(path, ((), None))
+    if inline and (n is None or (isinstance(n, str) and '\n' in n)):
+        # check_rosdep.py only accepts these values at the end of a line
+        before = list(before) + [inline.strip()]
+        inline = None
+    for comment in before:
+        out.write("%s%s\n" % (pad, comment))
+    inline = inline or ''
+    key = format_key(nm)
     if isinstance(n, list):
-        return "%s%s: [%s]\n" % (pad, nm, ', '.join(quote_if_necessary(n)))
+        out.write("%s%s: [%s]%s\n" % (pad, key, ', '.join(quote_if_necessary(n)), inline))
     elif n is None:
-        return "%s%s: %s\n" % (pad, nm, 'null')
+        out.write("%s%s: %s%s\n" % (pad, key, 'null', inline))
     elif isinstance(n, str):
         if len(n.split('\n')) > 1:
-            return "%s%s: |\n%s" % (pad, nm, paddify(n, lvl+1))
+            out.write("%s%s: |%s\n" % (pad, key, inline))
+            for r in n.split('\n')[:-1]:
+                out.write("%s  %s\n" % (pad, r))
+        elif nm in dont_bracket:
+            out.write("%s%s: %s%s\n" % (pad, key, quote_if_necessary(n), inline))
+        else:
+            out.write("%s%s: [%s]%s\n" % (pad, key, ', '.join(quote_if_necessary(n.split())), inline))
+    elif isinstance(n, dict):
+        out.write("%s%s:%s\n" % (pad, key, inline))
+        for a in sorted(n.keys(), key=str):
+            write_entry(out, n[a], a, lvl+1, comments, path + (str(a),))
+    else:
+        out.write("%s%s: %s%s\n" % (pad, key, quote_if_necessary(n), inline))
+
+
+def write_block(out, lines):
+    """Write a top-level key, reformatted, to a stream."""
+    data = load_yaml_string('\n'.join(lines))
+    comments = collect_comments(lines)
+    if not isinstance(data, dict):
+        raise ValueError('expected a mapping of rosdep keys')
+    paths = set()
+    for a, v in data.items():
+        paths.update(enumerate_paths(v, (str(a),)))
+    # Never drop comments which can't be associated with a key
+    for path in sorted(set(comments).difference(paths), key=str):
+        before, inline = comments[path]
+        for comment in before:
+            out.write("%s\n" % comment)
+        if inline:
+            out.write("%s\n" % inline.strip())
+    for a in sorted(data.keys(), key=str):
+        write_entry(out, data[a], a, 0, comments, (str(a),))
+
+
+def is_conforming(lines):
+    """Check if lines pass the checks of check_rosdep.py."""
+    rules = [
+        check_rosdep.TrailingSpaces(),
+        check_rosdep.BlankLines(len(lines)),
+        check_rosdep.CorrectIndent(),
+        check_rosdep.Brackets(),
+        check_rosdep.Order(),
+    ]
+    check_rosdep.lint('\n'.join(lines), rules)
+    return all(rule.clean and rule.exception is None for rule in rules)
+
+
+def split_blocks(lines):
+    """
+    Split the lines of a rosdep file into a preamble and top-level keys.
+
+    Comment lines directly preceding a top-level key are part of its block.
+
+    :returns: a tuple of the preamble lines and a list of (key, lines)
+      tuples, or None if the top-level keys can't be isolated.
+    """
+    starts = check_rosdep.find_top_level_keys(lines)
+    if not starts:
+        return None
+    block_starts = []
+    for i, start in enumerate(starts):
+        limit = starts[i - 1] + 1 if i else 0
+        while start > limit and lines[start - 1].startswith('#'):
+            start -= 1
+        block_starts.append(start)
+    # Comments before the first key are considered a file header
+    block_starts[0] = starts[0]
+    block_ends = block_starts[1:] + [len(lines)]
+    blocks = []
+    for key_line, start, end in zip(starts, block_starts, block_ends):
+        key = check_rosdep.mapping_key_pattern.match(lines[key_line]).group(1)
+        blocks.append((str(check_rosdep.unquote_key(key.strip())), lines[start:end]))
+    return lines[:block_starts[0]], blocks
+
+
+def format_rosdep(buf, out):
+    """
+    Write a rosdep file to a stream, reformatting what doesn't conform.
+
+    Only the top-level keys which don't pass the checks of check_rosdep.py
+    are reformatted, while the others are written unchanged. Top-level keys
+    are sorted along with the comments preceding them, and comments within
+    reformatted keys are retained.
+
+    :param buf: the content of the file.
+    :param out: the stream to write the formatted file to.
+    """
+    lines = buf.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    split = split_blocks(lines)
+    if split is None:
+        if load_yaml_string(buf) == {}:
+            out.write(buf)
+            return
+        header_end = 0
+        while header_end < len(lines) and lines[header_end].startswith('#'):
+            header_end += 1
+        preamble = lines[:header_end]
+        blocks = [(None, lines[header_end:])]
+    else:
+        preamble, blocks = split
+        blocks.sort(key=lambda block: block[0])
+    for l in preamble:
+        if l.strip():
+            out.write("%s\n" % l.rstrip())
+    for _, block_lines in blocks:
+        if is_conforming(block_lines):
+            for l in block_lines:
+                out.write("%s\n" % l)
         else:
-            if nm in dont_bracket:
-                return "%s%s: %s\n" % (pad, nm, quote_if_necessary(n))
-            return "%s%s: [%s]\n" % (pad, nm, ', '.join(quote_if_necessary(n.split())))
-    buf = "%s%s:\n" % (pad, nm)
-    for a in sorted(n.keys()):
-        buf += prn(n[a], a, lvl+1)
-    return buf
+            write_block(out, block_lines)
+
+
+def clean_file(fname, check=False):
+    """
+    Format a rosdep file in place.
+
+    :param fname: the path of the file.
+    :param check: rather than modifying the file, print a unified diff of
+      the changes which would be made.
+
+    :returns: True if the file didn't need any changes.
+    """
+    with open(fname) as f:
+        buf = f.read()
+    out = io.StringIO()
+    format_rosdep(buf, out)
+    formatted = out.getvalue()
+    if formatted == buf:
+        return True
+    if check:
+        sys.stdout.writelines(difflib.unified_diff(
+            buf.splitlines(True), formatted.splitlines(True),
+            'a/' + fname, 'b/' + fname))
+        return False
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)))
+    with io.open(fd, 'w', encoding='utf-8') as f:
+        f.write(formatted)
+    os.chmod(tmp_path, os.stat(fname).st_mode)
+    os.replace(tmp_path, fname)
+    return False
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
-        description='Cleans a rosdep YAML file to a correct format')
-    parser.add_argument('infile', help='input rosdep YAML file')
-    parser.add_argument('outfile', help='output YAML file to be written')
+        description='Cleans rosdep YAML files in place to a correct format')
+    parser.add_argument('infiles', nargs='+', metavar='infile', help='rosdep YAML files or directories')
+    parser.add_argument('--check', action='store_true',
+                        help='do not modify the files, but print a diff of the changes and fail if there are any')
     args = parser.parse_args()
 
-    with open(args.infile) as f:
-        iny = yaml.safe_load(f.read())
-
-    buf = ''
-    for a in sorted(iny):
-        buf += prn(iny[a], a, 0)
-
-    with io.open(args.outfile, 'wb') as f:
-        f.write(buf.encode('utf-8'))
+    clean = True
+    failed = False
+    for fname in check_rosdep.expand_paths(args.infiles):
+        try:
+            clean &= clean_file(fname, args.check)
+        except Exception as e:
+            print("%s: could not be cleaned: %s" % (fname, e), file=sys.stderr)
+            failed = True
+    if failed or (args.check and not clean):
+        sys.exit(1)
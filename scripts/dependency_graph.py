@@ -0,0 +1,255 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import json
+import os
+import sys
+import tempfile
+
+# Bump to invalidate the saved graphs when their format changes
+GRAPH_VERSION = 1
+
+
+class DependencyGraph(object):
+    """
+    A graph of the dependencies between packages, kept in topological order.
+
+    When the dependencies change, the order is repaired with the dynamic
+    topological sort of Pearce and Kelly: a new dependency which breaks the
+    order only visits the packages positioned between its two ends, rather
+    than the whole graph. A dependency which would close a cycle is
+    reported and left out, so the graph stays acyclic. Later updates add it
+    again, and report the cycle again, until it is resolved.
+    """
+
+    def __init__(self):
+        self._depends = {}
+        self._dependents = {}
+        self._ord = {}
+        self._next_ord = 0
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a graph saved by save().
+
+        :returns: the graph, or an empty graph if the file doesn't exist or
+          isn't a valid graph.
+        """
+        graph = cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return graph
+        if data.get('version') != GRAPH_VERSION:
+            return graph
+        order = {name: i for i, name in enumerate(data['order'])}
+        depends = data['depends']
+        # Never trust an order which doesn't hold
+        if set(order) != set(depends) or any(
+                dep not in order or order[dep] >= order[name]
+                for name, deps in depends.items() for dep in deps):
+            return graph
+        for name, deps in depends.items():
+            graph._depends[name] = set(deps)
+            graph._dependents.setdefault(name, set())
+            for dep in deps:
+                graph._dependents.setdefault(dep, set()).add(name)
+        graph._ord = order
+        graph._next_ord = len(order)
+        return graph
+
+    def save(self, path):
+        """Save the graph and its topological order to a file."""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'version': GRAPH_VERSION,
+                    'order': self.get_order(),
+                    'depends': {name: sorted(deps) for name, deps in self._depends.items()},
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("WARNING: Failed to write dependency graph '%s': %s" % (path, e), file=sys.stderr)
+
+    def get_depends(self):
+        """Get a dictionary mapping the package names to their dependencies."""
+        return {name: set(deps) for name, deps in self._depends.items()}
+
+    def get_order(self):
+        """Get the package names, ordered after their dependencies."""
+        return sorted(self._ord, key=self._ord.get)
+
+    def update(self, depends):
+        """
+        Update the graph to the current dependencies of the packages.
+
+        Only the packages and dependencies which were added since the last
+        update are checked for cycles.
+
+        :param depends: a dictionary mapping the names of all packages to the
+          names of their dependencies. Dependencies on other names are
+          ignored.
+
+        :returns: a list of the cycles closed by new dependencies, each being
+          a list of package names which depend on the next one, and ending
+          with the package it starts with. Of the cycles which share
+          packages only the shortest one is reported.
+        """
+        # Removing packages and dependencies never breaks the order
+        for name in [n for n in self._ord if n not in depends]:
+            for dep in self._depends.pop(name):
+                self._dependents[dep].discard(name)
+            for dependent in self._dependents.pop(name):
+                self._depends[dependent].discard(name)
+            del self._ord[name]
+        new_edges = []
+        for name in sorted(depends):
+            deps = {dep for dep in depends[name] if dep in depends}
+            old_deps = self._depends.get(name, set())
+            for dep in old_deps - deps:
+                self._depends[name].discard(dep)
+                self._dependents[dep].discard(name)
+            new_edges.extend((name, dep) for dep in sorted(deps - old_deps))
+
+        # New packages are positioned after the existing ones and after their
+        # new dependencies, so only their existing dependents may break the order
+        new_names = [n for n in sorted(depends) if n not in self._ord]
+        for name in self._postorder(new_names, depends):
+            self._ord[name] = self._next_ord
+            self._next_ord += 1
+            self._depends[name] = set()
+            self._dependents.setdefault(name, set())
+
+        # The dependencies which agree with the order can't close a cycle
+        breaking = []
+        for name, dep in new_edges:
+            if self._ord[dep] < self._ord[name]:
+                self._depends[name].add(dep)
+                self._dependents[dep].add(name)
+            else:
+                breaking.append((name, dep))
+        cycles = []
+        for name, dep in breaking:
+            cycle = self._add_depend(name, dep)
+            if cycle:
+                cycles.append(cycle)
+
+        # Only report the shortest of the cycles which share packages
+        groups = []
+        for cycle in cycles:
+            members = set(cycle)
+            shortest = cycle
+            for group in [g for g in groups if g[0] & members]:
+                groups.remove(group)
+                members |= group[0]
+                shortest = min(shortest, group[1], key=len)
+            groups.append((members, shortest))
+        return sorted(shortest for _, shortest in groups)
+
+    def _postorder(self, names, depends):
+        """Order some packages after those of their dependencies among them."""
+        names_set = set(names)
+        visited = set()
+        order = []
+        for root in names:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(sorted(depends[root])))]
+            while stack:
+                name, deps = stack[-1]
+                for dep in deps:
+                    if dep in names_set and dep not in visited:
+                        visited.add(dep)
+                        stack.append((dep, iter(sorted(depends[dep]))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(name)
+        return order
+
+    def _add_depend(self, name, dep):
+        """
+        Add a dependency, repairing the order if needed.
+
+        :returns: the cycle the dependency would close, or None if it was added.
+        """
+        if name == dep:
+            return [name, name]
+        lower, upper = self._ord[name], self._ord[dep]
+        if upper < lower:
+            self._depends[name].add(dep)
+            self._dependents[dep].add(name)
+            return None
+
+        # The packages depending on the package which are positioned before
+        # the dependency, which closes a cycle if it is one of them
+        parents = {name: None}
+        forward = []
+        stack = [name]
+        while stack:
+            n = stack.pop()
+            forward.append(n)
+            for dependent in sorted(self._dependents[n]):
+                if dependent == dep:
+                    cycle = [name, dep]
+                    while n is not None:
+                        cycle.append(n)
+                        n = parents[n]
+                    return cycle
+                if dependent not in parents and self._ord[dependent] < upper:
+                    parents[dependent] = n
+                    stack.append(dependent)
+
+        # The dependencies of the dependency which are positioned after the
+        # package
+        visited = {dep}
+        backward = []
+        stack = [dep]
+        while stack:
+            n = stack.pop()
+            backward.append(n)
+            for d in self._depends[n]:
+                if d not in visited and self._ord[d] > lower:
+                    visited.add(d)
+                    stack.append(d)
+
+        # Move the dependencies before the dependents, reusing their positions
+        backward.sort(key=self._ord.get)
+        forward.sort(key=self._ord.get)
+        positions = sorted(self._ord[n] for n in backward + forward)
+        for n, position in zip(backward + forward, positions):
+            self._ord[n] = position
+        self._depends[name].add(dep)
+        self._dependents[dep].add(name)
+        return None
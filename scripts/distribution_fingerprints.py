@@ -0,0 +1,290 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+try:
+    from scripts.yaml_loader import load_yaml_file
+    from scripts.yaml_loader import load_yaml_string
+except ImportError:
+    from yaml_loader import load_yaml_file
+    from yaml_loader import load_yaml_string
+
+# Bump to invalidate the cached trees when their format changes
+FINGERPRINT_VERSION = 1
+
+
+def get_default_cache_dir():
+    """
+    Get the directory used to share the fingerprints of files between runs.
+
+    The directory can be set with ROSDISTRO_FINGERPRINT_CACHE_DIR, and
+    setting it to an empty string disables the on-disk cache.
+    """
+    cache_dir = os.environ.get('ROSDISTRO_FINGERPRINT_CACHE_DIR')
+    if cache_dir is not None:
+        return cache_dir or None
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'rosdistro', 'fingerprints')
+
+
+def get_basedir():
+    return os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def fingerprint(value):
+    """
+    Get a hash of parsed YAML data.
+
+    The hash only depends on the data, not on the layout of the document
+    it was parsed from or on the order of the keys of mappings.
+    """
+    return hashlib.sha256(json.dumps(
+        _canonical(value), sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
+
+
+def fingerprint_distribution(data):
+    """
+    Compute the tree of fingerprints of a distribution file.
+
+    Each section of a repository entry (e.g. 'release', 'source' or 'doc')
+    is hashed, the hash of a repository is that of the hashes of its
+    sections, and the hash of the file is that of the hashes of its
+    repositories and of its other top-level keys.
+
+    :param data: the parsed distribution file.
+
+    :returns: a dictionary with the 'hash' of the file, the hashes of its
+      top-level 'keys' other than 'repositories', and the 'repositories',
+      mapping their names to dictionaries with their 'hash' and the hashes
+      of their 'sections'.
+    """
+    repositories = {}
+    for name, entry in ((data or {}).get('repositories') or {}).items():
+        if isinstance(entry, dict):
+            sections = {str(k): fingerprint(v) for k, v in entry.items()}
+        else:
+            sections = {'': fingerprint(entry)}
+        repositories[str(name)] = {'hash': fingerprint(sections), 'sections': sections}
+    keys = {str(k): fingerprint(v) for k, v in (data or {}).items() if k != 'repositories'}
+    return {
+        'hash': fingerprint({'keys': keys, 'repositories': {n: r['hash'] for n, r in repositories.items()}}),
+        'keys': keys,
+        'repositories': repositories,
+    }
+
+
+def _read_cache_file(cache_path):
+    try:
+        with open(cache_path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != FINGERPRINT_VERSION:
+        return None
+    return data['tree']
+
+
+def _write_cache_file(cache_path, tree):
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': FINGERPRINT_VERSION, 'tree': tree}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print("WARNING: Failed to write fingerprint cache '%s': %s" % (cache_path, e), file=sys.stderr)
+
+
+def fingerprint_content(content, cache_dir=False):
+    """
+    Compute the tree of fingerprints of the content of a distribution file.
+
+    The trees are cached by the hash of the content.
+
+    :param content: the content of the file as bytes.
+    :param cache_dir: the directory of the on-disk cache, None to disable
+      it, or False to use the default directory.
+    """
+    if cache_dir is False:
+        cache_dir = get_default_cache_dir()
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, hashlib.sha256(content).hexdigest() + '.json')
+        tree = _read_cache_file(cache_path)
+        if tree is not None:
+            return tree
+    tree = fingerprint_distribution(load_yaml_string(content.decode('utf-8')))
+    if cache_path:
+        _write_cache_file(cache_path, tree)
+    return tree
+
+
+def fingerprint_file(path, cache_dir=False):
+    """Compute the tree of fingerprints of a distribution file."""
+    with open(path, 'rb') as f:
+        return fingerprint_content(f.read(), cache_dir=cache_dir)
+
+
+def fingerprint_git_file(ref, path, basedir=None, cache_dir=False):
+    """
+    Compute the tree of fingerprints of a distribution file at a git ref.
+
+    :param ref: the git ref, e.g. the branch a change is compared to.
+    :param path: the path of the file relative to the root of the repository.
+
+    :returns: the tree, or None if the file doesn't exist at the ref.
+    """
+    try:
+        content = subprocess.check_output(
+            ['git', 'show', '%s:%s' % (ref, path)], cwd=basedir or get_basedir(), stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        return None
+    return fingerprint_content(content, cache_dir=cache_dir)
+
+
+def diff_fingerprints(base, head):
+    """
+    Find the repositories which differ between two trees of fingerprints.
+
+    Only the repositories whose hashes differ are compared section by
+    section.
+
+    :returns: a dictionary mapping the names of the repositories which were
+      added, removed or changed to the set of the sections which differ.
+    """
+    if base['hash'] == head['hash']:
+        return {}
+    base_repos = base['repositories']
+    head_repos = head['repositories']
+    changes = {}
+    for name in set(base_repos) | set(head_repos):
+        base_repo = base_repos.get(name)
+        head_repo = head_repos.get(name)
+        if base_repo and head_repo and base_repo['hash'] == head_repo['hash']:
+            continue
+        base_sections = base_repo['sections'] if base_repo else {}
+        head_sections = head_repo['sections'] if head_repo else {}
+        changes[name] = {
+            s for s in set(base_sections) | set(head_sections)
+            if base_sections.get(s) != head_sections.get(s)}
+    return changes
+
+
+def get_changed_repositories(ref, path, basedir=None, cache_dir=False):
+    """
+    Find the repositories of a distribution file which changed since a git ref.
+
+    :param ref: the git ref to compare the file in the working tree to.
+    :param path: the path of the file relative to the root of the repository.
+
+    :returns: a dictionary mapping the names of the repositories which were
+      added, removed or changed to the set of the sections which differ, or
+      None if the file doesn't exist at the ref.
+    """
+    basedir = basedir or get_basedir()
+    base = fingerprint_git_file(ref, path, basedir=basedir, cache_dir=cache_dir)
+    if base is None:
+        return None
+    return diff_fingerprints(base, fingerprint_file(os.path.join(basedir, path), cache_dir=cache_dir))
+
+
+def get_distribution_files(basedir):
+    """Get the paths of the distribution files in the index, relative to the root of the repository."""
+    index = load_yaml_file(os.path.join(basedir, 'index-v4.yaml'))
+    paths = []
+    for metadata in index['distributions'].values():
+        for path in metadata['distribution']:
+            if path not in paths:
+                paths.append(path)
+    return sorted(paths)
+
+
+def fingerprint_index(basedir=None, cache_dir=False):
+    """
+    Compute the trees of fingerprints of all distribution files in the index.
+
+    :returns: a dictionary with the 'hash' of all files and the trees of
+      the 'files', keyed by their paths relative to the root of the
+      repository.
+    """
+    basedir = basedir or get_basedir()
+    files = {
+        path: fingerprint_file(os.path.join(basedir, path), cache_dir=cache_dir)
+        for path in get_distribution_files(basedir)}
+    return {
+        'version': FINGERPRINT_VERSION,
+        'hash': fingerprint({path: tree['hash'] for path, tree in files.items()}),
+        'files': files,
+    }
+
+
+def main(argv=sys.argv[1:]):
+    parser = argparse.ArgumentParser(
+        description='Compute layout independent fingerprints of the repositories in the distribution files')
+    parser.add_argument('--output', '-o', metavar='FILE', help='write the tree of fingerprints to a JSON file')
+    parser.add_argument('--base', metavar='REF', help='list the repositories which changed since a git ref')
+    args = parser.parse_args(argv)
+
+    basedir = get_basedir()
+    tree = fingerprint_index(basedir)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(tree, f, indent=1, sort_keys=True)
+    if args.base:
+        for path in sorted(tree['files']):
+            base = fingerprint_git_file(args.base, path, basedir=basedir)
+            if base is None:
+                print('%s: added' % path)
+                continue
+            changes = diff_fingerprints(base, tree['files'][path])
+            for name in sorted(changes):
+                print('%s: %s (%s)' % (path, name, ', '.join(sorted(changes[name]))))
+    elif not args.output:
+        print(tree['hash'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,465 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.error import URLError
+from urllib.parse import urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+
+# Bump to invalidate the cache files when the format of the entries changes
+CACHE_VERSION = 1
+
+# The number of seconds the refs of a remote are reused for by default
+DEFAULT_TTL = 3600
+
+# The refs which are listed, leaving out e.g. the refs of pull requests
+REF_PATTERNS = ['HEAD', 'refs/heads/*', 'refs/tags/*']
+
+# The number of seconds to wait for a response of a git server
+HTTP_TIMEOUT = 30
+
+
+def get_default_cache_dir():
+    """
+    Get the directory used to share the refs of remotes between runs.
+
+    The directory can be set with ROSDISTRO_REF_CACHE_DIR, and setting it
+    to an empty string disables the on-disk cache.
+    """
+    cache_dir = os.environ.get('ROSDISTRO_REF_CACHE_DIR')
+    if cache_dir is not None:
+        return cache_dir or None
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'rosdistro', 'refs')
+
+
+def get_default_ttl():
+    """Get the TTL of cached refs, which can be set with ROSDISTRO_REF_CACHE_TTL."""
+    return float(os.environ.get('ROSDISTRO_REF_CACHE_TTL', DEFAULT_TTL))
+
+
+def _strip_path(path):
+    path = path.rstrip('/')
+    if path.endswith('.git'):
+        path = path[:-len('.git')]
+    return path
+
+
+def normalize_url(url):
+    """
+    Normalize the URL of a git remote, to identify the same remote.
+
+    The scheme and host are lower-cased, and a trailing slash or '.git'
+    suffix of the path is dropped.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.scheme or not parts.netloc:
+        # e.g. scp-like URLs such as git@github.com:ros/rosdistro.git
+        return _strip_path(url.strip())
+    path = _strip_path(parts.path)
+    netloc = parts.netloc
+    if '@' in netloc:
+        userinfo, host = netloc.rsplit('@', 1)
+        netloc = userinfo + '@' + host.lower()
+    else:
+        netloc = netloc.lower()
+    return urlunsplit((parts.scheme.lower(), netloc, path, parts.query, ''))
+
+
+class RefCache(object):
+    """
+    A cache of the refs of git remotes.
+
+    The refs of each remote are listed with a single 'git ls-remote', and
+    are reused for the same remote under any of its URLs until they are
+    older than the TTL. Concurrent lookups of the same remote wait for the
+    first one rather than listing the refs again. The refs are also shared
+    with other processes through files in the cache directory.
+    """
+
+    def __init__(self, cache_dir=False, ttl=None):
+        """
+        :param cache_dir: the directory of the on-disk cache, None to disable
+          it, or False to use the default directory.
+        :param ttl: the number of seconds refs are reused for, or None to use
+          the default TTL.
+        """
+        self.cache_dir = get_default_cache_dir() if cache_dir is False else cache_dir
+        self.ttl = get_default_ttl() if ttl is None else ttl
+        self._entries = {}
+        self._lookups = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _get_lock(self, key):
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _cache_path(self, key):
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def _read_cache_file(self, key):
+        try:
+            with open(self._cache_path(key)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != CACHE_VERSION or data.get('url') != key:
+            return None
+        return data['time'], data['refs'], None
+
+    def _write_cache_file(self, key, entry):
+        cache_path = self._cache_path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'version': CACHE_VERSION,
+                    'url': key,
+                    'time': entry[0],
+                    'refs': entry[1],
+                }, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(
+                "WARNING: Failed to write ref cache '%s': %s" % (cache_path, e),
+                file=sys.stderr)
+
+    def _is_fresh(self, entry):
+        return entry is not None and time.time() - entry[0] < self.ttl
+
+    def get_refs(self, url):
+        """
+        Get the refs of a git remote.
+
+        :param url: the URL of the remote.
+
+        :returns: a dictionary mapping the names of the HEAD, branch and tag
+          refs (including peeled tags) to their object names.
+        :raises RuntimeError: if the refs can't be listed.
+        """
+        key = normalize_url(url)
+        with self._get_lock(key):
+            entry = self._entries.get(key)
+            if not self._is_fresh(entry) and self.cache_dir:
+                entry = self._read_cache_file(key)
+            if not self._is_fresh(entry):
+                try:
+                    entry = (time.time(), _list_refs(url), None)
+                except RuntimeError as e:
+                    # failures are only remembered by this process
+                    entry = (time.time(), None, str(e))
+                else:
+                    if self.cache_dir:
+                        self._write_cache_file(key, entry)
+            self._entries[key] = entry
+        if entry[2] is not None:
+            raise RuntimeError(entry[2])
+        return dict(entry[1])
+
+    def get_version_refs(self, url, version):
+        """
+        Get the refs of a git remote which a version may refer to.
+
+        Refs which are already cached are used if possible. Otherwise, the
+        refs of HTTP(S) remotes which support protocol v2 are looked up with
+        a request for just these refs, rather than listing all of them.
+
+        :param url: the URL of the remote.
+        :param version: a branch or tag name, or None to only look up HEAD.
+
+        :returns: a dictionary mapping the names of the existing refs among
+          HEAD or the refs/heads/<version> and refs/tags/<version> refs,
+          including peeled tags, to their object names.
+        :raises RuntimeError: if the refs can't be listed.
+        """
+        if version:
+            ref_names = ['refs/heads/%s' % version, 'refs/tags/%s' % version]
+        else:
+            ref_names = ['HEAD']
+        key = normalize_url(url)
+        with self._get_lock(key):
+            entry = self._entries.get(key)
+            if not self._is_fresh(entry) and self.cache_dir:
+                entry = self._read_cache_file(key)
+                if self._is_fresh(entry):
+                    self._entries[key] = entry
+            lookup = None
+            if not self._is_fresh(entry) and urlsplit(url).scheme in ('http', 'https'):
+                lookup = self._lookups.get((key, version))
+                if lookup is None:
+                    try:
+                        lookup = (ls_refs(url, ref_names), None)
+                    except UnsupportedProtocolError:
+                        # list all of the refs instead
+                        lookup = (None, None)
+                    except RuntimeError as e:
+                        lookup = (None, str(e))
+                    self._lookups[(key, version)] = lookup
+        if lookup is not None and lookup[1] is not None:
+            raise RuntimeError(lookup[1])
+        if lookup is not None and lookup[0] is not None:
+            return dict(lookup[0])
+        refs = self.get_refs(url)
+        return {
+            ref: sha for ref, sha in refs.items()
+            if ref in ref_names or (ref.endswith('^{}') and ref[:-len('^{}')] in ref_names)}
+
+
+def _git_env():
+    env = dict(os.environ)
+    # fail rather than waiting for credentials for private or missing repos
+    env['GIT_TERMINAL_PROMPT'] = '0'
+    return env
+
+
+def _list_refs(url):
+    cmd = ['git', 'ls-remote', url] + REF_PATTERNS
+    try:
+        output = subprocess.check_output(cmd, env=_git_env()).decode('utf-8')
+    except subprocess.CalledProcessError as ex:
+        raise RuntimeError('subprocess call %s failed: %s' % (cmd, ex))
+    refs = {}
+    for line in output.splitlines():
+        sha, ref = line.split(None, 1)
+        refs[ref] = sha
+    return refs
+
+
+def get_host(url):
+    """Get the host name of a repository URL, including scp-like git URLs."""
+    netloc = urlsplit(url).netloc
+    if not netloc and ':' in url:
+        # e.g. git@github.com:ros/rosdistro.git
+        netloc = url.split(':', 1)[0]
+    return netloc.rsplit('@', 1)[-1].split(':', 1)[0].lower()
+
+
+class HostLimiter(object):
+    """Limit the number of concurrent operations on each host."""
+
+    def __init__(self, jobs_per_host):
+        self._jobs_per_host = jobs_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        host = get_host(url)
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._jobs_per_host)
+            return self._semaphores[host]
+
+
+class UnsupportedProtocolError(RuntimeError):
+    """The git server doesn't support protocol v2 with the ls-refs command."""
+
+
+def _pkt_line(data):
+    data = data.encode('utf-8')
+    return ('%04x' % (len(data) + 4)).encode('ascii') + data
+
+
+def _read_pkt_lines(buf):
+    """
+    Split git pkt-lines.
+
+    :returns: a list of the payloads of the lines, with None for flush and
+      delimiter packets.
+    :raises UnsupportedProtocolError: if the data isn't made of pkt-lines,
+      e.g. because it was served by a dumb HTTP server or a proxy.
+    """
+    lines = []
+    offset = 0
+    while offset < len(buf):
+        header = buf[offset:offset + 4]
+        try:
+            length = int(header, 16) if len(header) == 4 else -1
+        except ValueError:
+            length = -1
+        if length in (0, 1, 2):
+            lines.append(None)
+            offset += 4
+            continue
+        if length < 4 or offset + length > len(buf):
+            raise UnsupportedProtocolError('invalid pkt-line in the response of the git server')
+        try:
+            lines.append(buf[offset + 4:offset + length].decode('utf-8'))
+        except UnicodeDecodeError:
+            raise UnsupportedProtocolError('invalid pkt-line in the response of the git server')
+        offset += length
+    return lines
+
+
+def _http_request(url, data=None):
+    headers = {'Git-Protocol': 'version=2'}
+    if data is not None:
+        headers.update({
+            'Content-Type': 'application/x-git-upload-pack-request',
+            'Accept': 'application/x-git-upload-pack-result',
+        })
+    try:
+        response = urlopen(Request(url, data=data, headers=headers), timeout=HTTP_TIMEOUT)
+        with response:
+            return response.read()
+    except (URLError, OSError) as e:
+        raise RuntimeError("request to '%s' failed: %s" % (url, e))
+
+
+def ls_refs(url, ref_names):
+    """
+    Look up refs of a git remote with the smart HTTP protocol v2.
+
+    Only the refs starting with the given names are sent by the server, so
+    the response stays small even for remotes with many branches and tags.
+
+    :param url: the HTTP(S) URL of the remote.
+    :param ref_names: the full names of the refs to look up.
+
+    :returns: a dictionary mapping the names of those of the refs which exist,
+      and of the peeled tags among them as '<name>^{}', to object names.
+    :raises UnsupportedProtocolError: if the server doesn't support the
+      ls-refs command of protocol v2 or doesn't answer with pkt-lines.
+    :raises RuntimeError: if the refs can't be looked up.
+    """
+    base_url = url.rstrip('/')
+    advertisement = _read_pkt_lines(
+        _http_request(base_url + '/info/refs?service=git-upload-pack'))
+    # Servers may precede the capabilities with a service announcement
+    if advertisement and advertisement[0] and advertisement[0].startswith('# service='):
+        advertisement = advertisement[2:]
+    capabilities = [line.rstrip('\n') for line in advertisement if line is not None]
+    if not capabilities or capabilities[0] != 'version 2' or \
+            not any(c == 'ls-refs' or c.startswith('ls-refs=') for c in capabilities):
+        raise UnsupportedProtocolError(
+            "'%s' doesn't support the ls-refs command of protocol v2" % url)
+
+    request = _pkt_line('command=ls-refs\n') + b'0001' + _pkt_line('peel\n')
+    for ref_name in ref_names:
+        request += _pkt_line('ref-prefix %s\n' % ref_name)
+    request += b'0000'
+    response = _read_pkt_lines(_http_request(base_url + '/git-upload-pack', request))
+
+    refs = {}
+    for line in response:
+        if line is None:
+            break
+        if line.startswith('ERR '):
+            raise RuntimeError("git server error for '%s': %s" % (url, line[4:].strip()))
+        try:
+            sha, ref, *attributes = line.rstrip('\n').split(' ')
+        except ValueError:
+            raise UnsupportedProtocolError(
+                "invalid ls-refs response from '%s': %s" % (url, line.strip()))
+        # a prefix can also match refs with longer names
+        if ref not in ref_names:
+            continue
+        refs[ref] = sha
+        for attribute in attributes:
+            if attribute.startswith('peeled:'):
+                refs[ref + '^{}'] = attribute[len('peeled:'):]
+    return refs
+
+
+def is_commit_on_branch(url, commit, branch=None):
+    """
+    Check if a commit is reachable from a branch of a git remote.
+
+    Only the commit objects of the branch are fetched, without any trees or
+    files, into a temporary repository. The commit itself is requested as well
+    so that it is found even if the server only keeps a shallow history, and
+    if the server rejects requests for objects which aren't at the tip of a
+    ref, only the branch is fetched.
+
+    :param url: the URL of the remote.
+    :param commit: the full object name of the commit.
+    :param branch: the name of the branch, or None to check all branches.
+
+    :returns: True if the commit exists and is part of the branch.
+    :raises RuntimeError: if the remote can't be fetched from.
+    """
+    if branch is None:
+        refspec = '+refs/heads/*:refs/remotes/origin/*'
+    else:
+        refspec = '+refs/heads/%s:refs/remotes/origin/%s' % (branch, branch)
+    tmpdir = tempfile.mkdtemp()
+    env = _git_env()
+    try:
+        subprocess.check_call(['git', 'init', '-q', tmpdir], env=env)
+        fetch_cmd = [
+            'git', '-C', tmpdir, 'fetch', '-q', '--no-tags', '--filter=tree:0', url]
+        if subprocess.call(fetch_cmd + [commit, refspec], env=env, stderr=subprocess.DEVNULL):
+            # the server doesn't allow wanting the commit, or doesn't have it
+            try:
+                subprocess.check_call(fetch_cmd + [refspec], env=env)
+            except subprocess.CalledProcessError as ex:
+                raise RuntimeError('subprocess call %s failed: %s' % (fetch_cmd, ex))
+        if subprocess.call(
+            ['git', '-C', tmpdir, 'cat-file', '-e', commit + '^{commit}'],
+            env=env, stderr=subprocess.DEVNULL
+        ):
+            return False
+        branches = subprocess.check_output([
+            'git', '-C', tmpdir, 'for-each-ref', '--format=%(refname)',
+            'refs/remotes/origin'], env=env).decode('utf-8').split()
+        for ref in branches:
+            cmd = ['git', '-C', tmpdir, 'merge-base', '--is-ancestor', commit, ref]
+            returncode = subprocess.call(cmd, env=env)
+            if returncode == 0:
+                return True
+            if returncode != 1:
+                raise RuntimeError('subprocess call %s failed with %d' % (cmd, returncode))
+        return False
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+_ref_cache = None
+_ref_cache_lock = threading.Lock()
+
+
+def get_ref_cache():
+    """Get the ref cache shared by everything in this process."""
+    global _ref_cache
+    with _ref_cache_lock:
+        if _ref_cache is None:
+            _ref_cache = RefCache()
+        return _ref_cache
@@ -0,0 +1,190 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+
+
+# Keys which select an installer rather than an OS version in a rosdep rule
+INSTALLER_KEYS = frozenset((
+    'apk', 'apt', 'dnf', 'emerge', 'gem', 'homebrew', 'macports', 'nix',
+    'npm', 'opkg', 'pacman', 'pip', 'pkg', 'portage', 'slackpkg', 'source',
+    'yum', 'zypper',
+))
+
+
+class Rule(namedtuple('Rule', ('installer', 'packages', 'expanded'))):
+    """
+    A normalized rosdep rule for a single platform.
+
+    :ivar installer: the installer named by the rule, or None for the default
+        installer of the platform.
+    :ivar packages: a tuple of the package names, which is empty for rules
+        that are null or which don't list packages (e.g. 'source' rules).
+    :ivar expanded: True if the rule was not specific to the OS version, but
+        was expanded from a wildcard or a version-independent rule.
+    """
+
+    __slots__ = ()
+
+
+class RuleTable(Mapping):
+    """
+    An immutable table of normalized rosdep rules.
+
+    The table maps (rosdep key, OS name, OS version) tuples to a Rule. If the
+    rules were loaded with line annotations, the key, OS name and explicitly
+    listed OS version in the table's keys retain them.
+    """
+
+    def __init__(self, rules):
+        self._rules = MappingProxyType(dict(rules))
+        by_key = {}
+        for platform_key in self._rules:
+            by_key.setdefault(platform_key[0], []).append(platform_key)
+        self._by_key = MappingProxyType(
+            {key: tuple(platform_keys) for key, platform_keys in by_key.items()})
+
+    def __getitem__(self, platform_key):
+        return self._rules[platform_key]
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def rosdep_keys(self):
+        """Get the rosdep keys which have a rule for at least one platform."""
+        return self._by_key.keys()
+
+    def platforms(self, key):
+        """Get the (key, OS name, OS version) tuples of a rosdep key's rules."""
+        return self._by_key.get(key, ())
+
+    def os_names(self, key):
+        """Get the names of the OSes which have a rule for a rosdep key."""
+        return {os_name for _, os_name, _ in self.platforms(key)}
+
+    def select(self, rules):
+        """
+        Enumerate the table entries which originate from a subset of the rules.
+
+        :param rules: a subset of the rosdep rules the table was compiled from,
+            such as a snippet isolated from a diff.
+
+        :returns: an enumeration of ((key, OS name, OS version), Rule) tuples.
+        """
+        for key, key_rules in rules.items():
+            if not isinstance(key_rules, dict):
+                continue
+            for os_name, os_rules in key_rules.items():
+                version_keys = None
+                if _is_version_mapping(os_rules):
+                    version_keys = os_rules.keys()
+                for platform_key in self.platforms(key):
+                    if platform_key[1] != os_name:
+                        continue
+                    rule = self._rules[platform_key]
+                    if version_keys is not None:
+                        if rule.expanded and '*' not in version_keys:
+                            continue
+                        if not rule.expanded and platform_key[2] not in version_keys:
+                            continue
+                    yield platform_key, rule
+
+
+def _is_version_mapping(os_rules):
+    return (
+        isinstance(os_rules, dict) and
+        'packages' not in os_rules and
+        INSTALLER_KEYS.isdisjoint(os_rules.keys()))
+
+
+def _normalize_rule(value, expanded, replacements):
+    installer = None
+    if isinstance(value, dict) and 'packages' not in value and len(value) == 1:
+        installer, value = next(iter(value.items()))
+    if isinstance(value, dict):
+        value = value.get('packages')
+    if isinstance(value, str):
+        value = value.split()
+    if not isinstance(value, list):
+        value = ()
+    packages = []
+    for package in value:
+        if installer is None:
+            for needle, haystack in replacements.items():
+                package = package.replace(needle, haystack)
+        packages.append(package)
+    return Rule(installer, tuple(packages), expanded)
+
+
+def compile_rules(data, supported_versions, name_replacements=None):
+    """
+    Compile rosdep rules into a table of normalized per-platform rules.
+
+    Wildcard and version-independent rules are expanded to each supported
+    version of the OS which doesn't have a more specific rule. Rules for
+    unsupported OSes and versions are dropped.
+
+    :param data: the parsed rosdep rules.
+    :param supported_versions: a mapping of OS names to the OS versions to
+        compile the rules for.
+    :param name_replacements: an optional mapping of OS names to OS versions
+        to substitutions, which are applied to the package names of rules
+        using the default installer.
+
+    :returns: the compiled RuleTable.
+    """
+    name_replacements = name_replacements or {}
+    rules = {}
+    for key, key_rules in data.items():
+        if not isinstance(key_rules, dict):
+            continue
+        for os_name, os_rules in key_rules.items():
+            os_versions = supported_versions.get(os_name)
+            if not os_versions:
+                continue
+            os_replacements = name_replacements.get(os_name, {})
+            if not _is_version_mapping(os_rules):
+                for os_ver in os_versions:
+                    rules[(key, os_name, os_ver)] = _normalize_rule(
+                        os_rules, True, os_replacements.get(os_ver, {}))
+                continue
+            # Retain the (possibly annotated) version strings from the data
+            version_keys = {os_ver: os_ver for os_ver in os_rules.keys()}
+            for os_ver in os_versions:
+                replacements = os_replacements.get(os_ver, {})
+                if os_ver in version_keys:
+                    rules[(key, os_name, version_keys[os_ver])] = _normalize_rule(
+                        os_rules[os_ver], False, replacements)
+                elif '*' in os_rules:
+                    rules[(key, os_name, os_ver)] = _normalize_rule(
+                        os_rules['*'], True, replacements)
+    return RuleTable(rules)
@@ -89,6 +89,11 @@ import time
 import urllib.request
 import yaml
 
+try:
+    from scripts.yaml_loader import load_yaml_string
+except ImportError:
+    from yaml_loader import load_yaml_string
+
 
 def get_ros2_core_repositories(ros_distro, ros_distro_yaml):
     # Now get the ros2.repos corresponding to this release, which we will use
@@ -98,7 +103,7 @@ def get_ros2_core_repositories(ros_distro, ros_distro_yaml):
     with urllib.request.urlopen(ros2_repos_url) as response:
         ros2_repos_data = response.read()
 
-    ros2_repos_yaml = yaml.safe_load(ros2_repos_data)
+    ros2_repos_yaml = load_yaml_string(ros2_repos_data)
 
     # Now build up the constrained list of packages to look at.
     constrained_list = []
@@ -180,7 +185,7 @@ def main():
     with urllib.request.urlopen(rosdistro_url) as response:
         ros_distro_data = response.read()
 
-    ros_distro_yaml = yaml.safe_load(ros_distro_data)
+    ros_distro_yaml = load_yaml_string(ros_distro_data)
 
     if args.all_repos:
         constrained_list = get_all_ros2_repositories(ros_distro_yaml)
@@ -199,7 +204,7 @@ def main():
         with urllib.request.urlopen(tracks_url) as response:
             tracks_data = response.read()
 
-        tracks_yaml = yaml.safe_load(tracks_data)
+        tracks_yaml = load_yaml_string(tracks_data)
         tracks_yaml_distro = tracks_yaml['tracks'][ros_distro]
 
         if tracks_yaml_distro['devel_branch'] != repo['source']['version']:
@@ -224,7 +229,7 @@ This makes it match the source entry in https://github.com/ros/rosdistro/{ros_di
                 branch.checkout()
                 with open(os.path.join(tmpdirname, 'tracks.yaml'), 'r') as infp:
                     local_tracks_data = infp.read()
-                local_tracks_yaml = yaml.safe_load(local_tracks_data)
+                local_tracks_yaml = load_yaml_string(local_tracks_data)
                 local_tracks_yaml['tracks'][ros_distro]['devel_branch'] = repo['source']['version']
                 with open(os.path.join(tmpdirname, 'tracks.yaml'), 'w') as outfp:
                     yaml.dump(local_tracks_yaml, outfp)
@@ -0,0 +1,255 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import bisect
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import yaml
+
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Bump to invalidate the cache files when the format of the entries changes
+CACHE_VERSION = 2
+
+# The pickled data of each parsed file, keyed by the absolute path of the
+# file and the name of the loader
+_memo = {}
+
+
+class LineNumberLoader(SafeLoader):
+    """
+    Base class of loaders which annotate the parsed data with line numbers.
+
+    The line numbers are derived from the marks of the nodes rather than by
+    overriding compose_node(), so the C parser can still be used. The value
+    of a mapping entry is considered to start on the line of its key.
+    """
+
+    def construct_mapping(self, node, deep=False):
+        for key_node, value_node in node.value:
+            value_node.__line__ = key_node.start_mark.line + 1
+        return super().construct_mapping(node, deep=deep)
+
+    @staticmethod
+    def get_line(node):
+        """Get the one-based number of the first line of a node."""
+        return getattr(node, '__line__', None) or node.start_mark.line + 1
+
+    @staticmethod
+    def get_end_line(node):
+        """Get the one-based number of the last line of a node."""
+        end_mark = node.end_mark
+        return end_mark.line + 1 if end_mark.column else end_mark.line
+
+
+class LineIndex(object):
+    """An index of line ranges, to find the range containing a line."""
+
+    def __init__(self, ranges):
+        """
+        :param ranges: an iterable of (first line, last line, value) tuples
+          of ranges which don't overlap.
+        """
+        ranges = sorted(ranges, key=lambda r: r[0])
+        self._starts = [r[0] for r in ranges]
+        self._ends = [r[1] for r in ranges]
+        self._values = [r[2] for r in ranges]
+
+    def find(self, line):
+        """
+        Find the range containing a line.
+
+        :returns: the value of the range, or None if no range contains it.
+        """
+        i = bisect.bisect_right(self._starts, line) - 1
+        if i < 0 or line > self._ends[i]:
+            return None
+        return self._values[i]
+
+
+def get_default_cache_dir():
+    """
+    Get the directory used to persist parsed documents between runs.
+
+    The directory can be set with ROSDISTRO_YAML_CACHE_DIR, and setting it
+    to an empty string disables the on-disk cache.
+    """
+    cache_dir = os.environ.get('ROSDISTRO_YAML_CACHE_DIR')
+    if cache_dir is not None:
+        return cache_dir or None
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'rosdistro', 'yaml')
+
+
+def _loader_name(loader):
+    return '%s.%s' % (loader.__module__, loader.__qualname__)
+
+
+def load_yaml_string(content, loader=None):
+    """
+    Parse a YAML document.
+
+    :param content: the YAML document.
+    :param loader: the PyYAML loader class, or None to use the fastest
+      available safe loader.
+
+    :returns: the parsed data.
+    :raises yaml.YAMLError: if the document is invalid. The errors of the
+      C parser lack the snippet of the document and are worded differently,
+      so the error of the pure Python parser is raised instead.
+    """
+    loader = loader or SafeLoader
+    try:
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError:
+        if issubclass(loader, yaml.reader.Reader):
+            # the loader is already a pure Python one
+            raise
+        try:
+            yaml.load(content, Loader=yaml.SafeLoader)
+        except yaml.YAMLError as e:
+            raise e from None
+        # the document is valid, the error is specific to the loader
+        raise
+
+
+def _read_cache_file(cache_path, digest):
+    try:
+        with open(cache_path, 'rb') as f:
+            version, cached_digest, blob = pickle.load(f)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    if version != CACHE_VERSION or cached_digest != digest:
+        return None
+    return blob
+
+
+def _write_cache_file(cache_path, digest, blob):
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(
+                (CACHE_VERSION, digest, blob), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(
+            "WARNING: Failed to write YAML cache '%s': %s" % (cache_path, e),
+            file=sys.stderr)
+
+
+def load_yaml_file(path, loader=None, cache_dir=False):
+    """
+    Parse a YAML file, reusing the result of previous parses if possible.
+
+    Parsed documents are memoized per process, keyed by the path, the
+    modification time and the size of the file. They are also persisted on
+    disk, keyed by the content hash of the file, so that unchanged files
+    aren't parsed again by later runs.
+
+    Every call returns a new copy of the data, so callers may modify it.
+
+    :param path: the path of the YAML file.
+    :param loader: the PyYAML loader class, or None to use the fastest
+      available safe loader. The data it produces must be picklable.
+    :param cache_dir: the directory of the on-disk cache, None to disable
+      it, or False to use the default directory.
+
+    :returns: the parsed data.
+    """
+    loader = loader or SafeLoader
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    memo_key = (path, _loader_name(loader))
+    memo_stamp = (stat.st_mtime_ns, stat.st_size)
+    memoized = _memo.get(memo_key)
+    if memoized is not None and memoized[0] == memo_stamp:
+        return pickle.loads(memoized[1])
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(
+        _loader_name(loader).encode() + b'\0' + content).hexdigest()
+    if cache_dir is False:
+        cache_dir = get_default_cache_dir()
+    cache_path = None
+    blob = None
+    if cache_dir:
+        cache_path = os.path.join(
+            cache_dir,
+            hashlib.sha256('\0'.join(memo_key).encode()).hexdigest() + '.pickle')
+        blob = _read_cache_file(cache_path, digest)
+    if blob is None:
+        data = load_yaml_string(content.decode('utf-8'), loader)
+        blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        if cache_path:
+            _write_cache_file(cache_path, digest, blob)
+    else:
+        data = pickle.loads(blob)
+    _memo[memo_key] = (memo_stamp, blob)
+    return data
+
+
+def clear_memo():
+    """Forget the documents memoized by this process."""
+    _memo.clear()
+
+
+def main(argv=sys.argv[1:]):
+    parser = argparse.ArgumentParser(
+        description='Measure the time taken to load YAML files')
+    parser.add_argument('paths', nargs='+', metavar='path', help='YAML files')
+    args = parser.parse_args(argv)
+
+    cache_dir = tempfile.mkdtemp()
+    stages = [
+        ('pure Python', lambda p: yaml.load(open(p).read(), Loader=yaml.SafeLoader)),
+        ('libyaml', lambda p: load_yaml_string(open(p).read())),
+        ('parse and cache', lambda p: load_yaml_file(p, cache_dir=cache_dir)),
+        ('disk cache', lambda p: load_yaml_file(p, cache_dir=cache_dir)),
+        ('memoized', lambda p: load_yaml_file(p, cache_dir=cache_dir)),
+    ]
+    print('%-18s %10s' % ('stage', 'time (s)'))
+    for name, fn in stages:
+        if name == 'disk cache':
+            clear_memo()
+        start = time.perf_counter()
+        for path in args.paths:
+            fn(path)
+        print('%-18s %10.3f' % (name, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from rosdep2.sources_list import CachedDataSource
+
+from scripts.check_duplicates import check_duplicates
+from scripts.check_duplicates import get_platforms
+from scripts.check_duplicates import index_rosdep_keys
+
+INDEX_YAML = """distributions:
+  humble:
+    distribution: [humble/distribution.yaml]
+    distribution_status: active
+  jazzy:
+    distribution: [jazzy/distribution.yaml]
+    distribution_status: active
+  noetic:
+    distribution: [noetic/distribution.yaml]
+    distribution_status: end-of-life
+type: index
+version: 4
+"""
+
+DISTRIBUTION_YAML = """release_platforms:
+%s
+repositories: {}
+type: distribution
+version: 2
+"""
+
+PLATFORMS = [['jazzy', 'ubuntu', 'noble'], ['jazzy', 'rhel', '9'], ['', 'osx', 'homebrew']]
+
+
+@pytest.fixture
+def basedir(monkeypatch):
+    monkeypatch.setenv('ROSDISTRO_YAML_CACHE_DIR', '')
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def _source(name, tag, rosdep_data):
+    return CachedDataSource('yaml', 'file:///rosdep/%s' % name, [tag], rosdep_data)
+
+
+def test_get_platforms(basedir):
+    with open(os.path.join(basedir, 'index-v4.yaml'), 'w') as f:
+        f.write(INDEX_YAML)
+    for distro, platforms in (
+        ('humble', '  rhel: [\'8\']\n  ubuntu: [jammy]'),
+        ('jazzy', '  rhel: [\'9\']\n  ubuntu: [noble]'),
+    ):
+        os.makedirs(os.path.join(basedir, distro))
+        with open(os.path.join(basedir, distro, 'distribution.yaml'), 'w') as f:
+            f.write(DISTRIBUTION_YAML % platforms)
+    # end-of-life distributions are skipped, so their files aren't needed
+    assert get_platforms(basedir) == [
+        ['humble', 'rhel', '8'], ['humble', 'ubuntu', 'jammy'],
+        ['jazzy', 'rhel', '9'], ['jazzy', 'ubuntu', 'noble'],
+        ['', 'osx', 'homebrew']]
+
+
+def test_index_rosdep_keys():
+    base = _source('base.yaml', '', {
+        'foo': {'ubuntu': ['libfoo-dev'], 'rhel': {'8': ['foo']}},
+        'bar': {'ubuntu': {'pip': {'packages': ['bar']}}, 'osx': {'macports': {'packages': ['bar']}}},
+        'baz': {'ubuntu': {'*': {'apt': {'packages': ['baz']}}}, 'rhel': {'dnf': {'packages': ['baz']}}},
+    })
+    homebrew = _source('osx-homebrew.yaml', 'osx', {
+        'bar': {'osx': {'homebrew': {'packages': ['bar']}}},
+    })
+    index = index_rosdep_keys([base, homebrew], PLATFORMS)
+    assert index == {
+        'foo': {('ubuntu', 'noble'): [base]},
+        'bar': {('ubuntu', 'noble'): [base], ('osx', 'homebrew'): [homebrew]},
+        'baz': {('ubuntu', 'noble'): [base]},
+    }
+
+
+def test_check_duplicates(capsys):
+    base = _source('base.yaml', '', {
+        'foo': {'ubuntu': ['libfoo-dev'], 'osx': {'macports': {'packages': ['foo']}}},
+        'bar': {'ubuntu': {'noble': ['bar']}},
+    })
+    homebrew = _source('osx-homebrew.yaml', 'osx', {
+        'foo': {'osx': {'homebrew': {'packages': ['foo']}}},
+    })
+    # a macports rule in base.yaml doesn't collide with a homebrew rule
+    assert check_duplicates([base, homebrew], PLATFORMS)
+    assert 'multiply defined' not in capsys.readouterr().out
+
+    python = _source('python.yaml', '', {
+        'bar': {'ubuntu': {'*': ['python3-bar']}},
+        'foo': {'osx': {'homebrew': {'packages': ['foo']}}},
+    })
+    jazzy = _source('jazzy/distribution.yaml', 'jazzy', {'bar': {'ubuntu': {'noble': ['ros-jazzy-bar']}}})
+    assert not check_duplicates([base, homebrew, python, jazzy], PLATFORMS)
+    out = capsys.readouterr().out
+    assert ('bar (ubuntu noble) is multiply defined in\n\tfile:///rosdep/base.yaml and \n'
+            '\tfile:///rosdep/python.yaml and \n\tfile:///rosdep/jazzy/distribution.yaml\n') in out
+    assert ('foo (osx homebrew) is multiply defined in\n\tfile:///rosdep/osx-homebrew.yaml and \n'
+            '\tfile:///rosdep/python.yaml\n') in out
+    # sources tagged for other distributions aren't used on the platform
+    assert check_duplicates([base, jazzy], [['humble', 'ubuntu', 'noble']])
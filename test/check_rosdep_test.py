@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from scripts.check_rosdep import check_brackets
+from scripts.check_rosdep import check_order
+from scripts.check_rosdep import correct_indent
+from scripts.check_rosdep import LintRule
+from scripts.check_rosdep import no_blank_lines
+from scripts.check_rosdep import no_trailing_spaces
+from scripts.check_rosdep import parse_changed_lines
+from scripts.check_rosdep import select_ranges
+
+CHECK_ROSDEP = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'check_rosdep.py')
+
+ROSDEP_YAML = """aaa:
+  ubuntu: [aaa]
+ccc:
+  debian: [ccc]
+  ubuntu:
+    '*': [ccc]
+eee:
+  ubuntu: [eee]
+"""
+
+
+def _git(path, *args):
+    return subprocess.check_output(
+        ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-C', path] + list(args),
+        universal_newlines=True)
+
+
+@pytest.fixture
+def repo_path(monkeypatch):
+    monkeypatch.setenv('ROSDISTRO_YAML_CACHE_DIR', '')
+    path = tempfile.mkdtemp()
+    with open(os.path.join(path, 'r.yaml'), 'w') as f:
+        f.write(ROSDEP_YAML)
+    _git(path, 'init', '-q')
+    _git(path, 'add', 'r.yaml')
+    _git(path, 'commit', '-q', '-m', 'base')
+    yield path
+    shutil.rmtree(path)
+
+
+def _lint(check, buf, capsys):
+    result = check(buf)
+    return result, capsys.readouterr().out
+
+
+def test_lint_rule():
+    class Incomplete(LintRule):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+# The expected messages are those of the checker before the checks shared a
+# single pass over the file
+
+def test_trailing_spaces(capsys):
+    buf = 'aaa: \n  ubuntu: [aaa] \nbbb:\n  ubuntu: [bbb]\n \n'
+    assert _lint(no_trailing_spaces, buf, capsys) == (False, (
+        '  ERR: trailing space line 1\n'
+        '  ERR: trailing space line 2\n'
+        '  ERR: trailing space line 5\n'))
+    assert _lint(no_trailing_spaces, 'aaa:\n  ubuntu: [aaa]\n', capsys) == (True, '')
+
+
+def test_blank_lines(capsys):
+    buf = 'aaa:\n\n  ubuntu: [aaa]\n  \nbbb: [bbb]\n\n'
+    assert _lint(no_blank_lines, buf, capsys) == (False, (
+        '  ERR: blank line 2\n'
+        '  ERR: blank line 4\n'
+        '  ERR: blank line 6\n'))
+    # without a newline at the end of the file
+    assert _lint(no_blank_lines, 'aaa: [aaa]\n\nbbb: [bbb]', capsys) == (False, '  ERR: blank line 2\n')
+    assert _lint(no_blank_lines, 'aaa: [aaa]\n', capsys) == (True, '')
+
+
+def test_correct_indent(capsys):
+    buf = (
+        'aaa:\n   ubuntu: [aaa]\nbbb:\n  ubuntu:\n      focal: [bbb]\n'
+        'ccc:\n  ubuntu: |\n    text\n       more\n  debian: [ccc]\n# comment\n     # comment\n')
+    assert _lint(correct_indent, buf, capsys) == (False, (
+        '  ERR: invalid indentation level line 2: 3\n'
+        '  ERR: too much indentation line 5\n'))
+    buf = 'aaa:\n  ubuntu:\n    focal: [aaa]\nbbb: [bbb]\n'
+    assert _lint(correct_indent, buf, capsys) == (True, '')
+
+
+def test_brackets(capsys):
+    buf = (
+        'aaa:\n  ubuntu: aaa\n  debian: null\n  source:\n    uri: http://example.com/aaa.tar.gz\n'
+        '    md5sum: d41d8cd98f00b204e9800998ecf8427e\n  fedora: [aaa]\n  rhel:\n    packages: libaaa\n'
+        '  gentoo: |\n    not: checked\n')
+    assert _lint(check_brackets, buf, capsys) == (False, (
+        '  ERR: list not in square brackets line 2\n'
+        '  ERR: list not in square brackets line 9\n'))
+    assert _lint(check_brackets, 'aaa:\n  ubuntu: [aaa]\n', capsys) == (True, '')
+
+
+def test_order(capsys):
+    buf = (
+        'bbb:\n  ubuntu: [bbb]\naaa:\n  ubuntu: [aaa]\n  debian: [aaa]\n\'ccc\':\n  ubuntu:\n'
+        '    noble: [c]\n    jammy: [c]\n  debian:\n    bookworm: [c]\n"ddd": [d]\n"c c": [e]\n')
+    assert _lint(check_order, buf, capsys) == (False, (
+        "  ERR: list out of alphabetical order line 3.  'aaa' should come before 'bbb'\n"
+        "  ERR: list out of alphabetical order line 5.  'debian' should come before 'ubuntu'\n"
+        "  ERR: list out of alphabetical order line 9.  'jammy' should come before 'noble'\n"
+        "  ERR: list out of alphabetical order line 10.  'debian' should come before 'ubuntu'\n"
+        "  ERR: list out of alphabetical order line 13.  'c c' should come before 'ddd'\n"))
+    buf = 'aaa:\n  debian: [aaa]\n  ubuntu:\n    jammy: [aaa]\n    noble: [aaa]\nbbb: [bbb]\n'
+    assert _lint(check_order, buf, capsys) == (True, '')
+
+
+def test_parse_changed_lines():
+    diff = """diff --git a/rosdep/base.yaml b/rosdep/base.yaml
+--- a/rosdep/base.yaml
++++ b/rosdep/base.yaml
+@@ -3 +3 @@ foo:
+-  debian: [foo]
++  debian: [libfoo]
+@@ -10,0 +11,2 @@ bar:
++baz:
++  ubuntu: [baz]
+@@ -20,2 +22,0 @@ qux:
+-quux:
+-  ubuntu: [quux]
+diff --git a/rosdep/python.yaml b/rosdep/python.yaml
+deleted file mode 100644
+--- a/rosdep/python.yaml
++++ /dev/null
+"""
+    assert parse_changed_lines(diff) == {
+        'rosdep/base.yaml': {3, 11, 12, 22, 23},
+        '/dev/null': set(),
+    }
+
+
+def test_select_ranges():
+    lines = ROSDEP_YAML.split('\n')
+    # the changed key and the first lines of its neighbours
+    assert select_ranges(lines, {4}) == [(0, 1), (2, 7)]
+    assert select_ranges(lines, {1, 2}) == [(0, 3)]
+    assert select_ranges(lines, {7, 8, 9}) == [(2, 3), (6, 9)]
+    assert select_ranges(lines, set()) == []
+    # leading comments are selected without a neighbour before them
+    assert select_ranges(['# comment'] + lines, {1}) == [(0, 2)]
+    # lines which can't be attributed to a top-level key
+    assert select_ranges(['aaa: [aaa]', ' bbb', 'ccc: [ccc]'], {1}) is None
+    assert select_ranges(['aaa: [aaa]', 'bbb', 'ccc: [ccc]'], {1}) is None
+
+
+def _check_diff(path):
+    return subprocess.run(
+        [sys.executable, CHECK_ROSDEP, '--diff', 'HEAD', 'r.yaml'], cwd=path,
+        stdout=subprocess.PIPE, universal_newlines=True)
+
+
+def test_check_diff(repo_path):
+    result = _check_diff(repo_path)
+    assert result.returncode == 0
+    assert 'skipping file without changes' in result.stdout
+
+    # a key added out of order is compared with the key before it
+    with open(os.path.join(repo_path, 'r.yaml'), 'w') as f:
+        f.write(ROSDEP_YAML.replace('eee:', 'bbb:\n  ubuntu: [bbb]\neee:'))
+    result = _check_diff(repo_path)
+    assert result.returncode == 1
+    assert "'bbb' should come before 'ccc'" in result.stdout
+
+    # and with the key after it
+    with open(os.path.join(repo_path, 'r.yaml'), 'w') as f:
+        f.write(ROSDEP_YAML.replace('ccc:', 'fff:\n  ubuntu: [fff]\nccc:'))
+    result = _check_diff(repo_path)
+    assert result.returncode == 1
+    assert "'ccc' should come before 'fff'" in result.stdout
+
+    # only the changed keys are checked
+    with open(os.path.join(repo_path, 'r.yaml'), 'w') as f:
+        f.write(ROSDEP_YAML.replace('  ubuntu: [aaa]', '  ubuntu: aaa ').replace('eee', 'ddd'))
+    _git(repo_path, 'commit', '-q', '-a', '-m', 'unclean')
+    with open(os.path.join(repo_path, 'r.yaml'), 'a') as f:
+        f.write('fff:\n  ubuntu: [fff]\n')
+    assert _check_diff(repo_path).returncode == 0
+    with open(os.path.join(repo_path, 'r.yaml'), 'a') as f:
+        f.write('ggg:\n   ubuntu: [ggg]\n')
+    result = _check_diff(repo_path)
+    assert result.returncode == 1
+    assert 'invalid indentation level line 12' in result.stdout
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from catkin_pkg.packages import find_package_paths
+from scripts.check_rosdistro_repos import clone_git_repo
+from scripts.check_rosdistro_repos import fetch_git_manifests
+
+PACKAGE_XML = """<package format="2">
+  <name>%s</name>
+  <version>0.0.0</version>
+  <description>Test package</description>
+  <maintainer email="test@example.com">Test</maintainer>
+  <license>BSD</license>
+</package>
+"""
+
+
+def _git(path, *args):
+    return subprocess.check_output(
+        ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-C', path] + list(args),
+        universal_newlines=True)
+
+
+def _create_repo(path):
+    files = {
+        'README.md': 'readme\n',
+        'data/large.bin': 'x' * 100000,
+        'foo/package.xml': PACKAGE_XML % 'foo',
+        'foo/src/foo.cpp': 'int main() {}\n',
+        'bar/baz/package.xml': PACKAGE_XML % 'baz',
+        'ignored/COLCON_IGNORE': '',
+        'ignored/qux/package.xml': PACKAGE_XML % 'qux',
+    }
+    for name, content in files.items():
+        os.makedirs(os.path.dirname(os.path.join(path, name)), exist_ok=True)
+        with open(os.path.join(path, name), 'w') as f:
+            f.write(content)
+    _git(path, 'init', '-q')
+    _git(path, 'config', 'uploadpack.allowFilter', 'true')
+    _git(path, 'add', '-A')
+    _git(path, 'commit', '-q', '-m', 'first')
+    _git(path, 'commit', '-q', '--allow-empty', '-m', 'second')
+    _git(path, 'branch', 'release')
+
+
+def test_fetch_git_manifests():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        upstream = os.path.join(tmpdir, 'upstream')
+        _create_repo(upstream)
+        url = 'file://' + upstream
+
+        full = os.path.join(tmpdir, 'full')
+        os.mkdir(full)
+        clone_git_repo(url, 'release', full)
+        manifests = os.path.join(tmpdir, 'manifests')
+        fetch_git_manifests(url, 'release', manifests)
+
+        expected = sorted(find_package_paths(os.path.join(full, 'upstream')))
+        assert expected == ['bar/baz', 'foo']
+        assert sorted(find_package_paths(manifests)) == expected
+
+        # Only the tip of the branch is fetched
+        assert _git(manifests, 'rev-list', '--count', 'HEAD').strip() == '1'
+        # The blobs of the other files are neither checked out nor fetched
+        assert not os.path.exists(os.path.join(manifests, 'data', 'large.bin'))
+        objects = _git(manifests, 'rev-list', '--objects', '--missing=print', 'HEAD')
+        missing = [line for line in objects.splitlines() if line.startswith('?')]
+        assert len(missing) == 3
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from scripts.check_rosdep import main as check_rosdep
+
+CLEAN_ROSDEP_YAML = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'clean_rosdep_yaml.py')
+
+MESSY_YAML = """# header comment
+zlib:
+  ubuntu: [zlib1g-dev]
+bbb:
+    # prefer the dev package
+    ubuntu: libbbb-dev libbbb1
+    debian: [libbbb-dev]  # trailing
+aaa:
+  fedora: [aaa]
+  arch: [aaa]
+  'yes':
+    '*': ['yes']
+"""
+
+CLEAN_YAML = """# header comment
+aaa:
+  arch: [aaa]
+  fedora: [aaa]
+  'yes':
+    '*': ['yes']
+bbb:
+  debian: [libbbb-dev]  # trailing
+  # prefer the dev package
+  ubuntu: [libbbb-dev, libbbb1]
+zlib:
+  ubuntu: [zlib1g-dev]
+"""
+
+
+@pytest.fixture
+def rosdep_path(monkeypatch):
+    monkeypatch.setenv('ROSDISTRO_YAML_CACHE_DIR', '')
+    path = tempfile.mkdtemp()
+    yield os.path.join(path, 'base.yaml')
+    shutil.rmtree(path)
+
+
+def _clean(*args):
+    return subprocess.run(
+        [sys.executable, CLEAN_ROSDEP_YAML] + list(args),
+        stdout=subprocess.PIPE, universal_newlines=True)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_clean_file(rosdep_path):
+    with open(rosdep_path, 'w') as f:
+        f.write(MESSY_YAML)
+    result = _clean(rosdep_path)
+    assert result.returncode == 0
+    assert _read(rosdep_path) == CLEAN_YAML
+    assert check_rosdep(rosdep_path)
+
+    # an already clean file is left alone
+    mtime = os.stat(rosdep_path).st_mtime_ns
+    assert _clean(rosdep_path).returncode == 0
+    result = _clean('--check', rosdep_path)
+    assert result.returncode == 0
+    assert result.stdout == ''
+    assert os.stat(rosdep_path).st_mtime_ns == mtime
+    assert _read(rosdep_path) == CLEAN_YAML
+
+
+def test_check(rosdep_path):
+    with open(rosdep_path, 'w') as f:
+        f.write(MESSY_YAML)
+    result = _clean('--check', rosdep_path)
+    assert result.returncode == 1
+    assert result.stdout.startswith('--- a/%s\n+++ b/%s\n' % (rosdep_path, rosdep_path))
+    assert '-    ubuntu: libbbb-dev libbbb1\n' in result.stdout
+    assert '+  ubuntu: [libbbb-dev, libbbb1]\n' in result.stdout
+    assert _read(rosdep_path) == MESSY_YAML
+
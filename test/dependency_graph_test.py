@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+import json
+import os
+import random
+import shutil
+import tempfile
+
+import pytest
+
+from scripts.dependency_graph import DependencyGraph
+
+
+@pytest.fixture
+def graph_path():
+    path = tempfile.mkdtemp()
+    yield os.path.join(path, 'graph.json')
+    shutil.rmtree(path)
+
+
+def _assert_ordered(graph):
+    order = {name: i for i, name in enumerate(graph.get_order())}
+    for name, deps in graph.get_depends().items():
+        assert all(order[dep] < order[name] for dep in deps)
+
+
+def test_update(graph_path):
+    graph = DependencyGraph()
+    assert graph.update({'a': ['b', 'external'], 'b': ['c'], 'c': [], 'd': ['a', 'c']}) == []
+    assert graph.get_order() == ['c', 'b', 'a', 'd']
+    graph.save(graph_path)
+
+    # a new dependency which breaks the order moves the affected packages
+    graph = DependencyGraph.load(graph_path)
+    assert graph.update({'a': ['b'], 'b': ['c'], 'c': ['e'], 'd': ['a', 'c'], 'e': []}) == []
+    assert graph.get_order() == ['e', 'c', 'b', 'a', 'd']
+
+    # dependencies which close a cycle are reported with the cycle and left out
+    assert graph.update({'a': ['b'], 'b': ['c'], 'c': ['e', 'd'], 'd': ['a', 'c'], 'e': ['e']}) == [
+        ['c', 'd', 'c'], ['e', 'e']]
+    assert graph.get_depends()['c'] == {'e'}
+    _assert_ordered(graph)
+    # until the cycle is resolved
+    assert graph.update({'a': ['b'], 'b': ['c'], 'c': ['e', 'd'], 'd': ['a'], 'e': []}) == [
+        ['c', 'd', 'a', 'b', 'c']]
+    assert graph.update({'a': ['b'], 'b': ['c'], 'c': ['e', 'd'], 'e': []}) == []
+    _assert_ordered(graph)
+
+
+def test_load_invalid(graph_path):
+    with open(graph_path, 'w') as f:
+        json.dump({'version': 1, 'order': ['a', 'b'], 'depends': {'a': ['b'], 'b': []}}, f)
+    assert DependencyGraph.load(graph_path).get_order() == []
+    assert DependencyGraph.load(graph_path + '.missing').get_order() == []
+
+
+def _has_cycle(depends):
+    remaining = {name: {d for d in deps if d in depends} for name, deps in depends.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            return True
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return False
+
+
+def test_random_updates(graph_path):
+    rng = random.Random(0)
+    for _ in range(100):
+        graph = DependencyGraph()
+        for _ in range(5):
+            names = ['p%d' % i for i in range(rng.randint(1, 30)) if rng.random() < 0.9]
+            depends = {
+                name: {
+                    dep for dep in rng.sample(names, min(len(names), 3))
+                    if dep < name or rng.random() < 0.05}
+                for name in names}
+            graph.save(graph_path)
+            graph = DependencyGraph.load(graph_path)
+            cycles = graph.update(depends)
+            assert bool(cycles) == _has_cycle(depends)
+            for cycle in cycles:
+                assert cycle[0] == cycle[-1]
+                assert all(dep in depends[name] for name, dep in zip(cycle, cycle[1:]))
+            assert set(graph.get_order()) == set(depends)
+            _assert_ordered(graph)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+from rosdistro import get_index
+
+from .test_build_caches import generate_incremental_cache
+
+PACKAGE_XML = """<package format="2">
+  <name>%s</name>
+  <version>%s</version>
+  <description>Test package</description>
+  <maintainer email="test@example.com">Test</maintainer>
+  <license>BSD</license>
+</package>
+"""
+
+INDEX_YAML = """distributions:
+  rolling:
+    distribution: [rolling/distribution.yaml]
+    distribution_cache: file://%s/missing-cache.yaml.gz
+type: index
+version: 3
+"""
+
+DISTRIBUTION_YAML = """release_platforms:
+  ubuntu: [noble]
+repositories:
+%s
+type: distribution
+version: 2
+"""
+
+REPOSITORY_YAML = """  %s:
+    release:
+      packages: [%s]
+      tags:
+        release: release/rolling/{package}/{version}
+      url: file://%s
+      version: %s
+"""
+
+
+def _git(path, *args):
+    return subprocess.check_output(
+        ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-C', path] + list(args),
+        universal_newlines=True)
+
+
+@pytest.fixture
+def tmpdir_path(monkeypatch):
+    monkeypatch.setenv('ROSDISTRO_YAML_CACHE_DIR', '')
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def _create_release_repo(path, releases):
+    os.makedirs(path)
+    _git(path, 'init', '-q')
+    for pkg_name, version in releases:
+        with open(os.path.join(path, 'package.xml'), 'w') as f:
+            f.write(PACKAGE_XML % (pkg_name, version))
+        _git(path, 'add', 'package.xml')
+        _git(path, 'commit', '-q', '-m', '%s %s' % (pkg_name, version))
+        _git(path, 'tag', 'release/rolling/%s/%s-1' % (pkg_name, version))
+
+
+def _write_distribution(path, release_repo, versions):
+    os.makedirs(os.path.join(path, 'rolling'), exist_ok=True)
+    with open(os.path.join(path, 'rolling', 'distribution.yaml'), 'w') as f:
+        f.write(DISTRIBUTION_YAML % ''.join(
+            REPOSITORY_YAML % (name, name, release_repo, version) for name, version in sorted(versions.items())))
+
+
+def test_generate_incremental_cache(tmpdir_path, capsys):
+    release_repo = os.path.join(tmpdir_path, 'release')
+    _create_release_repo(release_repo, [('foo', '1.0.0'), ('foo', '1.10.0'), ('bar', '2.0.0')])
+    with open(os.path.join(tmpdir_path, 'index.yaml'), 'w') as f:
+        f.write(INDEX_YAML % tmpdir_path)
+    index = get_index('file://' + os.path.join(tmpdir_path, 'index.yaml'))
+    cache_dir = os.path.join(tmpdir_path, 'cache')
+
+    _write_distribution(tmpdir_path, release_repo, {'foo': '1.0.0-1', 'bar': '2.0.0-1'})
+    cache = generate_incremental_cache(index, 'rolling', cache_dir)
+    assert '- reused 0 manifests and fetched 2' in capsys.readouterr().out
+    assert '<version>1.0.0</version>' in cache.release_package_xmls['foo']
+    assert os.path.exists(os.path.join(cache_dir, 'rolling-cache.yaml.gz'))
+
+    # Only the manifest of the changed release is fetched again
+    _write_distribution(tmpdir_path, release_repo, {'foo': '1.10.0-1', 'bar': '2.0.0-1'})
+    cache = generate_incremental_cache(index, 'rolling', cache_dir)
+    out = capsys.readouterr().out
+    assert '- reused 1 manifests and fetched 1' in out
+    assert "- fetch manifest of package 'foo'" in out
+    assert '<version>1.10.0</version>' in cache.release_package_xmls['foo']
+
+    _write_distribution(tmpdir_path, release_repo, {'foo': '1.10.0-1', 'bar': '2.1.0-1'})
+    with pytest.raises(RuntimeError) as e:
+        generate_incremental_cache(index, 'rolling', cache_dir)
+    assert 'missing package.xml file for package "bar"' in str(e.value)
+    assert '- reused 1 manifests and fetched 1' in capsys.readouterr().out
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+import yaml
+
+from scripts.distribution_fingerprints import diff_fingerprints
+from scripts.distribution_fingerprints import fingerprint_content
+from scripts.distribution_fingerprints import fingerprint_distribution
+from scripts.distribution_fingerprints import get_changed_repositories
+
+DISTRIBUTION_YAML = """%YAML 1.1
+---
+release_platforms:
+  ubuntu: [noble]
+repositories:
+  bar:
+    doc:
+      type: git
+      url: https://github.com/ros/bar.git
+      version: main
+  foo:
+    release:
+      packages: [foo, foo_msgs]
+      tags:
+        release: release/rolling/{package}/{version}
+      url: https://github.com/ros2-gbp/foo-release.git
+      version: 1.0.0-1
+    source:
+      type: git
+      url: https://github.com/ros/foo.git
+      version: main
+    status: developed
+type: distribution
+version: 2
+"""
+
+
+def _git(path, *args):
+    return subprocess.check_output(
+        ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-C', path] + list(args),
+        universal_newlines=True)
+
+
+@pytest.fixture
+def tmpdir_path(monkeypatch):
+    monkeypatch.setenv('ROSDISTRO_YAML_CACHE_DIR', '')
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def test_fingerprint_distribution():
+    data = yaml.safe_load(DISTRIBUTION_YAML)
+    tree = fingerprint_distribution(data)
+    assert set(tree['repositories']) == {'bar', 'foo'}
+    assert set(tree['repositories']['foo']['sections']) == {'release', 'source', 'status'}
+    assert set(tree['keys']) == {'release_platforms', 'type', 'version'}
+
+    # The fingerprints don't depend on the layout of the file
+    reformatted = yaml.safe_dump(data, default_flow_style=True)
+    assert fingerprint_content(reformatted.encode(), cache_dir=None) == tree
+    assert diff_fingerprints(tree, fingerprint_distribution(yaml.safe_load(reformatted))) == {}
+
+    data['repositories']['foo']['release']['version'] = '1.0.1-1'
+    data['repositories']['foo']['status'] = 'maintained'
+    del data['repositories']['bar']
+    data['repositories']['baz'] = {'source': {'type': 'git', 'url': 'https://github.com/ros/baz.git'}}
+    changed = fingerprint_distribution(data)
+    assert changed['hash'] != tree['hash']
+    assert changed['keys'] == tree['keys']
+    assert diff_fingerprints(tree, changed) == {
+        'bar': {'doc'}, 'baz': {'source'}, 'foo': {'release', 'status'}}
+
+
+def test_get_changed_repositories(tmpdir_path):
+    cache_dir = os.path.join(tmpdir_path, 'cache')
+    path = os.path.join(tmpdir_path, 'rolling', 'distribution.yaml')
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(DISTRIBUTION_YAML)
+    _git(tmpdir_path, 'init', '-q')
+    _git(tmpdir_path, 'add', 'rolling')
+    _git(tmpdir_path, 'commit', '-q', '-m', 'base')
+
+    def changes(ref='HEAD', path='rolling/distribution.yaml'):
+        return get_changed_repositories(ref, path, basedir=tmpdir_path, cache_dir=cache_dir)
+
+    assert changes() == {}
+    assert changes(path='humble/distribution.yaml') is None
+    # The trees are cached by the content of the files
+    assert len(os.listdir(cache_dir)) == 1
+    with open(os.path.join(cache_dir, os.listdir(cache_dir)[0])) as f:
+        assert json.load(f)['version'] == 1
+
+    with open(path, 'w') as f:
+        f.write(DISTRIBUTION_YAML.replace('packages: [foo, foo_msgs]', 'packages:\n      - foo\n      - foo_msgs'))
+    assert changes() == {}
+    with open(path, 'w') as f:
+        f.write(DISTRIBUTION_YAML.replace('version: main\n  foo:', 'version: rolling\n  foo:'))
+    assert changes() == {'bar': {'doc'}}
+    assert len(os.listdir(cache_dir)) == 3
@@ -30,9 +30,53 @@
 from __future__ import print_function
 
 import argparse
+import hashlib
+import json
+import math
 import os
 import sys
-from github import Github, UnknownObjectException
+import tempfile
+import threading
+import time
+from github import Github, GithubException, UnknownObjectException
+
+DEFAULT_BASE_URL = 'https://api.github.com'
+DEFAULT_CALLBACK_URL = 'http://build.ros.org/ghprbhook/'
+DEFAULT_HOOK_USER = 'ros-pull-request-builder'
+
+# Bump to invalidate the cache files when the format of the entries changes
+CACHE_VERSION = 1
+
+# The number of seconds a passed check is reused for by default
+DEFAULT_TTL = 24 * 3600
+
+# The number of items requested per page of a listing
+PER_PAGE = 100
+
+
+def get_default_base_url():
+    """Get the URL of the GitHub API, which can be set with ROSGHPRB_API_URL."""
+    return os.environ.get('ROSGHPRB_API_URL') or DEFAULT_BASE_URL
+
+
+def get_default_cache_dir():
+    """
+    Get the directory used to share passed checks between runs.
+
+    The directory can be set with ROSGHPRB_CACHE_DIR, and setting it to an
+    empty string disables the on-disk cache.
+    """
+    cache_dir = os.environ.get('ROSGHPRB_CACHE_DIR')
+    if cache_dir is not None:
+        return cache_dir or None
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'rosdistro', 'hooks')
+
+
+def get_default_ttl():
+    """Get the TTL of passed checks, which can be set with ROSGHPRB_CACHE_TTL."""
+    return float(os.environ.get('ROSGHPRB_CACHE_TTL', DEFAULT_TTL))
 
 
 def detect_repo_hook(repo, cb_url):
@@ -43,30 +87,131 @@ def detect_repo_hook(repo, cb_url):
 
 
 class GHPRBHookDetector(object):
-    def __init__(self, github_user, github_token, callback_url):
+    """
+    Check the access of the pull request builder to GitHub repositories.
+
+    The repositories of an organization can be queried together with
+    prefetch(), and the checks which passed are shared with other runs
+    through files in the cache directory until they are older than the TTL.
+    The client reuses a single connection, so the requests of concurrent
+    checks are serialized.
+    """
+
+    def __init__(self, github_user, github_token, callback_url, base_url=None, cache_dir=False, ttl=None):
+        """
+        :param base_url: the URL of the GitHub API, or None to use the default.
+        :param cache_dir: the directory of the on-disk cache, None to disable
+          it, or False to use the default directory.
+        :param ttl: the number of seconds passed checks are reused for, or
+          None to use the default TTL.
+        """
+        self.github_user = github_user
         self.callback_url = callback_url
-        self.gh = Github(github_user, github_token)
+        self.base_url = base_url or get_default_base_url()
+        self.cache_dir = get_default_cache_dir() if cache_dir is False else cache_dir
+        self.ttl = get_default_ttl() if ttl is None else ttl
+        self.gh = Github(github_user, github_token, base_url=self.base_url, per_page=PER_PAGE)
+        self._lock = threading.RLock()
+        # The prefetched repositories and whether their organization has the
+        # hook, keyed by lower-case names
+        self._repos = {}
+        self._org_hooks = {}
 
-    def get_repo(self, username, reponame):
+    def _cache_path(self, full_name, strict):
+        key = json.dumps([self.base_url, self.github_user, self.callback_url, strict, full_name.lower()])
+        return key, os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def is_cached(self, full_name, strict=False):
+        """Check if the check of a repository has passed within the TTL."""
+        if not self.cache_dir:
+            return False
+        key, cache_path = self._cache_path(full_name, strict)
         try:
-            repo = self.gh.get_user(username).get_repo(reponame)
-        except UnknownObjectException as ex:
-            print(
-                'Failed to access repo [ %s/%s ] Reason %s'
-                % (username, reponame, ex),
-                file=sys.stderr
-                )
-            return None
+            with open(cache_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return data.get('version') == CACHE_VERSION and data.get('key') == key and \
+            time.time() - data['time'] < self.ttl
+
+    def store_passed(self, full_name, strict=False):
+        """Record that the check of a repository has passed."""
+        if not self.cache_dir:
+            return
+        key, cache_path = self._cache_path(full_name, strict)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'key': key, 'time': time.time()}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print("WARNING: Failed to write hook cache '%s': %s" % (cache_path, e), file=sys.stderr)
+
+    def prefetch(self, full_names, strict=False):
+        """
+        Query the repositories of organizations in bulk.
+
+        For each organization with several repositories to check, the
+        permissions of all of its repositories are listed at once if that
+        takes fewer requests than querying them one by one, and the hooks of
+        the organization are checked, which cover all of its repositories.
+        Repositories whose check is cached are skipped.
+
+        :param full_names: the 'owner/name' of the repositories.
+        """
+        owners = {}
+        for full_name in full_names:
+            if not self.is_cached(full_name, strict):
+                owner = full_name.split('/', 1)[0].lower()
+                owners.setdefault(owner, set()).add(full_name.lower())
+        with self._lock:
+            for owner, names in sorted(owners.items()):
+                if len(names) < 2 or owner in self._org_hooks:
+                    continue
+                # The repositories are still checked one by one if the
+                # owner is a user rather than an organization, or the
+                # requests fail, e.g. because listing the hooks of an
+                # organization requires admin access to it
+                self._org_hooks[owner] = False
+                org = self.gh.get_organization(owner)
+                try:
+                    count = org.public_repos + (org.total_private_repos or 0)
+                    if math.ceil(count / PER_PAGE) < len(names):
+                        for repo in org.get_repos():
+                            if repo.full_name.lower() in names:
+                                self._repos[repo.full_name.lower()] = repo
+                    self._org_hooks[owner] = detect_repo_hook(org, self.callback_url)
+                except GithubException:
+                    pass
+
+    def get_repo(self, username, reponame):
+        full_name = '%s/%s' % (username, reponame)
+        with self._lock:
+            repo = self._repos.get(full_name.lower())
+            if repo is not None:
+                return repo
+            try:
+                repo = self.gh.get_repo(full_name)
+            except UnknownObjectException as ex:
+                print(
+                    'Failed to access repo [ %s/%s ] Reason %s'
+                    % (username, reponame, ex),
+                    file=sys.stderr
+                    )
+                return None
         return repo
 
     def check_repo_for_access(self, repo, errors, strict=False):
-        push_access = repo.permissions.push
-        admin_access = repo.permissions.admin
-        try:
-            hook_detected = detect_repo_hook(repo, self.callback_url)
-        except UnknownObjectException as ex:
-            errors.append('Unable to check repo [ %s ] for hooks: Error: %s' % (repo.full_name, ex))
-            hook_detected = False
+        with self._lock:
+            push_access = repo.permissions.push
+            admin_access = repo.permissions.admin
+            hook_detected = self._org_hooks.get(repo.full_name.split('/', 1)[0].lower())
+            try:
+                hook_detected = hook_detected or detect_repo_hook(repo, self.callback_url)
+            except UnknownObjectException as ex:
+                errors.append('Unable to check repo [ %s ] for hooks: Error: %s' % (repo.full_name, ex))
+                hook_detected = False
         if push_access and hook_detected or admin_access:
             return True
         if push_access and not hook_detected:
@@ -87,14 +232,46 @@ class GHPRBHookDetector(object):
                 return True
 
 
-def check_hooks_on_repo(user, repo, errors, hook_user='ros-pull-request-builder',
-        callback_url='http://build.ros.org/ghprbhook/', token=None, strict=False):
-    ghprb_detector = GHPRBHookDetector(hook_user, token, callback_url)
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_hook_detector(hook_user=DEFAULT_HOOK_USER, callback_url=DEFAULT_CALLBACK_URL, token=None, base_url=None):
+    """Get the hook detector shared by everything in this process for some credentials."""
+    key = (hook_user, callback_url, token, base_url or get_default_base_url())
+    with _detectors_lock:
+        if key not in _detectors:
+            _detectors[key] = GHPRBHookDetector(hook_user, token, callback_url, base_url=key[3])
+        return _detectors[key]
+
+
+def prefetch_hooks(full_names, hook_user=DEFAULT_HOOK_USER, callback_url=DEFAULT_CALLBACK_URL,
+        token=None, strict=False, base_url=None):
+    """
+    Query the repositories which are about to be checked in bulk.
+
+    :param full_names: the 'owner/name' of the repositories.
+    """
+    ghprb_detector = get_hook_detector(hook_user, callback_url, token, base_url)
+    ghprb_detector.prefetch(full_names, strict=strict)
+
+
+def check_hooks_on_repo(user, repo, errors, hook_user=DEFAULT_HOOK_USER,
+        callback_url=DEFAULT_CALLBACK_URL, token=None, strict=False, base_url=None):
+    ghprb_detector = get_hook_detector(hook_user, callback_url, token, base_url)
+    full_name = '%s/%s' % (user, repo)
+    if ghprb_detector.is_cached(full_name, strict):
+        print('Passed ghprb_detector check for hooks access'
+              ' for repo [ %s ] (cached)' % full_name)
+        return True
     test_repo = ghprb_detector.get_repo(user, repo)
 
     if test_repo:
+        num_errors = len(errors)
         hooks_ok = ghprb_detector.check_repo_for_access(test_repo, errors, strict=strict)
         if hooks_ok:
+            if len(errors) == num_errors:
+                ghprb_detector.store_passed(full_name, strict)
             print('Passed ghprb_detector check for hooks access'
                   ' for repo [ %s ]' % test_repo.full_name)
             return True
@@ -121,9 +298,11 @@ def main():
     parser.add_argument('user', type=str)
     parser.add_argument('repo', type=str)
     parser.add_argument('--callback-url', type=str,
-        default='http://build.ros.org/ghprbhook/')
+        default=DEFAULT_CALLBACK_URL)
     parser.add_argument('--hook-user', type=str,
-        default='ros-pull-request-builder')
+        default=DEFAULT_HOOK_USER)
+    parser.add_argument('--api-url', type=str,
+        help='the URL of the GitHub API (default: %s)' % DEFAULT_BASE_URL)
     parser.add_argument('--password-env', type=str,
         default='ROSGHPRB_TOKEN')
 
@@ -141,7 +320,8 @@ def main():
         errors,
         args.hook_user,
         args.callback_url,
-        password)
+        password,
+        base_url=args.api_url)
     if errors:
         print('Errors detected:', file=sys.stderr)
     for e in errors:
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import json
+import shutil
+import tempfile
+import threading
+
+import pytest
+
+from .hook_permissions import check_hooks_on_repo
+from .hook_permissions import GHPRBHookDetector
+from .hook_permissions import prefetch_hooks
+
+CALLBACK_URL = 'http://build.example.com/ghprbhook/'
+
+
+class _GitHubHandler(BaseHTTPRequestHandler):
+    """Serve the few endpoints of the GitHub API which are used."""
+
+    def do_GET(self):
+        path = self.path.partition('?')[0]
+        self.server.requests.append(path)
+        data = self.server.routes.get(path)
+        body = json.dumps(data if data is not None else {'message': 'Not Found'}).encode()
+        self.send_response(200 if data is not None else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _repo(server, full_name, push=False, admin=False, hooks=()):
+    url = '%s/repos/%s' % (server.url, full_name)
+    server.routes['/repos/%s/hooks' % full_name] = [{'config': {'url': u}} for u in hooks]
+    data = {
+        'full_name': full_name,
+        'name': full_name.split('/')[1],
+        'url': url,
+        'permissions': {'admin': admin, 'push': push, 'pull': True},
+    }
+    server.routes['/repos/%s' % full_name] = data
+    return data
+
+
+def _org(server, name, repos, hooks=(), public_repos=None):
+    server.routes['/orgs/%s' % name] = {
+        'login': name,
+        'url': '%s/orgs/%s' % (server.url, name),
+        'public_repos': len(repos) if public_repos is None else public_repos,
+        'total_private_repos': 0,
+    }
+    server.routes['/orgs/%s/repos' % name] = repos
+    server.routes['/orgs/%s/hooks' % name] = [{'config': {'url': u}} for u in hooks]
+
+
+@pytest.fixture
+def github():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GitHubHandler)
+    server.routes = {}
+    server.requests = []
+    server.url = 'http://127.0.0.1:%d' % server.server_port
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def cache_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def test_prefetch_organization(github, cache_dir):
+    _org(github, 'ros', [
+        _repo(github, 'ros/a', push=True),
+        _repo(github, 'ros/b', admin=True),
+        _repo(github, 'ros/c', push=True),
+    ], hooks=[CALLBACK_URL])
+    _org(github, 'big', [], public_repos=1000)
+    _repo(github, 'big/a', push=True, hooks=[CALLBACK_URL])
+    _repo(github, 'big/b', admin=True)
+    _repo(github, 'alice/single', push=True, hooks=[CALLBACK_URL])
+    full_names = ['ros/a', 'ros/b', 'ros/c', 'big/a', 'big/b', 'alice/single']
+
+    detector = GHPRBHookDetector('user', 'token', CALLBACK_URL, base_url=github.url, cache_dir=cache_dir)
+    detector.prefetch(full_names)
+    # The repositories of small organizations are listed at once
+    assert github.requests == [
+        '/orgs/big', '/orgs/big/hooks', '/orgs/ros', '/orgs/ros/repos', '/orgs/ros/hooks']
+
+    del github.requests[:]
+    for full_name in full_names:
+        errors = []
+        repo = detector.get_repo(*full_name.split('/'))
+        assert detector.check_repo_for_access(repo, errors)
+        assert not errors
+    # The hook of the organization covers all of its repositories
+    assert github.requests == [
+        '/repos/big/a', '/repos/big/a/hooks', '/repos/big/b', '/repos/big/b/hooks',
+        '/repos/alice/single', '/repos/alice/single/hooks']
+
+
+def test_check_hooks_on_repo(github, cache_dir, monkeypatch):
+    monkeypatch.setenv('ROSGHPRB_CACHE_DIR', cache_dir)
+    _org(github, 'ros', [
+        _repo(github, 'ros/a', push=True),
+        _repo(github, 'ros/b', push=True, hooks=[CALLBACK_URL]),
+        _repo(github, 'ros/readonly'),
+    ])
+
+    def check(full_name, **kwargs):
+        errors = []
+        result = check_hooks_on_repo(
+            *full_name.split('/'), errors, callback_url=CALLBACK_URL, token='token',
+            base_url=github.url, **kwargs)
+        return bool(result), errors
+
+    prefetch_hooks(['ros/a', 'ros/b', 'ros/readonly'], callback_url=CALLBACK_URL, token='token', base_url=github.url)
+    assert check('ros/b') == (True, [])
+    assert check('ros/a', strict=True) == (False, [])
+    assert check('ros/a')[0]
+    assert check('ros/readonly') == (False, [])
+    assert check('ros/missing') == (False, [])
+
+    # Only the checks which passed cleanly are reused, also by other runs
+    del github.requests[:]
+    assert check('ros/b') == (True, [])
+    assert not github.requests
+    detector = GHPRBHookDetector('ros-pull-request-builder', 'token', CALLBACK_URL, base_url=github.url)
+    assert detector.is_cached('ros/B')
+    assert not detector.is_cached('ros/a')
+    assert not detector.is_cached('ros/b', strict=True)
+    assert not GHPRBHookDetector(
+        'ros-pull-request-builder', 'token', CALLBACK_URL, base_url=github.url, ttl=0).is_cached('ros/b')
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+
+import functools
+from http.server import BaseHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import pytest
+
+from scripts.remote_refs import is_commit_on_branch
+from scripts.remote_refs import ls_refs
+from scripts.remote_refs import normalize_url
+from scripts.remote_refs import RefCache
+from scripts.remote_refs import UnsupportedProtocolError
+
+
+def _git(path, *args):
+    return subprocess.check_output(
+        ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-C', path] + list(args),
+        universal_newlines=True)
+
+
+@pytest.fixture
+def tmpdir_path():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+@pytest.fixture
+def remote(tmpdir_path):
+    path = os.path.join(tmpdir_path, 'remote')
+    os.mkdir(path)
+    _git(path, 'init', '-q', '-b', 'main')
+    _git(path, 'commit', '-q', '--allow-empty', '-m', 'first')
+    _git(path, 'tag', '-a', '-m', 'release', '1.0.0')
+    return path
+
+
+class _GitHttpBackendHandler(BaseHTTPRequestHandler):
+    """Serve the repositories in the project root with 'git http-backend'."""
+
+    def do_GET(self):
+        self._run_backend()
+
+    def do_POST(self):
+        self._run_backend()
+
+    def _run_backend(self):
+        path, _, query = self.path.partition('?')
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        env = dict(
+            os.environ,
+            GIT_PROJECT_ROOT=self.server.project_root,
+            GIT_HTTP_EXPORT_ALL='1',
+            REQUEST_METHOD=self.command,
+            PATH_INFO=path,
+            QUERY_STRING=query,
+            CONTENT_TYPE=self.headers.get('Content-Type', ''),
+            CONTENT_LENGTH=str(len(body)),
+            REMOTE_ADDR='127.0.0.1')
+        if self.headers.get('Git-Protocol') and self.server.protocol_v2:
+            env['GIT_PROTOCOL'] = self.headers['Git-Protocol']
+        output = subprocess.run(
+            ['git', 'http-backend'], input=body, env=env,
+            stdout=subprocess.PIPE, check=True).stdout
+        head, payload = re.split(b'\r?\n\r?\n', output, 1)
+        status = 200
+        headers = []
+        for line in head.decode().splitlines():
+            name, value = line.split(':', 1)
+            if name.lower() == 'status':
+                status = int(value.split()[0])
+            else:
+                headers.append((name, value.strip()))
+        self.server.requests.append((self.command, self.path, len(body), len(payload)))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_backend(tmpdir_path, remote):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GitHttpBackendHandler)
+    server.project_root = tmpdir_path
+    server.protocol_v2 = True
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    server.url = 'http://127.0.0.1:%d/%s' % (server.server_port, os.path.basename(remote))
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class _StaticHandler(SimpleHTTPRequestHandler):
+    """Serve files like a dumb HTTP server, or an HTML page for any other path."""
+
+    def send_head(self):
+        self.server.requests.append(self.path)
+        if os.path.exists(self.translate_path(self.path)):
+            return super().send_head()
+        body = b'<html><body>Please log in</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def dumb_http(tmpdir_path, remote):
+    _git(remote, 'update-server-info')
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0), functools.partial(_StaticHandler, directory=tmpdir_path))
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    server.url = 'http://127.0.0.1:%d/%s/.git' % (server.server_port, os.path.basename(remote))
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_normalize_url():
+    assert normalize_url('https://GitHub.com/ros/rosdistro.git') == 'https://github.com/ros/rosdistro'
+    assert normalize_url('https://github.com/ros/rosdistro/') == 'https://github.com/ros/rosdistro'
+    assert normalize_url('git@github.com:ros/rosdistro.git') == 'git@github.com:ros/rosdistro'
+
+
+def test_ref_cache(tmpdir_path, remote):
+    cache_dir = os.path.join(tmpdir_path, 'cache')
+    cache = RefCache(cache_dir=cache_dir, ttl=60)
+    refs = cache.get_refs('file://' + remote)
+    head = _git(remote, 'rev-parse', 'HEAD').strip()
+    assert refs['HEAD'] == refs['refs/heads/main'] == refs['refs/tags/1.0.0^{}'] == head
+    assert 'refs/tags/1.0.0' in refs
+
+    # The refs are reused for other spellings of the URL, by other
+    # processes and until they expire
+    _git(remote, 'branch', 'feature')
+    assert cache.get_refs('file://' + remote + '.git/') == refs
+    assert RefCache(cache_dir=cache_dir, ttl=60).get_refs('file://' + remote) == refs
+    assert 'refs/heads/feature' in RefCache(cache_dir=cache_dir, ttl=0).get_refs('file://' + remote)
+
+
+def test_ref_cache_failure(tmpdir_path):
+    cache_dir = os.path.join(tmpdir_path, 'cache')
+    cache = RefCache(cache_dir=cache_dir, ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.get_refs('file://' + os.path.join(tmpdir_path, 'missing'))
+    # Failures aren't shared with other processes
+    assert not os.path.exists(cache_dir)
+
+
+def test_is_commit_on_branch(remote, tmpdir_path):
+    first = _git(remote, 'rev-parse', 'HEAD').strip()
+    _git(remote, 'commit', '-q', '--allow-empty', '-m', 'second')
+    _git(remote, 'branch', 'feature')
+    _git(remote, 'commit', '-q', '--allow-empty', '-m', 'third')
+    third = _git(remote, 'rev-parse', 'HEAD').strip()
+    _git(remote, 'checkout', '-q', '--detach')
+    _git(remote, 'commit', '-q', '--allow-empty', '-m', 'detached')
+    detached = _git(remote, 'rev-parse', 'HEAD').strip()
+    _git(remote, 'tag', 'detached')
+    _git(remote, 'config', 'uploadpack.allowFilter', 'true')
+
+    url = 'file://' + remote
+    assert is_commit_on_branch(url, first)
+    assert is_commit_on_branch(url, third)
+    assert not is_commit_on_branch(url, detached)
+    assert not is_commit_on_branch(url, '0' * 40)
+    assert is_commit_on_branch(url, first, branch='feature')
+    assert is_commit_on_branch(url, third, branch='main')
+    assert not is_commit_on_branch(url, third, branch='feature')
+
+    with pytest.raises(RuntimeError):
+        is_commit_on_branch('file://' + os.path.join(tmpdir_path, 'missing'), first)
+
+
+def test_is_commit_on_branch_without_sha_wants(remote, monkeypatch):
+    first = _git(remote, 'rev-parse', 'HEAD').strip()
+    _git(remote, 'commit', '-q', '--allow-empty', '-m', 'second')
+    second = _git(remote, 'rev-parse', 'HEAD').strip()
+    _git(remote, 'commit', '-q', '--allow-empty', '-m', 'third')
+    _git(remote, 'config', 'uploadpack.allowReachableSHA1InWant', 'false')
+    _git(remote, 'config', 'uploadpack.allowAnySHA1InWant', 'false')
+    # protocol v0 servers only allow wanting the objects of advertised refs
+    monkeypatch.setenv('GIT_CONFIG_COUNT', '1')
+    monkeypatch.setenv('GIT_CONFIG_KEY_0', 'protocol.version')
+    monkeypatch.setenv('GIT_CONFIG_VALUE_0', '0')
+
+    url = 'file://' + remote
+    assert is_commit_on_branch(url, second, branch='main')
+    assert is_commit_on_branch(url, first)
+    assert not is_commit_on_branch(url, '0' * 40)
+
+
+def test_ls_refs(remote, http_backend):
+    head = _git(remote, 'rev-parse', 'HEAD').strip()
+    refs = ['refs/heads/feature-%d' % i for i in range(500)] + ['refs/tags/0.%d.0' % i for i in range(500)]
+    # refs which only share a prefix with the version being looked up
+    refs += ['refs/heads/main-old', 'refs/tags/1.0.0-rc1']
+    subprocess.run(
+        ['git', '-C', remote, 'update-ref', '--stdin'], check=True, universal_newlines=True,
+        input=''.join('create %s %s\n' % (ref, head) for ref in refs))
+    tag = _git(remote, 'rev-parse', '1.0.0').strip()
+
+    refs = ls_refs(http_backend.url, ['refs/heads/main', 'refs/tags/main'])
+    assert refs == {'refs/heads/main': head}
+    refs = ls_refs(http_backend.url, ['refs/heads/1.0.0', 'refs/tags/1.0.0'])
+    assert refs == {'refs/tags/1.0.0': tag, 'refs/tags/1.0.0^{}': head}
+    assert ls_refs(http_backend.url, ['refs/heads/missing']) == {}
+    # a capability advertisement and a small response for each lookup
+    assert [r[0] for r in http_backend.requests] == ['GET', 'POST'] * 3
+    assert all(r[3] < 1000 for r in http_backend.requests)
+
+    with pytest.raises(RuntimeError):
+        ls_refs(http_backend.url + '-missing', ['HEAD'])
+
+
+def test_get_version_refs(remote, http_backend):
+    head = _git(remote, 'rev-parse', 'HEAD').strip()
+    cache = RefCache(cache_dir=None, ttl=60)
+    assert cache.get_version_refs(http_backend.url, 'main') == {'refs/heads/main': head}
+    assert cache.get_version_refs(http_backend.url, 'main') == {'refs/heads/main': head}
+    assert cache.get_version_refs(http_backend.url, None) == {'HEAD': head}
+    assert len(http_backend.requests) == 4
+
+    # servers without protocol v2 fall back to listing all of the refs
+    http_backend.protocol_v2 = False
+    with pytest.raises(UnsupportedProtocolError):
+        ls_refs(http_backend.url, ['refs/heads/main'])
+    cache = RefCache(cache_dir=None, ttl=60)
+    assert cache.get_version_refs(http_backend.url, '1.0.0') == {
+        'refs/tags/1.0.0': _git(remote, 'rev-parse', '1.0.0').strip(),
+        'refs/tags/1.0.0^{}': head}
+    assert cache.get_version_refs(http_backend.url, 'missing') == {}
+
+
+def test_get_version_refs_dumb_http(remote, dumb_http):
+    head = _git(remote, 'rev-parse', 'HEAD').strip()
+    # neither the refs of a dumb server nor an HTML page are pkt-lines
+    with pytest.raises(UnsupportedProtocolError):
+        ls_refs(dumb_http.url, ['refs/heads/main'])
+    with pytest.raises(UnsupportedProtocolError):
+        ls_refs(dumb_http.url + '/proxy', ['refs/heads/main'])
+
+    # so the refs are listed with git instead
+    del dumb_http.requests[:]
+    cache = RefCache(cache_dir=None, ttl=60)
+    assert cache.get_version_refs(dumb_http.url, 'main') == {'refs/heads/main': head}
+    assert dumb_http.requests[0] == '/remote/.git/info/refs?service=git-upload-pack'
+    assert len(dumb_http.requests) > 1
@@ -2,7 +2,7 @@
 
 import os
 
-from scripts.check_rosdep import main as check_rosdep
+from scripts.check_rosdep import check_files
 
 from .fold_block import Fold
 
@@ -12,13 +12,14 @@ def test():
 
     with Fold() as fold:
         print("""Running 'scripts/check_rosdep.py' on all '*.yaml' in the 'rosdep' directory.
-If this fails you can run 'scripts/clean_rosdep_yaml.py' to help cleanup.
+If this fails you can run 'scripts/clean_rosdep_yaml.py rosdep' to fix the formatting in place.
 """)
 
+        fnames = []
         for f in sorted(files):
             fname = os.path.join('rosdep', f)
             if not f.endswith('.yaml'):
                 print("Skipping rosdep check of file %s" % fname)
                 continue
-            print("Checking rosdep file: %s" % fname)
-            assert check_rosdep(fname), fold.get_message()
+            fnames.append(fname)
+        assert check_files(fnames), fold.get_message()
@@ -26,10 +26,15 @@
 # POSSIBILITY OF SUCH DAMAGE.
 
 from gzip import GzipFile
+import io
 from lzma import LZMAFile
 import socket
 import sys
 import time
+try:
+    import brotli
+except ImportError:
+    brotli = None
 try:
     from urllib.error import HTTPError
     from urllib.error import URLError
@@ -53,8 +58,8 @@ def is_probably_gzip(response):
     :param response: the urllib response
     """
     return (response.url.endswith('.gz') or
-            response.getheader('Content-Encoding') == 'gzip' or
-            response.getheader('Content-Type') == 'application/x-gzip')
+            response.headers.get('Content-Encoding') == 'gzip' or
+            response.headers.get('Content-Type') == 'application/x-gzip')
 
 
 def is_probably_lzma(response):
@@ -64,8 +69,51 @@ def is_probably_lzma(response):
     :param response: the urllib response
     """
     return (response.url.endswith('.xz') or
-            response.getheader('Content-Encoding') == 'xz' or
-            response.getheader('Content-Type') == 'application/x-xz')
+            response.headers.get('Content-Encoding') == 'xz' or
+            response.headers.get('Content-Type') == 'application/x-xz')
+
+
+def is_probably_brotli(response):
+    """
+    Determine if a urllib response is likely brotli'd.
+
+    :param response: the urllib response
+    """
+    return (response.url.endswith('.br') or
+            response.headers.get('Content-Encoding') == 'br')
+
+
+class BrotliFile(io.RawIOBase):
+    """Read-only file-like object which decompresses a brotli stream."""
+
+    def __init__(self, fileobj, chunk_size=64 * 1024):
+        if brotli is None:
+            raise RuntimeError(
+                "The 'brotli' Python package is required to read brotli "
+                'compressed data')
+        self._fileobj = fileobj
+        self._chunk_size = chunk_size
+        self._decompressor = brotli.Decompressor()
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            chunk = self._fileobj.read(self._chunk_size)
+            if not chunk:
+                return 0
+            self._buffer = self._decompressor.process(chunk)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.close()
+        super().close()
 
 
 def open_gz_url(url, retry=2, retry_period=1, timeout=10):
@@ -104,6 +152,8 @@ def open_compressed_url(url, retry=2, retry_period=1, timeout=10):
         return GzipFile(fileobj=f, mode='rb')
     elif is_probably_lzma(f):
         return LZMAFile(f, mode='rb')
+    elif is_probably_brotli(f):
+        return io.BufferedReader(BrotliFile(f))
     return f
 
 
@@ -206,6 +256,21 @@ class RepositoryCacheCollection:
             self._cache[(os_name, os_code_name, os_arch)] = cache
         return cache
 
+    def find_package(self, pkg_name, os_name, os_code_name, os_arch):
+        """
+        Find a package by name in this repository collection for the given platform.
+
+        :param pkg_name: the name of the package to be found.
+        :param os_name: the name of the OS associated with the package.
+        :param os_code_name: the OS version associated with the package.
+        :param os_arch: the system architecture associated with the package.
+
+        :returns: the parsed package entry, or None if no package was found.
+        """
+        for p in self.enumerate_packages(os_name, os_code_name, os_arch):
+            if p == pkg_name:
+                return p
+
 
 def summarize_broken_packages(broken):
     """
@@ -230,6 +295,26 @@ def summarize_broken_packages(broken):
         for platform, pkg_msgs in sorted(grouped.items()))
 
 
+def summarize_missing_installer_packages(missing):
+    """
+    Create human-readable summary regarding packages missing from installers.
+
+    :param missing: tuples of installer, rosdep key and package name.
+
+    :returns: the human-readable summary.
+    """
+    grouped = {}
+
+    for installer, key, package in missing:
+        grouped.setdefault(installer, set()).add(
+            '- Package %s for rosdep key %s' % (package, key))
+
+    return '\n\n'.join(
+        '* The following %d packages were not found for %s:\n%s' % (
+            len(pkg_msgs), installer, '\n'.join(sorted(pkg_msgs)))
+        for installer, pkg_msgs in sorted(grouped.items()))
+
+
 def find_package(config, pkg_name, os_name, os_code_name, os_arch):
     """
     Find a package by name for the given platform.
@@ -255,9 +340,25 @@ def find_package(config, pkg_name, os_name, os_code_name, os_arch):
                 'WARNING: No sources for %s' % (fmt_os(os_name, os_code_name)),
                  file=sys.stderr)
         for source in sources:
-            for p in source.enumerate_packages(os_name, os_code_name, os_arch):
-                if p == pkg_name:
-                    return p
+            p = source.find_package(pkg_name, os_name, os_code_name, os_arch)
+            if p:
+                return p
+
+
+def find_installer_package(config, installer, pkg_name):
+    """
+    Find a package by name in the sources for a platform-independent installer.
+
+    :param config: the parsed YAML configuration.
+    :param installer: the name of the installer, e.g. 'pip'.
+    :param pkg_name: the name of the package to be found.
+
+    :returns: the parsed package entry, or None if no package was found.
+    """
+    for source in config.get('installer_sources', {}).get(installer, ()):
+        p = source.find_package(pkg_name)
+        if p:
+            return p
 
 
 def get_package_link(config, pkg, os_name, os_code_name, os_arch):
@@ -25,29 +25,136 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
 import os
 import sys
-import yaml
+
+from scripts.yaml_loader import load_yaml_file
 
 from . import summarize_broken_packages
+from . import summarize_missing_installer_packages
+from .config import get_default_opt_in
 from .config import load_config
+from .config import restrict_config
+from .verify import compile_config_rules
+from .verify import verify_installer_rules
 from .verify import verify_rules
 
 
-def main():
-    config = load_config()
+DEFAULT_ROSDEP_FILES = (
+    'rosdep/base.yaml', 'rosdep/osx-homebrew.yaml', 'rosdep/python.yaml')
+
+
+def read_key_file(path):
+    """Read rosdep key names or patterns from a file, one per line."""
+    with open(path) as f:
+        return [
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith('#')]
+
+
+def filter_keys(data, patterns):
+    """Retain only the rules whose key matches at least one glob pattern."""
+    if not patterns:
+        return data
+    return {
+        key: rules for key, rules in data.items()
+        if any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns)}
+
+
+def enumerate_platforms(config):
+    """Enumerate all (OS name, OS version, OS arch) tuples in the configuration."""
+    for os_name, os_versions in sorted(config['supported_versions'].items()):
+        for os_ver in os_versions:
+            for os_arch in config['supported_arches'][os_name]:
+                yield (os_name, os_ver, os_arch)
+
+
+def verify_platform(config, rules, os_name, os_ver, os_arch):
+    platform_config = restrict_config(config, [os_name], [os_ver], [os_arch])
+    return set(verify_rules(platform_config, rules))
+
+
+def main(argv=sys.argv[1:]):
+    parser = argparse.ArgumentParser(
+        prog='rosdep_repo_check',
+        description='Verify that rosdep rules resolve to packages in the '
+                    'repositories of the supported platforms')
+    parser.add_argument(
+        'rosdep_files', nargs='*', metavar='ROSDEP_FILE',
+        help='rosdep YAML files to verify, relative to the repository root '
+             '(default: %s)' % ' '.join(DEFAULT_ROSDEP_FILES))
+    parser.add_argument(
+        '--os', dest='os_names', action='append', metavar='OS_NAME',
+        help='only verify rules for the given OS (may be repeated)')
+    parser.add_argument(
+        '--os-version', dest='os_versions', action='append',
+        metavar='OS_VERSION',
+        help='only verify rules for the given OS version (may be repeated)')
+    parser.add_argument(
+        '--arch', dest='os_arches', action='append', metavar='OS_ARCH',
+        help='only verify rules for the given architecture (may be repeated)')
+    parser.add_argument(
+        '--key', dest='keys', action='append', default=[], metavar='PATTERN',
+        help='only verify rosdep keys matching the glob pattern '
+             '(may be repeated)')
+    parser.add_argument(
+        '--key-file', dest='key_files', action='append', default=[],
+        metavar='PATH',
+        help='only verify rosdep keys matching the names or glob patterns '
+             'listed in the file, one per line (may be repeated)')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='number of platforms to verify in parallel (default: 1)')
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error('--jobs must be a positive integer')
+
+    config = load_config(opt_in=get_default_opt_in() + list(args.os_names or ()))
+    unknown_os_names = set(args.os_names or ()).difference(
+        config['supported_versions'].keys())
+    if unknown_os_names:
+        parser.error('unsupported OS: %s' % ', '.join(sorted(unknown_os_names)))
+    config = restrict_config(
+        config, args.os_names, args.os_versions, args.os_arches)
+    platforms = list(enumerate_platforms(config))
+    if not platforms:
+        parser.error('no supported platform matches the given filters')
+
+    key_patterns = list(args.keys)
+    for key_file in args.key_files:
+        key_patterns.extend(read_key_file(key_file))
+
     broken = set()
+    missing = set()
 
     repo_root = os.path.join(os.path.dirname(__file__), '..', '..')
 
-    for path in ('rosdep/base.yaml', 'rosdep/python.yaml'):
-        print("Verify all rosdep keys in '%s'" % path)
-        with open(os.path.join(repo_root, path)) as f:
-            data = yaml.safe_load(f)
-        broken.update(verify_rules(config, data, data))
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        for path in args.rosdep_files or DEFAULT_ROSDEP_FILES:
+            print("Verify all rosdep keys in '%s'" % path)
+            data = load_yaml_file(os.path.join(repo_root, path))
+            rules = compile_config_rules(config, filter_keys(data, key_patterns))
+            if not rules:
+                continue
+            futures = [
+                executor.submit(verify_platform, config, rules, *platform)
+                for platform in platforms]
+            for future in futures:
+                broken.update(future.result())
+            for installer, _, _, key, package, _ in verify_installer_rules(
+                config, rules
+            ):
+                missing.add((installer, key, package))
 
     if broken:
         print(summarize_broken_packages(broken), file=sys.stderr)
+    if missing:
+        print(summarize_missing_installer_packages(missing), file=sys.stderr)
+    if broken or missing:
         return 1
 
 
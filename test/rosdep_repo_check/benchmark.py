@@ -0,0 +1,101 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import resource
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+# Register the YAML constructors for the repository sources
+from . import config  # noqa: F401
+
+
+def benchmark_source(source, os_name, os_code_name, os_arch, trace=False):
+    """
+    Enumerate all packages of a repository source and measure the cost.
+
+    :param source: the repository cache collection to enumerate.
+    :param os_name: the name of the OS associated with the packages.
+    :param os_code_name: the OS version associated with the packages.
+    :param os_arch: the system architecture associated with the packages.
+    :param trace: also trace the peak memory allocated by Python objects,
+      which is more precise than the peak RSS but slows down the enumeration.
+
+    :returns: a mapping of the measured values.
+    """
+    if trace:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    count = 0
+    for _ in source.enumerate_packages(os_name, os_code_name, os_arch):
+        count += 1
+    elapsed = time.perf_counter() - start
+    results = {
+        'packages': count,
+        'seconds': elapsed,
+        'packages_per_second': count / elapsed if elapsed else float('inf'),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_growth_mb':
+            (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024,
+    }
+    if trace:
+        results['peak_traced_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    return results
+
+
+def main(argv=sys.argv[1:]):
+    parser = argparse.ArgumentParser(
+        prog='rosdep_repo_check.benchmark',
+        description='Measure the time and memory needed to enumerate all '
+                    'packages of a repository source')
+    parser.add_argument(
+        'source',
+        help="the source as written in config.yaml, e.g. "
+             "'!nixpkgs_channel_url file:///tmp/packages.json.br'")
+    parser.add_argument('os_name')
+    parser.add_argument('os_code_name')
+    parser.add_argument('os_arch')
+    parser.add_argument(
+        '--trace', action='store_true',
+        help='trace the peak memory allocated by Python objects')
+    args = parser.parse_args(argv)
+
+    source = yaml.safe_load(args.source)
+    results = benchmark_source(
+        source, args.os_name, args.os_code_name, args.os_arch,
+        trace=args.trace)
+    for key, value in results.items():
+        print('%s: %s' % (key, round(value, 2) if isinstance(value, float) else value))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
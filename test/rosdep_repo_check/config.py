@@ -31,8 +31,13 @@ import yaml
 
 from .apk import apk_base_url
 from .deb import deb_base_url
+from .freebsd import freebsd_base_url
+from .gentoo import gentoo_snapshot_url
+from .homebrew import homebrew_formula_url
 from .layer_index import layer_index_url
+from .nixpkgs import nixpkgs_channel_url
 from .pacman import pacman_base_url
+from .pypi import pypi_simple_url
 from .rpm import rpm_base_url
 from .rpm import rpm_mirrorlist_url
 
@@ -51,15 +56,35 @@ def load_deb_base_url(loader, node):
     return deb_base_url(base_url, comp)
 
 
+def load_freebsd_base_url(loader, node):
+    return freebsd_base_url(node.value)
+
+
+def load_gentoo_snapshot_url(loader, node):
+    return gentoo_snapshot_url(node.value)
+
+
+def load_homebrew_formula_url(loader, node):
+    return homebrew_formula_url(node.value)
+
+
 def load_layer_index_url(loader, node):
     return layer_index_url(node.value)
 
 
+def load_nixpkgs_channel_url(loader, node):
+    return nixpkgs_channel_url(node.value)
+
+
 def load_pacman_base_url(loader, node):
     base_url, repo_name = node.value.rsplit(' ', 1)
     return pacman_base_url(base_url, repo_name)
 
 
+def load_pypi_simple_url(loader, node):
+    return pypi_simple_url(node.value)
+
+
 def load_rpm_base_url(loader, node):
     return rpm_base_url(node.value)
 
@@ -76,10 +101,20 @@ yaml.add_constructor(
     u'!apk_base_url', load_apk_base_url, Loader=yaml.SafeLoader)
 yaml.add_constructor(
     u'!deb_base_url', load_deb_base_url, Loader=yaml.SafeLoader)
+yaml.add_constructor(
+    u'!freebsd_base_url', load_freebsd_base_url, Loader=yaml.SafeLoader)
+yaml.add_constructor(
+    u'!gentoo_snapshot_url', load_gentoo_snapshot_url, Loader=yaml.SafeLoader)
+yaml.add_constructor(
+    u'!homebrew_formula_url', load_homebrew_formula_url, Loader=yaml.SafeLoader)
 yaml.add_constructor(
     u'!layer_index_url', load_layer_index_url, Loader=yaml.SafeLoader)
+yaml.add_constructor(
+    u'!nixpkgs_channel_url', load_nixpkgs_channel_url, Loader=yaml.SafeLoader)
 yaml.add_constructor(
     u'!pacman_base_url', load_pacman_base_url, Loader=yaml.SafeLoader)
+yaml.add_constructor(
+    u'!pypi_simple_url', load_pypi_simple_url, Loader=yaml.SafeLoader)
 yaml.add_constructor(
     u'!rpm_base_url', load_rpm_base_url, Loader=yaml.SafeLoader)
 yaml.add_constructor(
@@ -88,6 +123,70 @@ yaml.add_constructor(
     u'!regular_expression', load_regex, Loader=yaml.SafeLoader)
 
 
-def load_config(path=None):
+def get_default_opt_in():
+    """Get the names of the opt-in platforms listed in $ROSDEP_REPO_CHECK_OPT_IN."""
+    return [
+        os_name.strip()
+        for os_name in os.environ.get('ROSDEP_REPO_CHECK_OPT_IN', '').split(',')
+        if os_name.strip()]
+
+
+def load_config(path=None, opt_in=None):
+    """
+    Load the YAML configuration.
+
+    :param path: the path of the configuration, or None to use the default.
+    :param opt_in: the names of the platforms listed in 'opt_in_versions' to
+      check in addition to the 'supported_versions', or None to use those
+      listed in $ROSDEP_REPO_CHECK_OPT_IN.
+
+    :returns: the parsed configuration.
+    """
     with open(path or DEFAULT_CONFIG_PATH) as f:
-        return yaml.safe_load(f)
+        config = yaml.safe_load(f)
+    if opt_in is None:
+        opt_in = get_default_opt_in()
+    opt_in_versions = config.pop('opt_in_versions', None) or {}
+    config['supported_versions'] = dict(config['supported_versions'])
+    for os_name in opt_in:
+        if os_name in opt_in_versions:
+            config['supported_versions'][os_name] = opt_in_versions[os_name]
+    return config
+
+
+def restrict_config(config, os_names=None, os_versions=None, os_arches=None):
+    """
+    Create a copy of the configuration limited to a subset of the platforms.
+
+    Only the package sources for the remaining platforms are retained, so
+    repository indexes for the excluded platforms are never fetched.
+
+    :param config: the parsed YAML configuration.
+    :param os_names: OS names to retain, or None to retain all of them.
+    :param os_versions: OS versions to retain, or None to retain all of them.
+    :param os_arches: OS architectures to retain, or None to retain all of them.
+
+    :returns: the restricted configuration.
+    """
+    restricted = dict(config)
+    supported_versions = {}
+    supported_arches = {}
+    for os_name, versions in config['supported_versions'].items():
+        if os_names is not None and os_name not in os_names:
+            continue
+        versions = [
+            v for v in versions if os_versions is None or v in os_versions]
+        arches = [
+            a for a in config['supported_arches'].get(os_name, ())
+            if os_arches is None or a in os_arches]
+        if not versions or not arches:
+            continue
+        supported_versions[os_name] = versions
+        supported_arches[os_name] = arches
+    restricted['supported_versions'] = supported_versions
+    restricted['supported_arches'] = supported_arches
+    restricted['package_sources'] = {
+        os_name: sources
+        for os_name, sources in config['package_sources'].items()
+        if os_name in supported_versions}
+    return restricted
@@ -0,0 +1,133 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import tarfile
+
+from . import open_compressed_url
+from . import PackageEntry
+from . import RepositoryCacheCollection
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# rosdep rules use this name for components of the FreeBSD base system
+BUILTIN_PACKAGE_NAME = 'builtin'
+
+
+def replace_tokens(string, os_code_name, os_arch):
+    """Replace FreeBSD-specific tokens in the repository base URL."""
+    for key, value in {
+        '$arch': os_arch,
+        '$releasever': os_code_name,
+    }.items():
+        string = string.replace(key, value)
+    return string
+
+
+def open_packagesite(f):
+    """
+    Open the tarball of a packagesite.pkg file for streaming.
+
+    Recent repositories compress the tarball with zstd, which requires the
+    optional 'zstandard' Python package. Other compression methods are
+    detected by tarfile.
+    """
+    if f.peek(4)[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError(
+                "The 'zstandard' Python package is required to read zstd "
+                'compressed FreeBSD package repository metadata')
+        f = zstandard.ZstdDecompressor().stream_reader(f)
+        return tarfile.open(mode='r|', fileobj=f)
+    return tarfile.open(mode='r|*', fileobj=f)
+
+
+def enumerate_packagesite_entries(url):
+    """
+    Enumerate the package manifests in a packagesite.pkg file.
+
+    The manifests are stored in the 'packagesite.yaml' member of the tarball,
+    which contains one JSON object per line.
+
+    :param url: the URL of the packagesite.pkg file.
+
+    :returns: an enumeration of (name, version, origin, repopath) tuples.
+    """
+    with open_compressed_url(url) as f:
+        with open_packagesite(f) as tf:
+            for ti in tf:
+                if os.path.basename(ti.name) != 'packagesite.yaml':
+                    continue
+                for line in tf.extractfile(ti):
+                    if not line.strip():
+                        continue
+                    manifest = json.loads(line)
+                    yield (
+                        manifest['name'], manifest.get('version'),
+                        manifest.get('origin'), manifest.get('repopath'))
+                return
+    raise RuntimeError('packagesite.pkg url did not contain a packagesite.yaml file')
+
+
+def enumerate_freebsd_packages(base_url, os_code_name, os_arch):
+    """
+    Enumerate packages in a FreeBSD pkg repository.
+
+    :param base_url: the pkg repository base URL.
+    :param os_code_name: the FreeBSD major version associated with the
+      repository.
+    :param os_arch: the system architecture associated with the repository.
+
+    :returns: an enumeration of package entries.
+    """
+    base_url = replace_tokens(base_url, os_code_name, os_arch)
+    packagesite_url = os.path.join(base_url, 'packagesite.pkg')
+    print('Reading FreeBSD package metadata from ' + packagesite_url)
+    yield PackageEntry(BUILTIN_PACKAGE_NAME, None, base_url)
+    for name, version, origin, repopath in enumerate_packagesite_entries(packagesite_url):
+        pkg_url = os.path.join(base_url, repopath) if repopath else base_url
+        yield PackageEntry(name, version, pkg_url, source_name=origin)
+
+
+def freebsd_base_url(base_url):
+    """
+    Create an enumerable cache for a FreeBSD pkg repository.
+
+    :param base_url: the URL of the pkg repository.
+
+    :returns: an enumerable repository cache instance.
+    """
+    return RepositoryCacheCollection(
+        lambda os_name, os_code_name, os_arch:
+            enumerate_freebsd_packages(base_url, os_code_name, os_arch))
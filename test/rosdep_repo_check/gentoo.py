@@ -0,0 +1,291 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+import tarfile
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from . import open_compressed_url
+from . import PackageEntry
+from . import RepositoryCacheCollection
+
+
+MD5_CACHE_PATH = 'metadata/md5-cache'
+
+# ${PN}-${PV}[-r${PR}] as described in the Package Manager Specification
+_VERSION_PATTERN = re.compile(
+    r'-(\d+(?:\.\d+)*[a-z]?(?:_(?:alpha|beta|pre|rc|p)\d*)*(?:-r\d+)?)$')
+
+# category/package[:SLOT][[flag,...]] as used in rosdep rules
+_ATOM_PATTERN = re.compile(r'^([^/:\[\]\s]+/[^/:\[\]\s]+)(?::([^:\[\]\s]+))?(?:\[([^\[\]]*)\])?$')
+
+
+def split_package_version(name):
+    """
+    Split the name of an md5-cache entry into the package name and version.
+
+    :param name: the file name of the entry, e.g. 'ace-8.0.1-r1'.
+
+    :returns: a tuple of the package name and version, or None if the name
+      does not contain a valid version.
+    """
+    match = _VERSION_PATTERN.search(name)
+    if not match or not match.start():
+        return None
+    return name[:match.start()], match.group(1)
+
+
+def parse_md5_cache_entry(data):
+    """
+    Parse the metadata fields needed to identify a package atom.
+
+    :param data: the raw contents of an md5-cache entry.
+
+    :returns: a tuple of the KEYWORDS, SLOT and IUSE values.
+    """
+    keywords = slot = iuse = ''
+    for line in data.decode('utf-8', 'replace').splitlines():
+        if line.startswith('KEYWORDS='):
+            keywords = line[9:]
+        elif line.startswith('SLOT='):
+            slot = line[5:]
+        elif line.startswith('IUSE='):
+            iuse = line[5:]
+    return keywords, slot, iuse
+
+
+def split_atom(atom):
+    """
+    Split a package atom used in a rosdep rule into its parts.
+
+    :param atom: the atom, e.g. 'media-libs/gst-plugins-base:1.0[X,pango]'.
+
+    :returns: a tuple of the 'category/package' name, the slot or None, and
+      a frozenset of the USE flags, or None if the atom can't be parsed.
+    """
+    match = _ATOM_PATTERN.match(atom)
+    if not match:
+        return None
+    package, slot, flags = match.groups()
+    if slot is not None:
+        slot = slot.split('/', 1)[0]
+    return package, slot, frozenset(
+        f.strip() for f in (flags or '').split(',') if f.strip())
+
+
+class GentooPackageEntry(PackageEntry):
+    """A package in a Gentoo ebuild repository along with its slots and USE flags."""
+
+    __slots__ = ('variants',)
+
+    def __new__(cls, name, version, url, variants):
+        obj = super().__new__(
+            cls, name, version, url, source_name=name, binary_name=name)
+        obj.variants = variants
+        return obj
+
+    def provides(self, slot, flags):
+        """
+        Determine if an ebuild of the package has the given slot and USE flags.
+
+        :param slot: the slot, or None to accept any slot.
+        :param flags: the USE flags which must all be in the IUSE of the
+          same ebuild.
+        """
+        return any(
+            (slot is None or slot == variant_slot) and flags <= iuse
+            for variant_slot, iuse in self.variants)
+
+
+def parse_category(category, entries, os_arch):
+    """
+    Determine the packages provided by the md5-cache entries of a category.
+
+    The slots and USE flags of each ebuild are kept, so that atoms like
+    'dev-db/sqlite:3' and 'media-libs/gst-plugins-base:1.0[X,pango]' can be
+    matched against the package.
+
+    :param category: the name of the category.
+    :param entries: a sequence of (file name, contents) tuples.
+    :param os_arch: only consider ebuilds which are keyworded for this
+      architecture, or an empty string to consider all ebuilds.
+
+    :returns: a list of ('category/package', version, variants) tuples, where
+      the variants are a tuple of the (slot, frozenset of IUSE flags) of the
+      ebuilds of the package.
+    """
+    packages = {}
+    for name, data in entries:
+        split = split_package_version(name)
+        if not split:
+            continue
+        pn, version = split
+        keywords, slot, iuse = parse_md5_cache_entry(data)
+        if os_arch:
+            keywords = keywords.split()
+            if os_arch not in keywords and '~' + os_arch not in keywords:
+                continue
+        package = '%s/%s' % (category, pn)
+        variant = (
+            slot.split('/', 1)[0],
+            frozenset(flag.lstrip('+-') for flag in iuse.split()))
+        _, variants = packages.get(package, (None, ()))
+        if variant not in variants:
+            variants += (variant,)
+        packages[package] = (version, variants)
+    return [
+        (package, version, variants)
+        for package, (version, variants) in packages.items()]
+
+
+def parse_category_directory(category, path, os_arch):
+    """Read and parse the md5-cache entries of a category in a local repository."""
+    entries = []
+    for name in sorted(os.listdir(path)):
+        with open(os.path.join(path, name), 'rb') as f:
+            entries.append((name, f.read()))
+    return parse_category(category, entries, os_arch)
+
+
+def enumerate_snapshot_categories(url):
+    """
+    Enumerate the md5-cache entries in a repository snapshot tarball by category.
+
+    The tarball is streamed, so it is never written to disk.
+
+    :param url: the URL of the snapshot tarball.
+
+    :returns: an enumeration of (category, [(file name, contents), ...]) tuples.
+    """
+    category = None
+    entries = []
+    with open_compressed_url(url) as f:
+        with tarfile.open(mode='r|', fileobj=f) as tf:
+            for ti in tf:
+                if not ti.isfile():
+                    continue
+                # Snapshots usually contain a top-level directory
+                _, sep, rel_path = ti.name.partition(MD5_CACHE_PATH + '/')
+                if not sep or rel_path.count('/') != 1:
+                    continue
+                entry_category, name = rel_path.split('/')
+                if entry_category != category:
+                    if entries:
+                        yield category, entries
+                    category = entry_category
+                    entries = []
+                entries.append((name, tf.extractfile(ti).read()))
+    if entries:
+        yield category, entries
+
+
+def _local_repository_path(url):
+    parsed = urlparse(url)
+    if parsed.scheme not in ('', 'file'):
+        return None
+    path = url2pathname(parsed.path)
+    if not os.path.isdir(path):
+        return None
+    return path
+
+
+def enumerate_gentoo_packages(url, os_arch, jobs=None):
+    """
+    Enumerate the packages in a Gentoo ebuild repository.
+
+    The md5-cache entries of each category are parsed in parallel worker
+    processes, which return only the package names, versions, slots and
+    USE flags.
+
+    :param url: the URL of a repository snapshot tarball, or the URL or path
+      of a local checkout of the repository.
+    :param os_arch: the Gentoo keyword of the architecture associated with the
+      packages, or an empty string to include all packages.
+    :param jobs: the number of worker processes, which defaults to the number
+      of CPUs.
+
+    :returns: an enumeration of package entries.
+    """
+    local_path = _local_repository_path(url)
+    print('Reading Gentoo package metadata from ' + url)
+    jobs = jobs or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if local_path:
+            md5_cache_path = os.path.join(local_path, *MD5_CACHE_PATH.split('/'))
+            tasks = (
+                (parse_category_directory, category,
+                 os.path.join(md5_cache_path, category))
+                for category in sorted(os.listdir(md5_cache_path)))
+        else:
+            tasks = (
+                (parse_category, category, entries)
+                for category, entries in enumerate_snapshot_categories(url))
+        for func, category, arg in tasks:
+            pending.append(executor.submit(func, category, arg, os_arch))
+            # Limit the number of parsed categories waiting to be consumed
+            if len(pending) < 2 * jobs:
+                continue
+            yield from _make_entries(url, pending.popleft().result())
+        while pending:
+            yield from _make_entries(url, pending.popleft().result())
+
+
+def _make_entries(url, packages):
+    for package, version, variants in packages:
+        yield GentooPackageEntry(package, version, url, variants)
+
+
+class GentooRepositoryCacheCollection(RepositoryCacheCollection):
+    """A collection of Gentoo repository caches which understands slots and USE flags."""
+
+    def find_package(self, pkg_name, os_name, os_code_name, os_arch):
+        atom = split_atom(pkg_name)
+        if atom is None:
+            return None
+        package, slot, flags = atom
+        for p in self.enumerate_packages(os_name, os_code_name, os_arch):
+            if p == package:
+                return p if p.provides(slot, flags) else None
+
+
+def gentoo_snapshot_url(url):
+    """
+    Create an enumerable cache for a Gentoo ebuild repository.
+
+    :param url: the URL of a repository snapshot tarball, or the URL or path
+      of a local checkout of the repository.
+
+    :returns: an enumerable repository cache instance.
+    """
+    return GentooRepositoryCacheCollection(
+        lambda os_name, os_code_name, os_arch:
+            enumerate_gentoo_packages(url, os_arch))
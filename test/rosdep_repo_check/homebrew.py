@@ -0,0 +1,79 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from . import open_compressed_url
+from . import PackageEntry
+from . import RepositoryCacheCollection
+from .json_stream import iterate_json_items
+
+
+def enumerate_homebrew_packages(formula_url):
+    """
+    Enumerate formulae or casks in a Homebrew formula or cask index.
+
+    The index is streamed, and only the name, aliases, former names and stable
+    version of each formula or cask are retained.
+
+    :param formula_url: the URL of the formula.json or cask.json index.
+
+    :returns: an enumeration of package entries.
+    """
+    print('Reading Homebrew formula metadata from ' + formula_url)
+    with open_compressed_url(formula_url) as f:
+        for _, formula in iterate_json_items(f):
+            if 'token' in formula:
+                # casks are named by a token, their 'name' is a display name
+                name = formula['token']
+                version = formula.get('version')
+                names = {formula.get('full_token')}
+                names.update(formula.get('old_tokens') or ())
+            else:
+                name = formula['name']
+                version = (formula.get('versions') or {}).get('stable')
+                names = {formula.get('full_name')}
+                names.update(formula.get('aliases') or ())
+                names.update(formula.get('oldnames') or ())
+            yield PackageEntry(name, version, formula_url)
+            names.discard(None)
+            names.discard(name)
+            for other_name in sorted(names):
+                yield PackageEntry(
+                    other_name, version, formula_url,
+                    source_name=name, binary_name=name)
+
+
+def homebrew_formula_url(formula_url):
+    """
+    Create an enumerable cache for a Homebrew formula or cask index.
+
+    :param formula_url: the URL of the formula.json or cask.json index.
+
+    :returns: an enumerable repository cache instance.
+    """
+    return RepositoryCacheCollection(
+        lambda os_name, os_code_name, os_arch:
+            enumerate_homebrew_packages(formula_url))
@@ -0,0 +1,166 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import codecs
+import json
+
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _JSONStream:
+    """
+    A buffered cursor over a JSON document which is read incrementally.
+
+    Only the part of the document which has not yet been consumed is held in
+    memory, so documents which are much larger than the available memory can
+    be traversed as long as the individual values being decoded are small.
+    """
+
+    def __init__(self, f, chunk_size):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size=0):
+        if self._eof:
+            return False
+        chunk = self._f.read(max(size, self._chunk_size))
+        if not chunk:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._text_decoder.decode(
+                b'', final=True)
+        else:
+            self._buf = self._buf[self._pos:] + self._text_decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Skip any whitespace and return the next character, if any."""
+        while True:
+            while self._pos < len(self._buf):
+                if self._buf[self._pos] not in _WHITESPACE:
+                    return self._buf[self._pos]
+                self._pos += 1
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                'Expected one of %r in JSON document, found %r' % (chars, char))
+        self._pos += 1
+        return char
+
+    def decode(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                # The value is probably truncated at the end of the buffer,
+                # so at least double the pending data before trying again
+                if not self._fill(len(self._buf) - self._pos):
+                    raise
+                continue
+            # A number at the end of the buffer might continue in the next chunk
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+
+def _iterate_members(stream):
+    """Enumerate the keys of a JSON object, leaving the values to the caller."""
+    stream.expect('{')
+    if stream.peek() == '}':
+        stream.expect('}')
+        return
+    while True:
+        key = stream.decode()
+        stream.expect(':')
+        yield key
+        if stream.expect(',}') == '}':
+            return
+
+
+def _iterate_elements(stream):
+    """Enumerate the indices of a JSON array, leaving the values to the caller."""
+    stream.expect('[')
+    if stream.peek() == ']':
+        stream.expect(']')
+        return
+    index = 0
+    while True:
+        yield index
+        index += 1
+        if stream.expect(',]') == ']':
+            return
+
+
+def _iterate_container(stream):
+    if stream.peek() == '[':
+        return _iterate_elements(stream)
+    return _iterate_members(stream)
+
+
+def _descend(stream, path):
+    if not path:
+        for key in _iterate_container(stream):
+            yield key, stream.decode()
+        return
+    for key in _iterate_container(stream):
+        if key == path[0]:
+            yield from _descend(stream, path[1:])
+        else:
+            stream.decode()
+
+
+def iterate_json_items(f, path=(), chunk_size=64 * 1024):
+    """
+    Enumerate the items of a JSON object or array without loading it entirely.
+
+    The document is traversed incrementally, and only the values of the
+    container found at the given path are decoded, one at a time. Values
+    which are not on the path are decoded and immediately discarded, so they
+    should be reasonably small.
+
+    :param f: a binary file-like object containing the UTF-8 JSON document.
+    :param path: a sequence of object keys leading to the container.
+    :param chunk_size: the number of bytes to read from the file at a time.
+
+    :returns: an enumeration of (key, value) tuples for an object, or
+      (index, value) tuples for an array.
+    """
+    yield from _descend(_JSONStream(f, chunk_size), tuple(path))
@@ -0,0 +1,70 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from . import open_compressed_url
+from . import PackageEntry
+from . import RepositoryCacheCollection
+from .json_stream import iterate_json_items
+
+
+def enumerate_nixpkgs_packages(channel_url, os_code_name, os_arch):
+    """
+    Enumerate packages in a nixpkgs channel.
+
+    The channel's package index is streamed, and only the attribute name,
+    package name and version of each package are retained.
+
+    :param channel_url: the URL of the channel's packages.json index.
+    :param os_code_name: the NixOS release associated with the channel.
+    :param os_arch: the Nix system associated with the packages, or an empty
+      string to include packages for any system.
+
+    :returns: an enumeration of package entries.
+    """
+    channel_url = channel_url.replace('$releasever', os_code_name)
+    print('Reading nixpkgs package metadata from ' + channel_url)
+    with open_compressed_url(channel_url) as f:
+        for attr_name, pkg in iterate_json_items(f, ('packages',)):
+            system = pkg.get('system')
+            if os_arch and system and system != os_arch:
+                continue
+            yield PackageEntry(
+                attr_name, pkg.get('version'), channel_url,
+                source_name=pkg.get('pname') or attr_name)
+
+
+def nixpkgs_channel_url(channel_url):
+    """
+    Create an enumerable cache for a nixpkgs channel.
+
+    :param channel_url: the URL of the channel's packages.json index.
+
+    :returns: an enumerable repository cache instance.
+    """
+    return RepositoryCacheCollection(
+        lambda os_name, os_code_name, os_arch:
+            enumerate_nixpkgs_packages(channel_url, os_code_name, os_arch))
@@ -0,0 +1,203 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.error import URLError
+from urllib.request import Request
+from urllib.request import urlopen
+
+from . import PackageEntry
+
+
+SIMPLE_JSON_CONTENT_TYPE = 'application/vnd.pypi.simple.v1+json'
+
+# Existing projects are rarely deleted, while missing ones may be uploaded
+POSITIVE_TTL = 7 * 24 * 60 * 60
+NEGATIVE_TTL = 24 * 60 * 60
+
+_NORMALIZE_PATTERN = re.compile(r'[-_.]+')
+_PROJECT_NAME_PATTERN = re.compile(r'^\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)')
+
+
+def normalize_project_name(name):
+    """
+    Normalize a Python project name as described in PEP 503.
+
+    Requirement specifiers like 'foo[bar]>=1.0' are reduced to the project name.
+
+    :param name: the project name or requirement specifier.
+
+    :returns: the normalized name.
+    """
+    match = _PROJECT_NAME_PATTERN.match(name)
+    if match:
+        name = match.group(1)
+    return _NORMALIZE_PATTERN.sub('-', name).lower()
+
+
+def get_default_cache_dir():
+    """Get the directory used to persist lookup results between runs."""
+    cache_dir = os.environ.get('ROSDEP_REPO_CHECK_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'rosdep_repo_check')
+
+
+class PyPISimpleIndex:
+    """
+    A lookup-based source for projects in a PEP 691 simple repository index.
+
+    Rather than enumerating the entire index, the existence of individual
+    projects is queried. Lookups are performed concurrently in batches, and
+    the results are persisted in a cache file so that subsequent runs only
+    contact the index for projects which weren't checked recently.
+    """
+
+    def __init__(
+        self, base_url, cache_dir=None, jobs=16, timeout=10, retry=2,
+        positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL,
+    ):
+        self.base_url = base_url.rstrip('/') + '/'
+        self._jobs = jobs
+        self._timeout = timeout
+        self._retry = retry
+        self._positive_ttl = positive_ttl
+        self._negative_ttl = negative_ttl
+        self._cache_path = os.path.join(
+            cache_dir or get_default_cache_dir(),
+            'pypi-%s.json' % hashlib.sha256(self.base_url.encode()).hexdigest()[:16])
+        self._lock = threading.Lock()
+        self._results = None
+
+    def _load_cache(self):
+        if self._results is not None:
+            return
+        try:
+            with open(self._cache_path) as f:
+                self._results = json.load(f)
+        except (OSError, ValueError):
+            self._results = {}
+
+    def _save_cache(self):
+        cache_dir = os.path.dirname(self._cache_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._results, f, sort_keys=True)
+            os.replace(tmp_path, self._cache_path)
+        except OSError as e:
+            print(
+                "WARNING: Failed to write PyPI lookup cache '%s': %s" % (
+                    self._cache_path, e),
+                file=sys.stderr)
+
+    def _is_fresh(self, result, now):
+        ttl = self._positive_ttl if result['exists'] else self._negative_ttl
+        return now - result['checked'] < ttl
+
+    def _query(self, name):
+        """Check if a project exists, without downloading its file listing."""
+        url = self.base_url + name + '/'
+        request = Request(url, headers={'Accept': SIMPLE_JSON_CONTENT_TYPE})
+        for attempt in range(self._retry + 1):
+            try:
+                with urlopen(request, timeout=self._timeout) as response:
+                    return response.status == 200
+            except HTTPError as e:
+                if e.code == 404:
+                    return False
+                if e.code != 503 or attempt == self._retry:
+                    e.msg += ' (%s)' % url
+                    raise
+            except URLError as e:
+                if not isinstance(e.reason, socket.timeout) or attempt == self._retry:
+                    raise URLError(str(e) + ' (%s)' % url)
+            time.sleep(1)
+
+    def prefetch(self, names):
+        """
+        Look up the existence of many projects at once.
+
+        Projects with a fresh result in the cache are not queried again.
+
+        :param names: the project names or requirement specifiers.
+        """
+        self._load_cache()
+        now = time.time()
+        with self._lock:
+            pending = sorted({
+                normalize_project_name(name) for name in names
+            }.difference(
+                name for name, result in self._results.items()
+                if self._is_fresh(result, now)))
+        if not pending:
+            return
+        print('Looking up %d projects in %s' % (len(pending), self.base_url))
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            for name, exists in zip(pending, executor.map(self._query, pending)):
+                with self._lock:
+                    self._results[name] = {'exists': exists, 'checked': now}
+        with self._lock:
+            self._save_cache()
+
+    def find_package(self, name):
+        """
+        Find a project by name.
+
+        :param name: the project name or requirement specifier.
+
+        :returns: the package entry, or None if no project was found.
+        """
+        self.prefetch((name,))
+        normalized = normalize_project_name(name)
+        if not self._results[normalized]['exists']:
+            return None
+        return PackageEntry(name, None, self.base_url + normalized + '/')
+
+
+def pypi_simple_url(base_url):
+    """
+    Create a lookup-based source for a PEP 691 simple repository index.
+
+    :param base_url: the URL of the simple index, e.g. https://pypi.org/simple/
+
+    :returns: a project lookup instance.
+    """
+    return PyPISimpleIndex(base_url)
@@ -0,0 +1,57 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+import os
+import unittest
+from unittest import mock
+
+from .config import load_config
+from .config import restrict_config
+
+
+class TestConfig(unittest.TestCase):
+
+    def test_opt_in(self):
+        with mock.patch.dict(os.environ, {'ROSDEP_REPO_CHECK_OPT_IN': ''}):
+            config = load_config()
+        self.assertIn('ubuntu', config['supported_versions'])
+        for os_name in ('freebsd', 'gentoo', 'nixos', 'osx'):
+            self.assertNotIn(os_name, config['supported_versions'])
+        # The sources of platforms which aren't checked are never used
+        self.assertNotIn('gentoo', restrict_config(config)['package_sources'])
+
+        with mock.patch.dict(os.environ, {'ROSDEP_REPO_CHECK_OPT_IN': 'gentoo, nixos'}):
+            config = load_config()
+        self.assertEqual([''], config['supported_versions']['gentoo'])
+        self.assertEqual(['24.05'], config['supported_versions']['nixos'])
+        self.assertNotIn('osx', config['supported_versions'])
+
+        config = load_config(opt_in=['osx', 'missing'])
+        self.assertEqual([''], config['supported_versions']['osx'])
+        self.assertNotIn('missing', config['supported_versions'])
+        self.assertNotIn('opt_in_versions', config)
@@ -0,0 +1,109 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .freebsd import freebsd_base_url
+from .freebsd import replace_tokens
+
+MANIFESTS = [
+    {'name': 'boost-libs', 'origin': 'devel/boost-libs', 'version': '1.84.0',
+     'repopath': 'All/boost-libs-1.84.0.pkg', 'deps': {'icu': {'origin': 'devel/icu'}}},
+    {'name': 'py311-numpy', 'origin': 'math/py-numpy', 'version': '1.26.4,1'},
+    {'name': 'qt5-core', 'origin': 'devel/qt5-core', 'version': '5.15.13p142'},
+]
+
+
+def _packagesite(manifests):
+    data = b''.join(json.dumps(m).encode('utf-8') + b'\n\n' for m in manifests)
+    buf = io.BytesIO()
+    with tarfile.open(mode='w', fileobj=buf) as tf:
+        for name, member_data in (('+COMPACT_MANIFEST', b'{}'), ('packagesite.yaml', data)):
+            ti = tarfile.TarInfo(name)
+            ti.size = len(member_data)
+            tf.addfile(ti, io.BytesIO(member_data))
+    return buf.getvalue()
+
+
+class TestFreeBSD(unittest.TestCase):
+
+    def test_replace_tokens(self):
+        self.assertEqual(
+            'https://pkg.freebsd.org/FreeBSD:14:amd64/latest',
+            replace_tokens('https://pkg.freebsd.org/FreeBSD:$releasever:$arch/latest', '14', 'amd64'))
+
+    def _test_find_package(self, compress):
+        with tempfile.TemporaryDirectory() as path:
+            repo_path = os.path.join(path, 'FreeBSD:14:amd64', 'latest')
+            os.makedirs(repo_path)
+            with open(os.path.join(repo_path, 'packagesite.pkg'), 'wb') as f:
+                f.write(compress(_packagesite(MANIFESTS)))
+            source = freebsd_base_url('file://' + os.path.join(path, 'FreeBSD:$releasever:$arch', 'latest'))
+
+            def find(name):
+                return source.find_package(name, 'freebsd', '14', 'amd64')
+
+            package = find('boost-libs')
+            self.assertEqual('1.84.0', package.version)
+            self.assertEqual('devel/boost-libs', package.source_name)
+            self.assertEqual(
+                'file://' + os.path.join(repo_path, 'All', 'boost-libs-1.84.0.pkg'), package.url)
+            package = find('py311-numpy')
+            self.assertEqual('math/py-numpy', package.source_name)
+            self.assertEqual('file://' + repo_path, package.url)
+            self.assertIsNone(find('builtin').version)
+            self.assertFalse(find('math/py-numpy'))
+            self.assertFalse(find('icu'))
+
+    def test_find_package(self):
+        self._test_find_package(lambda data: data)
+
+    @unittest.skipIf(zstandard is None, "The 'zstandard' Python package is not installed")
+    def test_find_package_zstd(self):
+        self._test_find_package(zstandard.ZstdCompressor().compress)
+
+    def test_missing_packagesite_yaml(self):
+        buf = io.BytesIO()
+        with tarfile.open(mode='w:xz', fileobj=buf):
+            pass
+        with tempfile.TemporaryDirectory() as path:
+            with open(os.path.join(path, 'packagesite.pkg'), 'wb') as f:
+                f.write(buf.getvalue())
+            source = freebsd_base_url('file://' + path)
+            with self.assertRaisesRegex(RuntimeError, 'packagesite.yaml'):
+                source.find_package('boost-libs', 'freebsd', '14', 'amd64')
@@ -0,0 +1,91 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+import os
+import tempfile
+import unittest
+
+from .gentoo import gentoo_snapshot_url
+from .gentoo import parse_category
+from .gentoo import split_atom
+
+GST_PLUGINS_BASE = [
+    ('gst-plugins-base-0.10.36-r2', b'KEYWORDS=amd64 x86\nSLOT=0.10\nIUSE=X alsa\n'),
+    ('gst-plugins-base-1.22.0', b'KEYWORDS=amd64\nSLOT=1.0\nIUSE=X pango +opengl\n'),
+    ('gst-plugins-base-1.24.0', b'KEYWORDS=~arm64\nSLOT=1.0/1.24\nIUSE=X vulkan\n'),
+]
+
+
+class TestGentoo(unittest.TestCase):
+
+    def test_split_atom(self):
+        self.assertEqual(
+            ('media-libs/gst-plugins-base', '1.0', frozenset(('X', 'pango'))),
+            split_atom('media-libs/gst-plugins-base:1.0[X,pango]'))
+        self.assertEqual(
+            ('sci-libs/vtk', None, frozenset(('boost', 'python', 'qt5'))),
+            split_atom('sci-libs/vtk[boost,python,qt5]'))
+        self.assertEqual(('dev-db/sqlite', '3', frozenset()), split_atom('dev-db/sqlite:3'))
+        self.assertEqual(('dev-libs/boost', None, frozenset()), split_atom('dev-libs/boost'))
+        self.assertIsNone(split_atom('boost'))
+
+    def test_parse_category(self):
+        packages = parse_category('media-libs', GST_PLUGINS_BASE, 'amd64')
+        self.assertEqual(1, len(packages))
+        package, version, variants = packages[0]
+        self.assertEqual('media-libs/gst-plugins-base', package)
+        self.assertEqual('1.22.0', version)
+        self.assertEqual(
+            {('0.10', frozenset(('X', 'alsa'))), ('1.0', frozenset(('X', 'pango', 'opengl')))},
+            set(variants))
+        self.assertEqual(3, len(parse_category('media-libs', GST_PLUGINS_BASE, '')[0][2]))
+
+    def test_find_package(self):
+        with tempfile.TemporaryDirectory() as path:
+            category_path = os.path.join(path, 'metadata', 'md5-cache', 'media-libs')
+            os.makedirs(category_path)
+            for name, data in GST_PLUGINS_BASE:
+                with open(os.path.join(category_path, name), 'wb') as f:
+                    f.write(data)
+            source = gentoo_snapshot_url(path)
+
+            def find(atom, os_arch='amd64'):
+                return source.find_package(atom, 'gentoo', '', os_arch)
+
+            self.assertEqual('media-libs/gst-plugins-base', find('media-libs/gst-plugins-base'))
+            self.assertTrue(find('media-libs/gst-plugins-base:1.0'))
+            self.assertTrue(find('media-libs/gst-plugins-base[pango]'))
+            # Every flag must be in the IUSE of an ebuild of the slot
+            self.assertTrue(find('media-libs/gst-plugins-base:1.0[X,pango]'))
+            self.assertTrue(find('media-libs/gst-plugins-base[X,opengl]'))
+            self.assertFalse(find('media-libs/gst-plugins-base:0.10[X,pango]'))
+            self.assertFalse(find('media-libs/gst-plugins-base[alsa,pango]'))
+            self.assertFalse(find('media-libs/gst-plugins-base:1.0[vulkan]'))
+            self.assertTrue(find('media-libs/gst-plugins-base:1.0[vulkan]', os_arch='arm64'))
+            self.assertFalse(find('media-libs/gst-plugins-base:2'))
+            self.assertFalse(find('media-libs/missing'))
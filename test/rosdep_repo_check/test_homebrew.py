@@ -0,0 +1,92 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import tempfile
+import unittest
+
+from .homebrew import homebrew_formula_url
+
+FORMULAE = [
+    {'name': 'boost', 'full_name': 'boost', 'tap': 'homebrew/core', 'oldnames': [],
+     'aliases': ['boost@1.85'], 'versions': {'stable': '1.85.0', 'head': None, 'bottle': True},
+     'dependencies': ['icu4c'], 'bottle': {'stable': {'files': {'sonoma': {'cellar': '/opt'}}}}},
+    {'name': 'qt@5', 'full_name': 'qt@5', 'tap': 'homebrew/core', 'oldnames': ['qt5'],
+     'aliases': ['qt5-base'], 'versions': {'stable': '5.15.13'}},
+    {'name': 'gz-sim8', 'full_name': 'osrf/simulation/gz-sim8', 'tap': 'osrf/simulation',
+     'versions': {'stable': '8.6.0'}},
+]
+
+CASKS = [
+    {'token': 'xquartz', 'full_token': 'xquartz', 'old_tokens': ['x11'],
+     'tap': 'homebrew/cask', 'name': ['XQuartz'], 'version': '2.8.5',
+     'depends_on': {'macos': {'>=': ['10.9']}}},
+]
+
+
+class TestHomebrew(unittest.TestCase):
+
+    def test_find_package(self):
+        with tempfile.TemporaryDirectory() as path:
+            formula_path = os.path.join(path, 'formula.json')
+            with open(formula_path, 'w') as f:
+                json.dump(FORMULAE, f)
+            source = homebrew_formula_url('file://' + formula_path)
+
+            def find(name):
+                return source.find_package(name, 'osx', '', '')
+
+            package = find('boost')
+            self.assertEqual('1.85.0', package.version)
+            self.assertEqual('boost', package.source_name)
+            self.assertEqual('file://' + formula_path, package.url)
+            for name in ('qt5', 'qt5-base'):
+                package = find(name)
+                self.assertEqual('5.15.13', package.version)
+                self.assertEqual('qt@5', package.source_name)
+                self.assertEqual('qt@5', package.binary_name)
+            self.assertEqual('gz-sim8', find('osrf/simulation/gz-sim8').binary_name)
+            self.assertTrue(find('boost@1.85'))
+            self.assertFalse(find('icu4c'))
+            self.assertFalse(find('homebrew/core'))
+
+    def test_find_cask(self):
+        with tempfile.TemporaryDirectory() as path:
+            cask_path = os.path.join(path, 'cask.json')
+            with open(cask_path, 'w') as f:
+                json.dump(CASKS, f)
+            source = homebrew_formula_url('file://' + cask_path)
+
+            def find(name):
+                return source.find_package(name, 'osx', '', '')
+
+            package = find('xquartz')
+            self.assertEqual('2.8.5', package.version)
+            self.assertEqual('xquartz', find('x11').binary_name)
+            self.assertFalse(find('XQuartz'))
@@ -0,0 +1,106 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+import io
+import json
+import unittest
+
+from .json_stream import iterate_json_items
+
+DOCUMENT = r'''{
+  "meta": {"skipped": [1, {"a": "}\"]", "b": null}], "n": -1.5e3, "s": "é😀"},
+  "packages": {
+    "café": {"pname": "café", "version": "1.0"},
+    "emoji": {"pname": "x😀y", "version": "2.0", "meta": {"nested": [[], {}, [{"deep": "\\"}]]}},
+    "number": 12345678901234567890,
+    "empty": {}
+  },
+  "after": [true, false]
+}
+'''
+
+
+class _SplitReader(io.RawIOBase):
+    """A file which returns the data in two reads, split at an offset."""
+
+    def __init__(self, data, offset):
+        self._data = data
+        self._offset = offset
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        end = self._offset if self._pos < self._offset else len(self._data)
+        if size >= 0:
+            end = min(end, self._pos + size)
+        chunk = self._data[self._pos:end]
+        self._pos = end
+        return chunk
+
+
+class TestJSONStream(unittest.TestCase):
+
+    def test_split_at_every_offset(self):
+        data = DOCUMENT.encode('utf-8')
+        expected = list(json.loads(DOCUMENT)['packages'].items())
+        for offset in range(len(data) + 1):
+            for chunk_size in (1, 7, 64 * 1024):
+                with self.subTest(offset=offset, chunk_size=chunk_size):
+                    self.assertEqual(expected, list(iterate_json_items(
+                        _SplitReader(data, offset), ('packages',), chunk_size=chunk_size)))
+
+    def test_paths(self):
+        data = DOCUMENT.encode('utf-8')
+        self.assertEqual(
+            [(0, True), (1, False)],
+            list(iterate_json_items(io.BytesIO(data), ('after',), chunk_size=3)))
+        self.assertEqual(
+            [(0, [])],
+            list(iterate_json_items(io.BytesIO(b'[[]]'), chunk_size=1)))
+        self.assertEqual(
+            [], list(iterate_json_items(io.BytesIO(data), ('missing',), chunk_size=3)))
+        self.assertEqual(
+            [], list(iterate_json_items(io.BytesIO(b' { } '))))
+
+    def test_truncated(self):
+        data = DOCUMENT.encode('utf-8')
+        end = data.rindex(b'}')
+        for length in range(end + 1):
+            for chunk_size in (1, 64 * 1024):
+                with self.subTest(length=length, chunk_size=chunk_size):
+                    with self.assertRaises(ValueError):
+                        list(iterate_json_items(
+                            io.BytesIO(data[:length]), ('packages',), chunk_size=chunk_size))
+
+    def test_invalid(self):
+        for data in (b'{"packages": [1}', b'{"packages" 1}', b'{"packages": {"a": 1 "b": 2}}', b'"packages"'):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    list(iterate_json_items(io.BytesIO(data), ('packages',)))
@@ -0,0 +1,85 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .nixpkgs import nixpkgs_channel_url
+
+PACKAGES = {
+    'version': 2,
+    'packages': {
+        'boost': {'pname': 'boost', 'version': '1.81.0', 'system': 'x86_64-linux'},
+        'python3Packages.numpy': {
+            'pname': 'numpy', 'version': '1.26.4', 'system': 'x86_64-linux',
+            'meta': {'description': 'Scientific tools for Python', 'platforms': ['x86_64-linux']},
+        },
+        'darwin.apple_sdk': {'pname': 'apple-sdk', 'version': '11.0', 'system': 'aarch64-darwin'},
+        'hello': {'version': '2.12.1'},
+    },
+}
+
+
+class TestNixpkgs(unittest.TestCase):
+
+    def _test_find_package(self, extension, compress):
+        with tempfile.TemporaryDirectory() as path:
+            os.makedirs(os.path.join(path, 'nixos-24.05'))
+            with open(os.path.join(path, 'nixos-24.05', 'packages.json' + extension), 'wb') as f:
+                f.write(compress(json.dumps(PACKAGES).encode('utf-8')))
+            source = nixpkgs_channel_url(
+                'file://' + os.path.join(path, 'nixos-$releasever', 'packages.json' + extension))
+
+            def find(attr_name, os_arch='x86_64-linux'):
+                return source.find_package(attr_name, 'nixos', '24.05', os_arch)
+
+            package = find('python3Packages.numpy')
+            self.assertEqual('python3Packages.numpy', package)
+            self.assertEqual('1.26.4', package.version)
+            self.assertEqual('numpy', package.source_name)
+            self.assertEqual('hello', find('hello').source_name)
+            self.assertTrue(find('boost'))
+            self.assertFalse(find('darwin.apple_sdk'))
+            self.assertTrue(find('darwin.apple_sdk', os_arch='aarch64-darwin'))
+            self.assertTrue(find('darwin.apple_sdk', os_arch=''))
+            self.assertFalse(find('numpy'))
+
+    def test_find_package_gzip(self):
+        self._test_find_package('.gz', gzip.compress)
+
+    @unittest.skipIf(brotli is None, "The 'brotli' Python package is not installed")
+    def test_find_package_brotli(self):
+        self._test_find_package('.br', brotli.compress)
@@ -0,0 +1,116 @@
+# Copyright (c) 2026, Open Source Robotics Foundation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the Willow Garage, Inc. nor the names of its
+#       contributors may be used to endorse or promote products derived from
+#       this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import json
+import tempfile
+import threading
+import unittest
+
+from .pypi import normalize_project_name
+from .pypi import PyPISimpleIndex
+from .pypi import SIMPLE_JSON_CONTENT_TYPE
+
+
+class _SimpleIndexHandler(BaseHTTPRequestHandler):
+
+    projects = ('numpy', 'python-dateutil', 'zope-interface')
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        name = self.path.strip('/').split('/')[-1]
+        if name not in self.projects:
+            self.send_error(404)
+            return
+        body = json.dumps({
+            'meta': {'api-version': '1.0'},
+            'name': name,
+            'files': [],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', SIMPLE_JSON_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPyPISimpleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _SimpleIndexHandler)
+        self._server.requests = []
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.start()
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self._base_url = 'http://127.0.0.1:%d/simple/' % self._server.server_port
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._cache_dir.cleanup()
+
+    def _make_index(self, **kwargs):
+        return PyPISimpleIndex(
+            self._base_url, cache_dir=self._cache_dir.name, jobs=4, **kwargs)
+
+    def test_normalize_project_name(self):
+        self.assertEqual('zope-interface', normalize_project_name('Zope.Interface'))
+        self.assertEqual('python-dateutil', normalize_project_name('python_dateutil'))
+        self.assertEqual('foo-bar', normalize_project_name('Foo__Bar[baz]>=1.0'))
+
+    def test_find_package(self):
+        index = self._make_index()
+        index.prefetch(('NumPy', 'numpy', 'zope.interface', 'missing'))
+        self.assertEqual(3, len(self._server.requests))
+
+        package = index.find_package('NumPy')
+        self.assertEqual('NumPy', package)
+        self.assertEqual(self._base_url + 'numpy/', package.url)
+        self.assertTrue(index.find_package('zope.interface'))
+        self.assertIsNone(index.find_package('missing'))
+        self.assertEqual(3, len(self._server.requests))
+
+    def test_persistent_cache(self):
+        self._make_index().prefetch(('numpy', 'missing'))
+        self.assertEqual(2, len(self._server.requests))
+
+        index = self._make_index()
+        self.assertTrue(index.find_package('numpy'))
+        self.assertIsNone(index.find_package('missing'))
+        self.assertEqual(2, len(self._server.requests))
+
+        # Negative results expire first
+        index = self._make_index(negative_ttl=0)
+        self.assertTrue(index.find_package('numpy'))
+        self.assertIsNone(index.find_package('missing'))
+        self.assertEqual(
+            ['/simple/missing/'], self._server.requests[2:])
@@ -32,11 +32,14 @@ import subprocess
 import sys
 import unidiff
 import unittest
-import yaml
+
+from scripts.yaml_loader import load_yaml_file
 
 from . import get_package_link
 from .config import load_config
 from .suggest import make_suggestion
+from .verify import compile_config_rules
+from .verify import verify_installer_rules
 from .verify import verify_rules
 from .yaml import AnnotatedSafeLoader
 from .yaml import isolate_yaml_snippets_from_line_numbers
@@ -90,17 +93,19 @@ class TestRosdepRepositoryCheck(unittest.TestCase):
         cls._config = load_config()
         cls._full_data = {}
         cls._isolated_data = {}
+        cls._rules = {}
         cls._repo_root = os.path.join(os.path.dirname(__file__), '..', '..')
 
         # For clarity in the logs, show as 'skipped' rather than 'passed'
         if not cls._changed_lines:
             raise unittest.SkipTest('No rosdep changes were detected')
 
-        for path in ('rosdep/base.yaml', 'rosdep/python.yaml'):
+        for path in ('rosdep/base.yaml', 'rosdep/osx-homebrew.yaml', 'rosdep/python.yaml'):
             if path not in cls._changed_lines:
                 continue
-            with open(os.path.join(cls._repo_root, path)) as f:
-                cls._full_data[path] = yaml.load(f, Loader=AnnotatedSafeLoader)
+            cls._full_data[path] = load_yaml_file(
+                os.path.join(cls._repo_root, path), loader=AnnotatedSafeLoader)
+            cls._rules[path] = compile_config_rules(cls._config, cls._full_data[path])
             isolated_data = isolate_yaml_snippets_from_line_numbers(
                 cls._full_data[path], cls._changed_lines[path])
             if not isolated_data:
@@ -114,7 +119,7 @@ class TestRosdepRepositoryCheck(unittest.TestCase):
         for path, data in self._isolated_data.items():
             print("Verifying the following rosdep rules in '%s':" % path)
             results = verify_rules(
-                self._config, data, self._full_data[path], include_found=True)
+                self._config, self._rules[path], data, include_found=True)
             for os_name, os_ver, os_arch, key, package, provider in results:
                 if not provider:
                     broken = True
@@ -134,6 +139,32 @@ class TestRosdepRepositoryCheck(unittest.TestCase):
 
         assert not broken, 'New rules contain packages not present in repositories'
 
+    def test_installer_rules(self):
+        broken = False
+
+        for path, data in self._isolated_data.items():
+            print("Verifying the installer rules in '%s':" % path)
+            results = verify_installer_rules(
+                self._config, self._rules[path], data, include_found=True)
+            for installer, os_name, os_ver, key, package, provider in results:
+                if not provider:
+                    broken = True
+                    print(
+                        '\n::error file=%s,line=%d::'
+                        "Package '%s' could not be found for %s on %s %s" % (
+                            path, getattr(os_ver, '__line__', os_name.__line__),
+                            package, installer, os_name, os_ver),
+                        file=sys.stderr)
+                else:
+                    provider_url = get_package_link(
+                        self._config, provider, os_name, os_ver, None)
+                    print(
+                        "Package '%s' for %s on %s %s was found: %s" % (
+                            package, installer, os_name, os_ver, provider_url),
+                        file=sys.stderr)
+
+        assert not broken, 'New rules contain packages not present in installer sources'
+
     def test_suggest_by_name(self):
         for path, data in self._isolated_data.items():
             print("Looking for name-based suggestions in '%s':" % path)
@@ -143,9 +174,9 @@ class TestRosdepRepositoryCheck(unittest.TestCase):
                     continue
                 if getattr(key, '__line__', None) not in self._changed_lines[path]:
                     continue
-                rules = self._full_data[path][key]
                 missing_os_names = set(
-                    self._config['supported_versions'].keys()).difference(rules.keys())
+                    self._config['supported_versions'].keys()).difference(
+                        self._rules[path].os_names(key))
                 for missing_os in missing_os_names:
                     print('Looking for suggestions for %s on %s' % (key, missing_os))
                     suggestion = make_suggestion(self._config, key, missing_os)
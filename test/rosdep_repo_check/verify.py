@@ -25,19 +25,38 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+from scripts.rosdep_rules import compile_rules
+
+from . import find_installer_package
 from . import find_package
 
 
-def verify_rules(config, rules_to_check, all_rules, include_found=False):
+def compile_config_rules(config, data):
+    """
+    Compile rosdep rules for the platforms supported in the YAML configuration.
+
+    :param config: the parsed YAML configuration.
+    :param data: the parsed rosdep rules.
+
+    :returns: the compiled rule table.
+    """
+    return compile_rules(
+        data, config['supported_versions'], config.get('name_replacements'))
+
+
+def verify_rules(config, rules, rules_to_check=None, include_found=False):
     """
     Verify rosdep rules for supported platforms.
 
     For all platforms supported in the YAML configuration, verify that the
-    repositories contain the packages listed in the rosdep rules.
+    repositories contain the packages listed in the rosdep rules. Only rules
+    which use the default installer of the platform are verified, either
+    implicitly or by naming the installer listed in 'default_installers'.
 
     :param config: the parsed YAML configuration.
-    :param rules_to_check: rosdep rules to be checked.
-    :param all_rules: full rosdep rules to check for individual version rules.
+    :param rules: the compiled rosdep rule table.
+    :param rules_to_check: a subset of the rosdep rules to be checked, or None
+      to check all of the rules in the table.
     :param include_found: in addition to missing rules, also yield those found.
 
     :returns: a tuple of:
@@ -48,36 +67,77 @@ def verify_rules(config, rules_to_check, all_rules, include_found=False):
         - package name
         - corresponding package entry, if found
     """
-    for key, rules in rules_to_check.items():
-        for os_name, os_rules in rules.items():
-            if os_name not in config['package_sources']:
-                continue
-            packages_to_check = {}
-            if not isinstance(os_rules, dict):
-                for os_ver in config['supported_versions'].get(os_name, ()):
-                    packages_to_check[os_ver] = os_rules
-            else:
-                packages_to_check = os_rules
-                if '*' in os_rules:
-                    for os_ver in config['supported_versions'].get(os_name, ()):
-                        if os_ver not in all_rules[key][os_name]:
-                            packages_to_check.setdefault(os_ver, os_rules['*'])
-                    del packages_to_check['*']
-            for os_ver, packages in packages_to_check.items():
-                if os_ver not in config['supported_versions'].get(os_name, ()):
-                    continue
-                if isinstance(packages, dict) and \
-                        tuple(packages.keys()) == ('packages',):
-                    packages = packages['packages']
-                if not isinstance(packages, list):
-                    # Probably a dict specifying the key type, which is not
-                    # currently supported
-                    continue
-                for package in packages or []:
-                    for needle, haystack in config['name_replacements'].get(
-                            os_name, {}).get(os_ver, {}).items():
-                        package = package.replace(needle, haystack)
-                    for os_arch in config['supported_arches'][os_name]:
-                        res = find_package(config, package, os_name, os_ver, os_arch)
-                        if not res or include_found:
-                            yield (os_name, os_ver, os_arch, key, package, res)
+    if rules_to_check is None:
+        entries = rules.items()
+    else:
+        entries = rules.select(rules_to_check)
+    default_installers = config.get('default_installers', {})
+    for (key, os_name, os_ver), rule in entries:
+        if os_name not in config['package_sources']:
+            continue
+        if os_ver not in config['supported_versions'].get(os_name, ()):
+            continue
+        if rule.installer not in (None, default_installers.get(os_name)):
+            # Installers other than the platform default are not verified
+            continue
+        for package in rule.packages:
+            for os_arch in config['supported_arches'][os_name]:
+                res = find_package(config, package, os_name, os_ver, os_arch)
+                if not res or include_found:
+                    yield (os_name, os_ver, os_arch, key, package, res)
+
+
+def verify_installer_rules(config, rules, rules_to_check=None, include_found=False):
+    """
+    Verify rosdep rules for platform-independent installers.
+
+    Rules which name an installer listed in 'installer_sources' in the YAML
+    configuration, such as 'pip', are verified against the sources of that
+    installer. Each package is looked up only once regardless of how many
+    platforms list it, and sources which support it are queried in a batch.
+
+    :param config: the parsed YAML configuration.
+    :param rules: the compiled rosdep rule table.
+    :param rules_to_check: a subset of the rosdep rules to be checked, or None
+      to check all of the rules in the table.
+    :param include_found: in addition to missing rules, also yield those found.
+
+    :returns: a tuple of:
+        - installer name
+        - OS name
+        - OS version
+        - rosdep key
+        - package name
+        - corresponding package entry, if found
+    """
+    if rules_to_check is None:
+        entries = rules.items()
+    else:
+        entries = rules.select(rules_to_check)
+    installer_sources = config.get('installer_sources', {})
+    to_check = []
+    for (key, os_name, os_ver), rule in entries:
+        if rule.installer not in installer_sources:
+            continue
+        if os_ver not in config['supported_versions'].get(os_name, ()):
+            continue
+        to_check.append((rule.installer, os_name, os_ver, key, rule.packages))
+
+    for installer, sources in installer_sources.items():
+        packages = {
+            package
+            for entry in to_check if entry[0] == installer
+            for package in entry[4]}
+        for source in sources:
+            if packages and hasattr(source, 'prefetch'):
+                source.prefetch(packages)
+
+    results = {}
+    for installer, os_name, os_ver, key, packages in to_check:
+        for package in packages:
+            if (installer, package) not in results:
+                results[(installer, package)] = find_installer_package(
+                    config, installer, package)
+            res = results[(installer, package)]
+            if not res or include_found:
+                yield (installer, os_name, os_ver, key, package, res)
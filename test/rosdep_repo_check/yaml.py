@@ -25,10 +25,11 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-import yaml
+from scripts.yaml_loader import LineIndex
+from scripts.yaml_loader import LineNumberLoader
 
 
-class AnnotatedSafeLoader(yaml.SafeLoader):
+class AnnotatedSafeLoader(LineNumberLoader):
     """
     YAML loader that adds '__line__' attributes to some of the parsed data.
 
@@ -58,29 +59,23 @@ class AnnotatedSafeLoader(yaml.SafeLoader):
         def __new__(cls, *args, **kwargs):
             return str.__new__(cls, *args, **kwargs)
 
-    def compose_node(self, parent, index):
-        line = self.line
-        node = super().compose_node(parent, index)
-        node.__line__ = line + 1
-        return node
-
     def construct_annotated_map(self, node):
         data = AnnotatedSafeLoader.AnnotatedDict()
-        data.__line__ = node.__line__
+        data.__line__ = self.get_line(node)
         yield data
         value = self.construct_mapping(node)
         data.update(value)
 
     def construct_annotated_seq(self, node):
         data = AnnotatedSafeLoader.AnnotatedList()
-        data.__line__ = node.__line__
+        data.__line__ = self.get_line(node)
         yield data
         data.extend(self.construct_sequence(node))
 
     def construct_annotated_str(self, node):
         data = self.construct_yaml_str(node)
         data = AnnotatedSafeLoader.AnnotatedStr(data)
-        data.__line__ = node.__line__
+        data.__line__ = self.get_line(node)
         return data
 
 
@@ -113,17 +108,23 @@ def isolate_yaml_snippets_from_line_numbers(yaml_dict, line_numbers):
 
     :returns: a subset of the original data based on the given line numbers.
     """
-    matches = {}
-
+    index = LineIndex(
+        (values.__line__, float('inf'), name) for name, values in yaml_dict.items()
+        if isinstance(values, (AnnotatedSafeLoader.AnnotatedDict, AnnotatedSafeLoader.AnnotatedList)))
+    # Group the lines by the entry they belong to, which is the last entry
+    # starting before a line
+    entry_lines = {}
     for dl in line_numbers:
-        for name, values in reversed(yaml_dict.items()):
-            if isinstance(values, AnnotatedSafeLoader.AnnotatedDict):
-                if values.__line__ <= dl:
-                    merge_dict(matches,
-                               {name: isolate_yaml_snippets_from_line_numbers(values, [dl])})
-                    break
-            elif isinstance(values, AnnotatedSafeLoader.AnnotatedList):
-                if values.__line__ <= dl:
-                    matches[name] = values
-                    break
+        name = index.find(dl)
+        if name is not None:
+            entry_lines.setdefault(name, []).append(dl)
+
+    matches = {}
+    for name, lines in entry_lines.items():
+        values = yaml_dict[name]
+        if isinstance(values, AnnotatedSafeLoader.AnnotatedDict):
+            merge_dict(matches,
+                       {name: isolate_yaml_snippets_from_line_numbers(values, lines)})
+        else:
+            matches[name] = values
     return matches
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+from scripts.rosdep_rules import compile_rules
+from scripts.rosdep_rules import Rule
+
+SUPPORTED_VERSIONS = {
+    'debian': ['bookworm'],
+    'fedora': ['39', '40'],
+    'osx': ['', 'homebrew'],
+    'rhel': ['8', '9'],
+    'ubuntu': ['focal', 'jammy', 'noble'],
+}
+
+DATA = {
+    'foo': {
+        'debian': ['libfoo-dev'],
+        'fedora': 'foo-devel foo-libs',
+        'osx': {'macports': {'packages': ['foo']}},
+        'ubuntu': {
+            '*': ['libfoo-dev'],
+            'focal': ['libfoo1-dev'],
+            'jammy': None,
+        },
+        'unsupported': ['foo'],
+    },
+    'bar': {
+        'rhel': {'8': {'dnf': {'packages': ['bar']}}, '9': []},
+        'ubuntu': {'pip': {'packages': ['bar']}},
+    },
+    'baz': {
+        'ubuntu': {'noble': {'source': {'uri': 'https://example.com/baz.rdmanifest'}}},
+    },
+    'not-a-mapping': ['qux'],
+}
+
+
+def test_compile_rules():
+    rules = compile_rules(DATA, SUPPORTED_VERSIONS)
+    # version-independent rules are expanded to every supported version
+    assert rules[('foo', 'debian', 'bookworm')] == Rule(None, ('libfoo-dev',), True)
+    assert rules[('foo', 'fedora', '39')] == rules[('foo', 'fedora', '40')] == \
+        Rule(None, ('foo-devel', 'foo-libs'), True)
+    # as are installer mappings, which keep their installer
+    assert rules[('foo', 'osx', '')] == rules[('foo', 'osx', 'homebrew')] == \
+        Rule('macports', ('foo',), True)
+    assert rules[('bar', 'ubuntu', 'noble')] == Rule('pip', ('bar',), True)
+    # the wildcard only applies to the versions without a rule of their own
+    assert rules[('foo', 'ubuntu', 'focal')] == Rule(None, ('libfoo1-dev',), False)
+    assert rules[('foo', 'ubuntu', 'noble')] == Rule(None, ('libfoo-dev',), True)
+    # null and empty rules don't list any packages
+    assert rules[('foo', 'ubuntu', 'jammy')] == Rule(None, (), False)
+    assert rules[('bar', 'rhel', '9')] == Rule(None, (), False)
+    assert rules[('bar', 'rhel', '8')] == Rule('dnf', ('bar',), False)
+    assert rules[('baz', 'ubuntu', 'noble')] == Rule('source', (), False)
+    # versions without a rule and unsupported platforms are left out
+    assert ('baz', 'ubuntu', 'focal') not in rules
+    assert not any(os_name == 'unsupported' for _, os_name, _ in rules)
+
+    assert set(rules.rosdep_keys()) == {'foo', 'bar', 'baz'}
+    assert rules.os_names('foo') == {'debian', 'fedora', 'osx', 'ubuntu'}
+    assert len(rules.platforms('baz')) == 1
+
+
+def test_name_replacements():
+    data = {'foo': {'rhel': {'*': ['python%{python3_pkgversion}-foo'], '9': {'pip': ['foo']}}}}
+    replacements = {'rhel': {'8': {'%{python3_pkgversion}': '3'}}}
+    rules = compile_rules(data, SUPPORTED_VERSIONS, replacements)
+    assert rules[('foo', 'rhel', '8')].packages == ('python3-foo',)
+    # only the package names of the default installer are replaced
+    assert rules[('foo', 'rhel', '9')] == Rule('pip', ('foo',), False)
+
+
+def test_select():
+    rules = compile_rules(DATA, SUPPORTED_VERSIONS)
+
+    def select(snippet):
+        return sorted(platform_key for platform_key, _ in rules.select(snippet))
+
+    assert select({'foo': {'ubuntu': DATA['foo']['ubuntu']}}) == [
+        ('foo', 'ubuntu', 'focal'), ('foo', 'ubuntu', 'jammy'), ('foo', 'ubuntu', 'noble')]
+    # a snippet without the wildcard only selects the versions it lists
+    assert select({'foo': {'ubuntu': {'focal': ['libfoo1-dev']}}}) == [('foo', 'ubuntu', 'focal')]
+    assert select({'foo': {'osx': DATA['foo']['osx']}}) == [('foo', 'osx', ''), ('foo', 'osx', 'homebrew')]
+    assert select({'bar': {'rhel': {'8': DATA['bar']['rhel']['8']}}}) == [('bar', 'rhel', '8')]
+    assert select({'missing': {'ubuntu': ['missing']}, 'not-a-mapping': ['qux']}) == []
@@ -1,17 +1,263 @@
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import gzip
 import os
+import re
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
-from catkin_pkg.package import parse_package_string
-from ros_buildfarm.common import topological_order_packages
-from rosdistro import get_index
-from rosdistro.distribution_cache_generator import generate_distribution_cache
+from catkin_pkg.package import InvalidPackage, parse_package_string
+from rosdistro import get_cached_distribution, get_distribution_cache_string, get_index
+from rosdistro.distribution_cache import DistributionCache
+import yaml
 
 from scripts import eol_distro_names
+from scripts.dependency_graph import DependencyGraph
+from scripts.yaml_loader import load_yaml_file
+from scripts.yaml_loader import load_yaml_string
 
 from .fold_block import Fold
 
 INDEX_YAML = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'index.yaml'))
 
+SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# The number of manifests parsed by each task of the process pool
+PARSE_CHUNK_SIZE = 100
+
+
+def get_default_cache_dir():
+    """
+    Get the directory used to keep the generated caches between runs.
+
+    The directory can be set with ROSDISTRO_DIST_CACHE_DIR, and setting it
+    to an empty string disables keeping the caches.
+    """
+    cache_dir = os.environ.get('ROSDISTRO_DIST_CACHE_DIR')
+    if cache_dir is not None:
+        return cache_dir or None
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'rosdistro', 'distribution_cache')
+
+
+def get_distribution_file_data(index, dist_name):
+    urls = index.distributions[dist_name]['distribution']
+    if not isinstance(urls, list):
+        urls = [urls]
+    return [load_yaml_file(url2pathname(urlparse(url).path)) for url in urls]
+
+
+def load_previous_cache(index, dist_name, cache_dir=None):
+    """
+    Load the cache of a distribution kept by a previous run, or else the published one.
+
+    :returns: the cache, or None if neither could be loaded.
+    """
+    if cache_dir:
+        path = os.path.join(cache_dir, '%s-cache.yaml.gz' % dist_name)
+        if os.path.exists(path):
+            print("- use local cache '%s'" % path)
+            try:
+                with gzip.open(path, 'rb') as f:
+                    return DistributionCache(dist_name, load_yaml_string(f.read()))
+            except Exception as e:
+                print('- failed to load local cache: %s' % e)
+    print('- fetch published cache')
+    try:
+        return DistributionCache(dist_name, load_yaml_string(get_distribution_cache_string(index, dist_name)))
+    except Exception as e:
+        print('- failed to fetch published cache: %s' % e)
+    return None
+
+
+def save_cache(cache, cache_dir):
+    path = os.path.join(cache_dir, '%s-cache.yaml.gz' % cache.distribution_file.name)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            f.write(yaml.dump(cache.get_data(), Dumper=SafeDumper).encode('utf-8'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print("WARNING: Failed to write distribution cache '%s': %s" % (path, e), file=sys.stderr)
+
+
+def generate_incremental_cache(index, dist_name, cache_dir=None):
+    """
+    Generate the cache of a distribution, reusing the manifests of a previous cache.
+
+    Like generate_distribution_cache() it checks that the manifest of every
+    released package can be fetched and parsed, and that its version matches
+    the release. The manifests of the previous cache are reused for the
+    packages whose release repository still has the same version and URL,
+    so only the manifests of new or changed releases are fetched.
+
+    :param index: the index of the distributions.
+    :param dist_name: the name of the distribution.
+    :param cache_dir: the directory to load the previous cache from and to
+      keep the generated cache in, or None to only use the published cache.
+
+    :returns: the generated cache.
+    :raises RuntimeError: if any of the manifests is missing or invalid.
+    """
+    print('Build cache for "%s"' % dist_name)
+    dist_file_data = get_distribution_file_data(index, dist_name)
+    cache = load_previous_cache(index, dist_name, cache_dir)
+    if cache:
+        # only the release manifests are checked
+        cache.source_repo_package_xmls = {}
+        # drop the manifests of the releases which have changed
+        cache.update_distribution(dist_file_data)
+    else:
+        print('- build cache from scratch')
+        cache = DistributionCache(dist_name, distribution_file_data=dist_file_data)
+    dist = get_cached_distribution(index, dist_name, cache=cache, allow_lazy_load=True)
+
+    errors = []
+    reused = 0
+    fetched = 0
+    for pkg_name in sorted(dist.release_packages.keys()):
+        repo = dist.repositories[dist.release_packages[pkg_name].repository_name].release_repository
+        if repo.version is None:
+            continue
+        if pkg_name in cache.release_package_xmls:
+            reused += 1
+        else:
+            print("- fetch manifest of package '%s'" % pkg_name)
+            fetched += 1
+        package_xml = dist.get_release_package_xml(pkg_name)
+        if not package_xml:
+            errors.append('%s: missing package.xml file for package "%s"' % (dist_name, pkg_name))
+            continue
+        try:
+            pkg = parse_package_string(package_xml)
+        except InvalidPackage as e:
+            errors.append('%s: invalid package.xml file for package "%s": %s' % (dist_name, pkg_name, e))
+            continue
+        # check that version numbers match (at least without deb inc)
+        if not re.match(r'^%s(-[\dA-z~\+\.]+)?$' % re.escape(pkg.version), repo.version):
+            errors.append(
+                '%s: different version in package.xml (%s) for package "%s" than for the repository (%s) '
+                '(after removing the debian increment)' % (dist_name, pkg.version, pkg_name, repo.version))
+    print('- reused %d manifests and fetched %d' % (reused, fetched))
+
+    # keep the manifests which were fetched, even if others are invalid
+    if cache_dir:
+        save_cache(cache, cache_dir)
+    if errors:
+        raise RuntimeError('\n'.join(errors))
+    return cache
+
+
+def get_package_depends(pkg):
+    """
+    Get the dependencies of a package which determine the order of packages.
+
+    These are the same dependencies as topological_order_packages()
+    considers, but including those on packages outside of the distribution.
+    """
+    all_depends = pkg.build_depends + pkg.buildtool_depends + pkg.run_depends + pkg.test_depends
+    names = {d.name for d in all_depends if d.evaluated_condition is not False}
+    names.update(m for d in pkg.group_depends for m in (d.members or ()) if d.evaluated_condition is not False)
+    return sorted(names)
+
+
+def parse_manifests(package_xmls):
+    """
+    Parse manifests, collecting the warnings of each one.
+
+    :param package_xmls: a list of (package name, package.xml content) tuples.
+
+    :returns: a tuple of a list of (package name, dependency names, warnings)
+      tuples and the seconds taken.
+    """
+    start = time.monotonic()
+    parsed = []
+    for pkg_name, pkg_xml in package_xmls:
+        warnings = []
+        pkg = parse_package_string(pkg_xml, warnings=warnings)
+        parsed.append((pkg_name, get_package_depends(pkg), warnings))
+    return parsed, time.monotonic() - start
+
+
+def check_dependency_cycles(dist_name, depends, cache_dir=None):
+    """
+    Check that the dependencies between the packages of a distribution don't form cycles.
+
+    The dependency graph of the distribution is kept in the cache directory
+    along with its topological order, so only the dependencies which were
+    added since the last check need to be checked.
+
+    :param dist_name: the name of the distribution.
+    :param depends: a dictionary mapping the names of the packages to the
+      names of their dependencies.
+    :param cache_dir: the directory to keep the graph in, or None to check
+      all of the dependencies.
+
+    :returns: a list of the cycles, each being a list of package names which
+      depend on the next one, and ending with the package it starts with.
+    """
+    path = os.path.join(cache_dir, '%s-dependency-graph.json' % dist_name) if cache_dir else None
+    graph = DependencyGraph.load(path) if path else DependencyGraph()
+    cycles = graph.update(depends)
+    if path:
+        graph.save(path)
+    return cycles
+
+
+def check_manifests(caches, errors, cache_dir=None):
+    """
+    Parse the manifests of distributions and check their dependencies for cycles.
+
+    The manifests of all distributions are parsed in chunks across a process
+    pool. The warnings and errors are printed per distribution, in the order
+    of the distributions and of the package names.
+
+    :param caches: a dictionary mapping the names of distributions to their
+      caches.
+    :param errors: a list to append the errors to.
+    :param cache_dir: the directory to keep the dependency graphs in, or
+      None to check all of the dependencies.
+    """
+    with ProcessPoolExecutor() as executor:
+        parse_futures = OrderedDict()
+        for dist_name, cache in caches.items():
+            items = sorted(cache.release_package_xmls.items())
+            parse_futures[dist_name] = [
+                executor.submit(parse_manifests, items[i:i + PARSE_CHUNK_SIZE])
+                for i in range(0, len(items), PARSE_CHUNK_SIZE)]
+
+        for dist_name, futures in parse_futures.items():
+            # This fold is here since github actions doesn't support nested groups.
+            # We should remove it once it's supported.
+            # See: https://github.com/actions/toolkit/issues/1001
+            with Fold():
+                print("Parsing manifest files for '%s'" % dist_name)
+                depends = {}
+                parse_time = 0
+                for future in futures:
+                    parsed, seconds = future.result()
+                    parse_time += seconds
+                    for pkg_name, pkg_depends, warnings in parsed:
+                        depends[pkg_name] = pkg_depends
+                        # Collect parsing warnings and fail if version convention
+                        # are not respected
+                        for warning in warnings:
+                            if 'version conventions' in warning:
+                                errors.append('%s: %s' % (pkg_name, warning))
+                            else:
+                                print('%s: WARNING: %s' % (pkg_name, warning))
+                print("Parsed %d manifest files in %.2fs" % (len(depends), parse_time))
+                print("Check the dependencies of all packages in '%s' for cycles" % dist_name)
+                start = time.monotonic()
+                for cycle in check_dependency_cycles(dist_name, depends, cache_dir):
+                    errors.append('%s: Circular dependency: %s' % (dist_name, ' -> '.join(cycle)))
+                print("Checked the dependencies in %.2fs" % (time.monotonic() - start))
+
 
 def test_build_caches():
     with Fold():
@@ -25,40 +271,18 @@ If this fails you can run 'rosdistro_build_cache index.yaml' to perform the same
 
         errors = []
         caches = OrderedDict()
+        cache_dir = get_default_cache_dir()
         for dist_name in dist_names:
             with Fold():
                 try:
-                    cache = generate_distribution_cache(index, dist_name)
+                    cache = generate_incremental_cache(index, dist_name, cache_dir)
                 except RuntimeError as e:
                     errors.append(str(e))
                 else:
                     caches[dist_name] = cache
 
-        # also check topological order to prevent circular dependencies
-        for dist_name, cache in caches.items():
-            # This fold is here since github actions doesn't support nested groups.
-            # We should remove it once it's supported.
-            # See: https://github.com/actions/toolkit/issues/1001
-            with Fold():
-                pkgs = {}
-                print("Parsing manifest files for '%s'" % dist_name)
-                for pkg_name, pkg_xml in cache.release_package_xmls.items():
-                    # Collect parsing warnings and fail if version convention
-                    # are not respected
-                    warnings = []
-                    pkgs[pkg_name] = parse_package_string(
-                        pkg_xml, warnings=warnings
-                    )
-                    for warning in warnings:
-                        if 'version conventions' in warning:
-                            errors.append('%s: %s' % (pkg_name, warning))
-                        else:
-                            print('%s: WARNING: %s' % (pkg_name, warning))
-                print("Order all packages in '%s' topologically" % dist_name)
-                try:
-                    topological_order_packages(pkgs)
-                except RuntimeError as e:
-                    errors.append('%s: %s' % (dist_name, e))
+        # also check the dependencies to prevent circular dependencies
+        check_manifests(caches, errors, cache_dir)
 
         if errors:
             raise RuntimeError('\n'.join(errors))
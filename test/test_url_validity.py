@@ -30,13 +30,13 @@
 from __future__ import print_function
 from . import hook_permissions
 
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 import os
 import re
-import shutil
 import subprocess
 import sys
-import tempfile
+import time
 import unittest
 try:
     from urllib.parse import urlparse
@@ -45,10 +45,14 @@ except ImportError:
 
 import rosdistro
 from scripts import eol_distro_names
+from scripts.distribution_fingerprints import get_changed_repositories
+from scripts.remote_refs import get_ref_cache
+from scripts.remote_refs import HostLimiter
+from scripts.remote_refs import is_commit_on_branch
+from scripts.yaml_loader import LineIndex
+from scripts.yaml_loader import LineNumberLoader
+from scripts.yaml_loader import load_yaml_file
 import unidiff
-import yaml
-from yaml.composer import Composer
-from yaml.constructor import Constructor
 
 from .fold_block import Fold
 
@@ -62,6 +66,10 @@ DIFF_REPO = 'https://github.com/ros/rosdistro.git'
 
 TARGET_FILE_BLACKLIST = []
 
+# The number of repositories to check in parallel, in total and per host
+JOBS = 8
+JOBS_PER_HOST = 4
+
 
 def get_all_distribution_filenames(url=None):
     if not url:
@@ -114,16 +122,14 @@ def check_git_remote_exists(url, version, tags_valid=False, commits_valid=False)
     #  >the way git plugin handles this conflict, a tag/sha1 is always preferred to branch as this is the way most user use an existing job to trigger a release build.
     #  Catching the corner case to #20286
 
-    tag_match = False
-    cmd = ('git ls-remote %s refs/tags/*' % url).split()
-
+    # The refs of the remote are shared with the other entries and tools
     try:
-        tag_list = subprocess.check_output(cmd).decode('utf-8')
-    except subprocess.CalledProcessError as ex:
-        return (False, 'subprocess call %s failed: %s' % (cmd, ex))
+        refs = get_ref_cache().get_version_refs(url, version)
+    except RuntimeError as ex:
+        return (False, '%s' % ex)
 
-    tags = [t for _, t in (l.split(None, 1) for l in tag_list.splitlines())]
-    if 'refs/tags/%s' % version in tags:
+    tag_match = False
+    if 'refs/tags/%s' % version in refs:
         tag_match = True
     
     if tag_match:
@@ -135,23 +141,13 @@ def check_git_remote_exists(url, version, tags_valid=False, commits_valid=False)
             return (False, error_str)
 
     branch_match = False
-    # check for branch name
-    cmd = ('git ls-remote %s refs/heads/*' % url).split()
-
     commit_match = False
     # Only try to match a full length git commit id as this is an expensive operation
-    if re.match('[0-9a-f]{40}', version):
+    if version and re.match('[0-9a-f]{40}', version):
         try:
-            tmpdir = tempfile.mkdtemp()
-            subprocess.check_call('git clone %s %s/git-repo' % (url, tmpdir), shell=True)
-            # When a commit id is not found it results in a non-zero exit and the message
-            # 'error: malformed object name...'.
-            subprocess.check_call('git -C %s/git-repo branch -r --contains %s' % (tmpdir, version), shell=True)
-            commit_match = True
-        except:
-            pass #return (False, 'No commit found matching %s' % version)
-        finally:
-            shutil.rmtree(tmpdir)
+            commit_match = is_commit_on_branch(url, version)
+        except RuntimeError as ex:
+            return (False, '%s' % ex)
 
     if commit_match:
         if commits_valid:
@@ -162,19 +158,25 @@ def check_git_remote_exists(url, version, tags_valid=False, commits_valid=False)
             return (False, error_str)
 
     # Commits take priority only check for the branch after checking for tags and commits first
-    try:
-        branch_list = subprocess.check_output(cmd).decode('utf-8')
-    except subprocess.CalledProcessError as ex:
-        return (False, 'subprocess call %s failed: %s' % (cmd, ex))
     if not version:
         # If the above passed assume the default exists
         return (True, '')
 
-    if 'refs/heads/%s' % version in branch_list:
+    if 'refs/heads/%s' % version in refs:
         return (True, '')
     return (False, 'No branch found matching %s' % version)
     
 
+def get_github_repo(url):
+    """Get the owner and name of a GitHub repository, or None for other URLs."""
+    parsedurl = urlparse(url)
+    if 'github.com' not in parsedurl.netloc:
+        return None
+    user = os.path.dirname(parsedurl.path).lstrip('/')
+    repo, _ = os.path.splitext(os.path.basename(parsedurl.path))
+    return user, repo
+
+
 def check_source_repo_entry_for_errors(source, tags_valid=False, commits_valid=False):
     errors = []
     if source['type'] != 'git':
@@ -191,20 +193,19 @@ def check_source_repo_entry_for_errors(source, tags_valid=False, commits_valid=F
             % (source['url'], version, source['__line__'], error_reason))
     test_pr = source['test_pull_requests'] if 'test_pull_requests' in source else None
     if test_pr:
-        parsedurl = urlparse(source['url'])
-        if 'github.com' in parsedurl.netloc:
-            user = os.path.dirname(parsedurl.path).lstrip('/')
-            repo, _ = os.path.splitext(os.path.basename(parsedurl.path))
+        github_repo = get_github_repo(source['url'])
+        if github_repo:
+            user, repo = github_repo
             hook_errors = []
             rosghprb_token = os.getenv('ROSGHPRB_TOKEN', None)
             if not rosghprb_token:
                 print('No ROSGHPRB_TOKEN set, continuing without checking hooks')
             else:
-                hooks_valid = hook_permissions.check_hooks_on_repo(user, repo, hook_errors, hook_user='ros-pull-request-builder', callback_url='http://build.ros.org/ghprbhook/', token=rosghprb_token)
+                hooks_valid = hook_permissions.check_hooks_on_repo(user, repo, hook_errors, token=rosghprb_token)
                 if not hooks_valid:
                     errors += hook_errors
         else:
-            errors.append('Pull Request builds only supported on GitHub right now. Cannot do pull request against %s' % parsedurl.netloc)
+            errors.append('Pull Request builds only supported on GitHub right now. Cannot do pull request against %s' % urlparse(source['url']).netloc)
     if errors:
         return(" ".join(errors))
     return None
@@ -230,6 +231,40 @@ def check_repo_for_errors(repo):
     return errors
 
 
+def check_repos_for_errors(repos):
+    """
+    Check many repositories concurrently.
+
+    At most JOBS repositories are checked at once, and at most JOBS_PER_HOST
+    of them on the same host.
+
+    :param repos: a dictionary mapping repository names to their entries.
+
+    :returns: a list of tuples of the errors of each repository and the
+      seconds taken to check it, in the order of the repositories.
+    """
+    rosghprb_token = os.getenv('ROSGHPRB_TOKEN', None)
+    if rosghprb_token:
+        # Query the hooks of repositories in the same organization together
+        github_repos = [
+            get_github_repo(repo['source']['url']) for repo in repos.values()
+            if repo.get('source', {}).get('test_pull_requests') and repo['source'].get('type') == 'git']
+        hook_permissions.prefetch_hooks(
+            ['%s/%s' % r for r in github_repos if r], token=rosghprb_token)
+
+    limiter = HostLimiter(JOBS_PER_HOST)
+
+    def check(repo):
+        entry = repo.get('source') or repo.get('doc') or {}
+        with limiter.get(entry.get('url') or ''):
+            start = time.monotonic()
+            errors = check_repo_for_errors(repo)
+            return errors, time.monotonic() - start
+
+    with ThreadPoolExecutor(max_workers=JOBS) as executor:
+        return list(executor.map(check, repos.values()))
+
+
 def detect_post_eol_release(n, repo, lines):
     errors = []
     if 'release' in repo:
@@ -260,48 +295,38 @@ def detect_post_eol_release(n, repo, lines):
     return errors
 
 
-def load_yaml_with_lines(filename):
-    d = open(filename).read()
-    loader = yaml.Loader(d)
+class LineAnnotatedLoader(LineNumberLoader):
+    """YAML loader which adds '__line__' and '__end_line__' keys to every mapping."""
 
-    def compose_node(parent, index):
-        # the line number where the previous token has ended (plus empty lines)
-        line = loader.line
-        node = Composer.compose_node(loader, parent, index)
-        node.__line__ = line + 1
-        return node
+    def construct_mapping(self, node, deep=False):
+        mapping = super().construct_mapping(node, deep=deep)
+        mapping['__line__'] = self.get_line(node)
+        mapping['__end_line__'] = self.get_end_line(node)
+        return mapping
 
-    construct_mapping = loader.construct_mapping
 
-    def custom_construct_mapping(node, deep=False):
-        mapping = construct_mapping(node, deep=deep)
-        mapping['__line__'] = node.__line__
-        return mapping
-    loader.compose_node = compose_node
-    loader.construct_mapping = custom_construct_mapping
-    data = loader.get_single_data()
-    return data
+def load_yaml_with_lines(filename):
+    return load_yaml_file(filename, loader=LineAnnotatedLoader)
 
 
 def isolate_yaml_snippets_from_line_numbers(yaml_dict, line_numbers):
-    changed_repos = {}
+    ranges = []
+    for name, values in yaml_dict.items():
+        if name in ('__line__', '__end_line__'):
+            continue
+        if not isinstance(values, dict):
+            print("not a dict %s %s" % (name, values))
+            continue
+        ranges.append((values['__line__'], values['__end_line__'], name))
+    index = LineIndex(ranges)
 
+    changed_repos = {}
     for dl in line_numbers:
-        match = None
-        for name, values in yaml_dict.items():
-            if name == '__line__':
-                continue
-            if not isinstance(values, dict):
-                print("not a dict %s %s" % (name, values))
-                continue
-            # print("comparing to repo %s values %s" % (name, values))
-            if values['__line__'] <= dl:
-                if match and match['__line__'] > values['__line__']:
-                    continue
-                match = values
-                match['repo'] = name
-        if match:
-            changed_repos[match['repo']] = match
+        name = index.find(dl)
+        if name is not None:
+            match = yaml_dict[name]
+            match['repo'] = name
+            changed_repos[name] = match
     return changed_repos
 
 
@@ -354,14 +379,26 @@ def main():
                 continue
 
             changed_repos = isolate_yaml_snippets_from_line_numbers(repos, lines)
+            # Skip the repositories whose entries only changed their layout,
+            # and only check the URLs of those whose source or doc changed
+            changed_sections = get_changed_repositories(
+                target_branch, os.path.relpath(path, directory), basedir=directory)
+            if changed_sections is not None:
+                changed_repos = {n: r for n, r in changed_repos.items() if n in changed_sections}
+            checked_repos = {
+                n: r for n, r in changed_repos.items()
+                if changed_sections is None or changed_sections[n] & {'source', 'doc'}}
 
             # print("In file: %s Changed repos are:" % path)
             # pprint.pprint(changed_repos)
 
+            repo_errors = dict(zip(checked_repos, check_repos_for_errors(checked_repos)))
             for n, r in changed_repos.items():
-                errors = check_repo_for_errors(r)
-                detected_errors.extend(["In file '''%s''': " % path + e
-                                        for e in errors])
+                if n in repo_errors:
+                    errors, duration = repo_errors[n]
+                    print("checked repository '%s' in %.2fs" % (n, duration))
+                    detected_errors.extend(["In file '''%s''': " % path + e
+                                            for e in errors])
                 if is_eol_distro:
                     errors = detect_post_eol_release(n, r, lines)
                     detected_errors.extend(["In file '''%s''': " % path + e
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+
+import pytest
+import yaml
+
+from scripts import yaml_loader
+from scripts.yaml_loader import clear_memo
+from scripts.yaml_loader import LineNumberLoader
+from scripts.yaml_loader import load_yaml_file
+from scripts.yaml_loader import load_yaml_string
+
+INVALID_YAML = """foo:
+  ubuntu: [foo
+bar:
+  ubuntu: [bar]
+"""
+
+
+@pytest.fixture
+def tmpdir_path():
+    path = tempfile.mkdtemp()
+    clear_memo()
+    yield path
+    clear_memo()
+    shutil.rmtree(path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Count the documents parsed by load_yaml_file()."""
+    parsed = []
+
+    def counting_load_yaml_string(content, loader=None):
+        parsed.append(content)
+        return load_yaml_string(content, loader)
+    monkeypatch.setattr(yaml_loader, 'load_yaml_string', counting_load_yaml_string)
+    return parsed
+
+
+def _write(path, content, mtime=None):
+    with open(path, 'w') as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_error_messages():
+    with pytest.raises(yaml.YAMLError) as expected:
+        yaml.load(INVALID_YAML, Loader=yaml.SafeLoader)
+    # the errors are those of the pure Python parser, with a snippet
+    for loader in (None, LineNumberLoader):
+        with pytest.raises(yaml.YAMLError) as e:
+            load_yaml_string(INVALID_YAML, loader)
+        assert str(e.value) == str(expected.value)
+        assert '      ubuntu: [foo\n              ^' in str(e.value)
+
+
+def test_memo(tmpdir_path, parses):
+    path = os.path.join(tmpdir_path, 'a.yaml')
+    _write(path, 'foo: [1]\n', mtime=10 ** 18)
+    data = load_yaml_file(path, cache_dir=None)
+    assert data == {'foo': [1]}
+    # callers get their own copy
+    data['foo'].append(2)
+    assert load_yaml_file(path, cache_dir=None) == {'foo': [1]}
+    assert len(parses) == 1
+
+    # a change of the size or of the modification time is noticed
+    _write(path, 'foo: [12]\n', mtime=10 ** 18)
+    assert load_yaml_file(path, cache_dir=None) == {'foo': [12]}
+    _write(path, 'foo: [13]\n', mtime=10 ** 18 + 1)
+    assert load_yaml_file(path, cache_dir=None) == {'foo': [13]}
+    assert len(parses) == 3
+
+
+def test_disk_cache(tmpdir_path, parses, monkeypatch):
+    cache_dir = os.path.join(tmpdir_path, 'cache')
+    path = os.path.join(tmpdir_path, 'a.yaml')
+    _write(path, 'foo: [1]\n')
+    assert load_yaml_file(path, cache_dir=cache_dir) == {'foo': [1]}
+    (cache_file,) = os.listdir(cache_dir)
+    cache_path = os.path.join(cache_dir, cache_file)
+
+    # other runs reuse the cache file
+    clear_memo()
+    assert load_yaml_file(path, cache_dir=cache_dir) == {'foo': [1]}
+    assert len(parses) == 1
+
+    # unless the content of the file changed
+    clear_memo()
+    _write(path, 'foo: [2]\n')
+    assert load_yaml_file(path, cache_dir=cache_dir) == {'foo': [2]}
+    assert len(parses) == 2
+
+    # or the cache file is stale or corrupt
+    clear_memo()
+    monkeypatch.setattr(yaml_loader, 'CACHE_VERSION', yaml_loader.CACHE_VERSION + 1)
+    assert load_yaml_file(path, cache_dir=cache_dir) == {'foo': [2]}
+    assert len(parses) == 3
+    clear_memo()
+    with open(cache_path, 'wb') as f:
+        f.write(b'not a pickle')
+    assert load_yaml_file(path, cache_dir=cache_dir) == {'foo': [2]}
+    assert len(parses) == 4
+    # and is replaced
+    clear_memo()
+    assert load_yaml_file(path, cache_dir=cache_dir) == {'foo': [2]}
+    assert len(parses) == 4
+    assert os.listdir(cache_dir) == [cache_file]